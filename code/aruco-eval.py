@@ -0,0 +1,153 @@
+"""Offline ArUco evaluation over image folders and recorded videos, without Webots.
+
+Frames are streamed from the sources, detected on a process pool and written column by column to a
+.npz file: per-frame source, frame number, detection time and marker count, plus flat id and corner
+columns (frame i owns rows offsets[i]:offsets[i + 1]).
+
+    python aruco-eval.py _data ../controllers/pid5_controller/video.avi -o eval.npz --workers 1 2 4
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+from cv2 import aruco
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "libraries", "python"))
+from mavic_toolkit.detector import ArucoDetector
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+detector = None
+
+
+def init_worker(dictionary):
+    global detector
+    # one OpenCV thread per process, the pool provides the parallelism
+    cv2.setNumThreads(1)
+    detector = ArucoDetector(getattr(aruco, dictionary))
+
+
+def detect_chunk(chunk):
+    results = []
+    for source, frame, image in chunk:
+        start = time.perf_counter()
+        corner, id, _ = detector.find_aruco(image)
+        elapsed = time.perf_counter() - start
+        ids = np.empty(0, np.int32) if id is None else id.reshape(-1).astype(np.int32)
+        corners = np.array(corner, np.float32).reshape(-1, 4, 2) if id is not None else np.empty((0, 4, 2), np.float32)
+        results.append((source, frame, elapsed, ids, corners))
+    return results
+
+
+def read_frames(paths):
+    """Yield (source index, frame number, image) for every frame of every source, one at a time."""
+    for source, path in enumerate(paths):
+        if os.path.isdir(path):
+            files = sorted(f for f in glob.glob(os.path.join(path, "*")) if f.lower().endswith(IMAGE_EXTENSIONS))
+            for frame, name in enumerate(files):
+                image = cv2.imread(name)
+                if image is not None:
+                    yield source, frame, image
+        elif path.lower().endswith(IMAGE_EXTENSIONS):
+            image = cv2.imread(path)
+            if image is not None:
+                yield source, 0, image
+        else:
+            capture = cv2.VideoCapture(path)
+            frame = 0
+            while True:
+                ok, image = capture.read()
+                if not ok:
+                    break
+                yield source, frame, image
+                frame += 1
+            capture.release()
+
+
+def chunks(frames, size):
+    chunk = []
+    for item in frames:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def evaluate(paths, workers, dictionary, chunk_size):
+    """Run detection over all sources; at most two chunks per worker are in flight at any time."""
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(dictionary,)) as pool:
+        pending = deque()
+        for chunk in chunks(read_frames(paths), chunk_size):
+            pending.append(pool.submit(detect_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_columns(output, paths, results):
+    # only the small per-frame results are held, never the frames themselves
+    source, frame, elapsed, count, ids, corners = [], [], [], [], [], []
+    for r_source, r_frame, r_elapsed, r_ids, r_corners in results:
+        source.append(r_source)
+        frame.append(r_frame)
+        elapsed.append(r_elapsed)
+        count.append(len(r_ids))
+        ids.append(r_ids)
+        corners.append(r_corners)
+    count = np.array(count, np.int32)
+    np.savez(
+        output,
+        sources=np.array(paths),
+        source=np.array(source, np.int16),
+        frame=np.array(frame, np.int32),
+        time=np.array(elapsed, np.float32),
+        count=count,
+        offsets=np.concatenate(([0], np.cumsum(count))).astype(np.int64),
+        ids=np.concatenate(ids) if ids else np.empty(0, np.int32),
+        corners=np.concatenate(corners) if corners else np.empty((0, 4, 2), np.float32),
+    )
+    return len(frame), float(np.sum(elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sources", nargs="+", help="image folders, single images or video files")
+    parser.add_argument("-o", "--output", default="aruco-eval.npz")
+    parser.add_argument("--workers", type=int, nargs="+", default=[os.cpu_count() or 1])
+    parser.add_argument("--dictionary", default="DICT_6X6_250")
+    parser.add_argument("--chunk", type=int, default=16, help="frames sent to a worker at once")
+    args = parser.parse_args()
+
+    print("{:>8}{:>9}{:>12}{:>14}".format("workers", "frames", "frames/s", "detect[ms]"))
+    for run, workers in enumerate(args.workers):
+        start = time.perf_counter()
+        results = evaluate(args.sources, workers, args.dictionary, args.chunk)
+        if run == 0:
+            # the first run is written out, the others only measure throughput
+            frames, busy = write_columns(args.output, args.sources, results)
+        else:
+            frames = 0
+            busy = 0.0
+            for r in results:
+                frames += 1
+                busy += r[2]
+        elapsed = time.perf_counter() - start
+        print(
+            "{:>8}{:>9}{:>12.1f}{:>14.3f}".format(
+                workers, frames, frames / elapsed if elapsed else 0.0, busy / frames * 1000 if frames else 0.0
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Throughput of the batched quadrotor model and control laws, and a pid5 gain sweep with it.
+
+The batch of one is first checked against the single-drone model of the headless controller
+module, and a batch-of-one Pid4Law started off the origin must settle at its setpoint; then pid5
+and pid4 are flown for --duration seconds at growing batch sizes. The sweep
+varies the pid5 altitude P and D gains over a grid and prints the sets with the lowest RMS
+error over the climb to 3 m and the hover.
+
+run from the code/ directory:
+    python bench-batch.py --duration 10
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "headless"))
+from batch import BatchQuadrotor, Pid4Law, Pid5Law, rollout
+from controller.physics import Quadrotor
+
+
+def check_model(steps=2000):
+    rng = np.random.default_rng(0)
+    single = Quadrotor()
+    batch = BatchQuadrotor(1)
+    commands = (68.5 + rng.normal(0.0, 3.0, (steps, 4))) * (1, -1, -1, 1)
+    for command in commands:
+        single.velocities[:] = command
+        single.step(0.008)
+        batch.velocities[:] = command
+        batch.step(0.008)
+    return np.abs(single.position - batch.position[:, 0]).max()
+
+
+def check_pid4_hover(duration=30.0, tolerance=0.5):
+    """Final distance of a batch-of-one pid4 hover to its setpoint, from a start 1 m and 0.5 m off."""
+    drones = BatchQuadrotor(1)
+    drones.reset(position=(1.0, 0.5, 0.0))
+    law = Pid4Law(1)
+    result = rollout(law, duration, quadrotor=drones)
+    distance = np.linalg.norm(result.position[0] - law.target()[:, 0])
+    return distance, bool(distance < tolerance and not result.crashed[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0, help="simulated time per rollout [s]")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1, 64, 1024, 4096])
+    args = parser.parse_args()
+
+    print("batch of one vs Quadrotor after 16 s: max position difference {:.1e} m".format(check_model()))
+    print("pid4 batch of one after 30 s: {:.2f} m from the setpoint, holds: {}".format(*check_pid4_hover()))
+
+    print("{:8s} {:>6s} {:>9s} {:>12s} {:>10s}".format("law", "N", "wall[s]", "rollouts/s", "us/drone"))
+    for law in (Pid5Law, Pid4Law):
+        for n in args.sizes:
+            start = time.perf_counter()
+            rollout(law(n), args.duration)
+            elapsed = time.perf_counter() - start
+            steps = args.duration * 1000.0 / 8
+            print(
+                "{:8s} {:6d} {:9.2f} {:12.0f} {:10.3f}".format(law.__name__, n, elapsed, n / elapsed, elapsed / steps / n * 1e6)
+            )
+
+    alti_p, alti_d = np.meshgrid(np.linspace(0.5, 16, 64), np.linspace(0, 20, 64))
+    law = Pid5Law(alti_p.size, alti_p=alti_p.ravel(), alti_d=alti_d.ravel())
+    start = time.perf_counter()
+    result = rollout(law, args.duration)
+    elapsed = time.perf_counter() - start
+    cost = np.where(result.crashed, np.inf, result.error)
+    print("sweep of {} pid5 altitude P/D gains in {:.2f} s, {} crashed".format(law.n, elapsed, int(result.crashed.sum())))
+    for i in np.argsort(cost)[:5]:
+        print(
+            "  alti_p={:5.2f} alti_d={:5.2f} rms error={:.3f} m max tilt={:.3f} rad".format(
+                alti_p.flat[i], alti_d.flat[i], result.error[i], result.tilt[i]
+            )
+        )
+    default = np.argmin(np.abs(alti_p.ravel() - 4) + np.abs(alti_d.ravel() - 10))
+    print("  closest to the shipped 4/10: rms error={:.3f} m".format(result.error[default]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Per-frame ArUco detection latency: rebuilding the dictionary every frame vs. the cached ArucoDetector.
+
+run from the code/ directory:
+    python bench-detector.py
+"""
+
+import glob
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "libraries", "python"))
+from mavic_toolkit import ArucoDetector
+
+repeat = 50
+images = []
+for path in sorted(glob.glob("_data/*.jp*g") + glob.glob("_data/*.png")):
+    frame = cv2.imread(path)
+    if frame is not None:
+        images.append((os.path.basename(path), cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)))
+
+
+def rebuild_every_frame(image):
+    # what find_aruco used to do on every control step
+    return ArucoDetector().find_aruco(image)
+
+
+start = time.perf_counter()
+for _ in range(repeat):
+    detector = ArucoDetector()
+print("dictionary + parameters + detector build: {:.3f} ms".format((time.perf_counter() - start) / repeat * 1000))
+
+print("{:<22}{:>8}{:>14}{:>14}{:>9}".format("image", "markers", "rebuild[ms]", "cached[ms]", "speedup"))
+for name, image in images:
+    timings = []
+    for find_aruco in (rebuild_every_frame, detector.find_aruco):
+        find_aruco(image)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            corner, id, _ = find_aruco(image)
+        timings.append((time.perf_counter() - start) / repeat * 1000)
+    markers = 0 if id is None else len(id)
+    print("{:<22}{:>8}{:>14.3f}{:>14.3f}{:>8.2f}x".format(name[:21], markers, timings[0], timings[1], timings[0] / timings[1]))
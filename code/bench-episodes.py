@@ -0,0 +1,99 @@
+"""Wall-clock time per tuning trial: episode resets in one run against one run per trial.
+
+Both modes fly take_off with the mavic_supervisor gain sweep in the headless harness, in the NUE
+world take_off was written for. The in-process mode writes all --trials gain sets into one sweep
+and lets the supervisor reset the drone between episodes; the reload mode starts a fresh run
+with a one-row sweep per trial, the headless stand-in for reloading the world. take_off re-arms
+on the step the supervisor puts the drone back, so every episode starts from the same state and
+the costs of both modes must agree; a difference means the reset leaves state behind. The final
+altitudes show that the trials hover rather than roll along the ground.
+
+Webots pays much more per reload (world parsing, scene and controller startup) than a fresh
+Python process, so the reduction measured here is a lower bound.
+
+run from the code/ directory:
+    python bench-episodes.py --trials 8
+"""
+
+import argparse
+import csv
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SUPERVISOR = os.path.join(HERE, "..", "controllers", "mavic_supervisor")
+# the settings of mavic_supervisor.py
+EPISODE = 10.0
+SWEEP_FILE = os.path.join(SUPERVISOR, "sweep.csv")
+RESULTS_FILE = os.path.join(SUPERVISOR, "sweep_results.csv")
+
+
+def run(rows):
+    """One harness run of the sweep; wall time and the per-episode costs."""
+    with open(SWEEP_FILE, "w", newline="") as file:
+        csv.writer(file).writerows(rows)
+    # the supervisor quits after the sweep, the duration is only a guard
+    duration = (len(rows) + 1) * EPISODE
+    command = [sys.executable, os.path.join(HERE, "run-headless.py"), "mavic_supervisor", "take_off", "--world", "NUE"]
+    start = time.perf_counter()
+    subprocess.run(command + ["--duration", str(duration), "--keys"], check=True, capture_output=True)
+    elapsed = time.perf_counter() - start
+    with open(RESULTS_FILE, newline="") as file:
+        results = list(csv.DictReader(file))
+    return elapsed, [float(row["cost"]) for row in results], [float(row["y"]) for row in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trials", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # take_off's five gains around the defaults; the thrust within the +-3 of its altitude law, so every trial can hover
+    rng = np.random.default_rng(args.seed)
+    spread = np.array([0.02, 0.1, 0.1, 0.1, 0.1])
+    gains = np.array([68.5, 0.6, 3.0, 50.0, 30.0]) * rng.uniform(1.0 - spread, 1.0 + spread, (args.trials, 5))
+    rows = gains.round(3).tolist()
+
+    saved = {}
+    for path in (SWEEP_FILE, RESULTS_FILE):
+        if os.path.exists(path):
+            saved[path] = path + ".bench"
+            shutil.move(path, saved[path])
+    try:
+        reset_wall, reset_costs, altitudes = run(rows)
+        reload_wall, reload_costs = 0.0, []
+        for row in rows:
+            elapsed, costs, _ = run([row])
+            reload_wall += elapsed
+            reload_costs += costs
+    finally:
+        for path in (SWEEP_FILE, RESULTS_FILE):
+            if os.path.exists(path):
+                os.remove(path)
+        for path, backup in saved.items():
+            shutil.move(backup, path)
+
+    print("{} trials of {:.0f} s simulated".format(args.trials, EPISODE))
+    print("  reload per trial: {:.3f} s wall".format(reload_wall / args.trials))
+    print("  reset per trial:  {:.3f} s wall".format(reset_wall / args.trials))
+    print("  reduction: {:.0%}".format(1.0 - reset_wall / reload_wall))
+    print(
+        "  final altitude: {:.2f}-{:.2f} m, cost {:.3f}-{:.3f} m".format(
+            min(altitudes), max(altitudes), min(reset_costs), max(reset_costs)
+        )
+    )
+    print(
+        "  max relative cost difference between the modes: {:.1e}".format(
+            np.max(np.abs(np.subtract(reset_costs, reload_costs)) / np.abs(reload_costs))
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
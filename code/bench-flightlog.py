@@ -0,0 +1,98 @@
+"""Telemetry write cost per control step and load time per million rows: CSV vs. the binary .flog format.
+
+Write cost is split into what the control step pays (CsvLogger.critical with 2-decimal rounding,
+or TelemetryRecorder.append) and what the writer thread pays per row for each file format. Load
+time compares np.loadtxt on the CSV with memory-mapping the .flog and reading every column.
+
+run from the code/ directory:
+    python bench-flightlog.py [rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "libraries", "python"))
+from flightlog import FlightLog, FlightLogWriter
+from mavic_toolkit.telemetry import CsvWriter, TelemetryRecorder, telemetry_dtype
+
+# pid5_controller.header
+header = ["time", "counter", "roll", "pitch", "yaw", "roll_accel", "pitch_accel", "yaw_accel", "xpos", "ypos"]
+header += ["altitude", "roll_error", "pitch_error", "roll_input", "pitch_input", "yaw_input", "vertical_input"]
+header += ["front_left_motor_input", "front_right_motor_input", "rear_left_motor_input", "rear_right_motor_input"]
+header += ["Speed_X", "Speed_Y", "Speed_Z", "status_takeoff", "status_home", "status_aruco", "status_landing"]
+
+rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+dtype = telemetry_dtype(header)
+rng = np.random.default_rng(0)
+data = np.zeros(rows, dtype)
+for name in header:
+    if dtype[name].kind == "f":
+        data[name] = rng.normal(0, 10, rows)
+data["time"] = np.arange(rows) * 0.008
+data["counter"] = np.arange(rows)
+data["status_takeoff"] = True
+samples = [tuple(row) for row in data[:20000].tolist()]
+directory = tempfile.mkdtemp()
+
+
+def per_step(function):
+    start = time.perf_counter()
+    for row in samples:
+        function(row)
+    return (time.perf_counter() - start) / len(samples) * 1e6
+
+
+def csv_logger_step():
+    from csv_logger import CsvLogger
+
+    csvlogger = CsvLogger(filename=os.path.join(directory, "csvlogger.csv"), header=header)
+
+    def step(row):
+        # what pid5 did on every logged step
+        dlogs = []
+        for i in row[2:]:
+            dlogs.append(float("{:.2f}".format(i)))
+        dlogs.insert(0, row[1])
+        csvlogger.critical(dlogs)
+
+    return per_step(step)
+
+
+def recorder_step():
+    recorder = TelemetryRecorder(os.path.join(directory, "recorder.flog"), header, capacity=len(samples)).start()
+    busy = per_step(recorder.append)
+    recorder.stop()
+    return busy
+
+
+def writer_row(writer):
+    start = time.perf_counter()
+    for block in range(0, rows, 512):
+        writer.write(data[block : block + 512])
+    writer.close()
+    return (time.perf_counter() - start) / rows * 1e6
+
+
+print("{} rows of {} channels".format(rows, len(header)))
+print("control step: CsvLogger.critical  {:8.2f} us".format(csv_logger_step()))
+print("control step: recorder.append     {:8.2f} us".format(recorder_step()))
+
+csv_path = os.path.join(directory, "log.csv")
+flog_path = os.path.join(directory, "log.flog")
+print("writer thread: csv                {:8.2f} us/row".format(writer_row(CsvWriter(csv_path, dtype))))
+print("writer thread: flog               {:8.2f} us/row".format(writer_row(FlightLogWriter(flog_path, dtype))))
+print("file size: csv {:.1f} MB, flog {:.1f} MB".format(os.path.getsize(csv_path) / 1e6, os.path.getsize(flog_path) / 1e6))
+
+start = time.perf_counter()
+table = np.loadtxt(csv_path, delimiter=",", skiprows=1)
+csv_load = (time.perf_counter() - start) / rows * 1e6
+start = time.perf_counter()
+log = FlightLog(flog_path)
+total = sum(float(log[name].sum()) for name in log.names)
+flog_load = (time.perf_counter() - start) / rows * 1e6
+assert np.array_equal(log["altitude"], data["altitude"]) and np.array_equal(table[:, 10], data["altitude"])
+print("load per million rows: csv {:.2f} s, flog {:.3f} s".format(csv_load, flog_load))
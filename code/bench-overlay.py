@@ -0,0 +1,90 @@
+"""pid5's marker overlay: full-frame copy and blend against the box-only Overlay renderer.
+
+Both paths draw the crosshair, a translucent box over the marker and the two marker dots of
+create_marker on a 400x240 frame, for boxes from a marker far below to one filling the view.
+The images must come out identical.
+
+run from the code/ directory:
+    python bench-overlay.py
+"""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "libraries", "python"))
+from overlay import Overlay
+
+HEIGHT, WIDTH = 240, 400
+
+
+def full_frame(image, box):
+    x0, y0, x1, y1 = box
+    image = cv2.line(image, (int(WIDTH / 2), HEIGHT), (int(WIDTH / 2), 0), (255, 255, 0), 1)
+    image = cv2.line(image, (0, int(HEIGHT / 2)), (WIDTH, int(HEIGHT / 2)), (255, 255, 0), 1)
+    shapes = image.copy()
+    cv2.rectangle(shapes, (x0, y0), (x1, y1), (0, 255, 0), -1)
+    alpha = 0.4
+    image = cv2.addWeighted(shapes, alpha, image, 1 - alpha, 0)
+    image = cv2.circle(image, (WIDTH // 2, HEIGHT // 2), 3, (255, 255, 0), 1)
+    image = cv2.circle(image, ((x0 + x1) // 2, (y0 + y1) // 2), 3, (255, 0, 0), 1)
+    return image
+
+
+def box_only(overlay, image, box):
+    x0, y0, x1, y1 = box
+    overlay.line((WIDTH / 2, HEIGHT), (WIDTH / 2, 0), (255, 255, 0))
+    overlay.line((0, HEIGHT / 2), (WIDTH, HEIGHT / 2), (255, 255, 0))
+    overlay.box((x0, y0), (x1, y1), (0, 255, 0), alpha=0.4)
+    overlay.circle((WIDTH // 2, HEIGHT // 2), 3, (255, 255, 0))
+    overlay.circle(((x0 + x1) // 2, (y0 + y1) // 2), 3, (255, 0, 0))
+    return overlay.render(image)
+
+
+def timed(function, repeats):
+    function()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (HEIGHT, WIDTH, 3), np.uint8)
+    image = frame.copy()
+    overlay = Overlay()
+    repeats = 2000
+
+    print("{:>12s} {:>14s} {:>12s} {:>8s} {:>10s}".format("box", "full frame[us]", "box only[us]", "speedup", "identical"))
+    for size in (10, 40, 100, 200, 400):
+        half_w, half_h = min(size, WIDTH) // 2, min(size, HEIGHT) // 2
+        box = (WIDTH // 2 - half_w + 7, HEIGHT // 2 - half_h + 5, WIDTH // 2 + half_w + 7, HEIGHT // 2 + half_h + 5)
+        expected = full_frame(frame.copy(), box)
+        image[:] = frame
+        identical = np.array_equal(box_only(overlay, image, box), expected)
+
+        def old():
+            image[:] = frame
+            full_frame(image, box)
+
+        def new():
+            image[:] = frame
+            box_only(overlay, image, box)
+
+        # both include the same frame refresh
+        refresh = timed(lambda: np.copyto(image, frame), repeats)
+        before = timed(old, repeats) - refresh
+        after = timed(new, repeats) - refresh
+        print(
+            "{:>12s} {:14.1f} {:12.1f} {:7.1f}x {:>10s}".format(
+                "{}x{}".format(box[2] - box[0] + 1, box[3] - box[1] + 1), before, after, before / after, str(identical)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
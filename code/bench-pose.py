@@ -0,0 +1,85 @@
+"""Convergence time and landing accuracy of the pixel-gain landing error vs. the solvePnP metric offset.
+
+A kinematic drone descends from 8 m to 2.5 m over the pad. Every 40 ms it renders a synthetic frame,
+detects the marker and commands a horizontal velocity proportional to the estimated marker offset,
+followed with a first-order lag. The pixel gain is pid5's -4 * error heuristic, the metric offset
+comes from PoseEstimator.
+
+run from the code/ directory:
+    python bench-pose.py
+"""
+
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "libraries", "python"))
+from mavic_toolkit import ArucoDetector, PoseEstimator, marker_geometry, select_marker, stack_corners
+
+import descent
+
+dt = 0.04
+gain = 0.8
+tau = 0.5
+descent_rate = 0.3
+start_altitude = 8.0
+end_altitude = 2.5
+
+ground = descent.make_ground()
+detector = ArucoDetector()
+pose = PoseEstimator(descent.WIDTH, descent.HEIGHT, descent.FOV)
+
+
+def heuristic(corners, target):
+    errors = marker_geometry(corners, (descent.HEIGHT, descent.WIDTH)).errors[target]
+    # x_target_aruco, -y_target_aruco in pid5
+    return -4 * errors[1], -4 * errors[0]
+
+
+def metric(corners, target):
+    offset = pose.offset(corners[target])
+    return None if offset is None else offset[:2]
+
+
+def fly(estimate, x, y):
+    vx = vy = 0.0
+    altitude = start_altitude
+    t = 0.0
+    converged = None
+    while altitude > end_altitude:
+        corner, id, _ = detector.find_aruco(descent.render(ground, x, y, altitude))
+        target = select_marker(id, 1)
+        command = (0.0, 0.0)
+        if target is not None:
+            offset = estimate(stack_corners(corner), target)
+            if offset is not None:
+                command = np.clip(gain * np.array(offset), -1.5, 1.5)
+        vx += (command[0] - vx) * dt / tau
+        vy += (command[1] - vy) * dt / tau
+        x += vx * dt
+        y += vy * dt
+        altitude -= descent_rate * dt
+        t += dt
+        error = math.hypot(x, y)
+        if error < 0.1 and converged is None:
+            converged = t
+        elif error >= 0.1:
+            converged = None
+    return converged, math.hypot(x, y)
+
+
+print("{:>14}{:>16}{:>14}{:>16}{:>14}".format("start [m]", "pixel conv[s]", "pixel err[m]", "metric conv[s]", "metric err[m]"))
+for start in ((1.0, -0.8), (-1.2, 0.6), (0.5, 1.2), (-0.3, -0.3)):
+    pixel = fly(heuristic, *start)
+    metric_result = fly(metric, *start)
+    print(
+        "{:>14}{:>16}{:>14.3f}{:>16}{:>14.3f}".format(
+            "{:+.1f},{:+.1f}".format(*start),
+            "-" if pixel[0] is None else "{:.2f}".format(pixel[0]),
+            pixel[1],
+            "-" if metric_result[0] is None else "{:.2f}".format(metric_result[0]),
+            metric_result[1],
+        )
+    )
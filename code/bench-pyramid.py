@@ -0,0 +1,57 @@
+"""Detection time vs. recall of full-resolution and altitude-scaled (PyramidDetector) search over an altitude sweep.
+
+At 1.5 m the 0.94 m marker is about 300 px wide on the 240 px high frame and cannot be found at any scale.
+
+run from the code/ directory:
+    python bench-pyramid.py
+"""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "libraries", "python"))
+from mavic_toolkit import ArucoDetector, PyramidDetector
+
+import descent
+
+# single-threaded so the numbers reflect the work done, not the thread pool
+cv2.setNumThreads(1)
+
+ground = descent.make_ground()
+rng = np.random.default_rng(1)
+frames_per_altitude = 20
+repeat = 3
+
+detector = ArucoDetector()
+pyramid = PyramidDetector(ArucoDetector(), focal=descent.FOCAL)
+
+print("pyramid downscales between {:.1f} and {:.1f} m, full resolution elsewhere".format(*pyramid.band()))
+print("{:>9}{:>8}{:>12}{:>11}{:>12}{:>11}".format("alti[m]", "scale", "full recall", "full[ms]", "pyr recall", "pyr[ms]"))
+for altitude in (1.5, 2.0, 3.0, 5.0, 8.0, 12.0, 16.0, 20.0, 25.0):
+    # keep the whole pad inside the frame
+    reach = max(0.0, (descent.HEIGHT / 2 - 10) * altitude / descent.FOCAL - descent.PAD_SIZE / 2)
+    frames = [
+        cv2.cvtColor(descent.render(ground, *rng.uniform(-reach, reach, 2), altitude), cv2.COLOR_BGRA2GRAY)
+        for _ in range(frames_per_altitude)
+    ]
+    results = []
+    for find_aruco in (detector.find_aruco, lambda gray: pyramid.find_aruco(gray, altitude)):
+        # best of a few passes, the per-frame work is short enough for scheduler noise to matter
+        best = float("inf")
+        for _ in range(repeat):
+            hits = 0
+            start = time.perf_counter()
+            for gray in frames:
+                corner, id, _ = find_aruco(gray)
+                hits += id is not None
+            best = min(best, time.perf_counter() - start)
+        results.append((hits / len(frames), best / len(frames) * 1000))
+    print(
+        "{:>9.1f}{:>8.2f}{:>12.2f}{:>11.3f}{:>12.2f}{:>11.3f}".format(
+            altitude, pyramid.scales(altitude)[0], results[0][0], results[0][1], results[1][0], results[1][1]
+        )
+    )
@@ -0,0 +1,88 @@
+"""Sensor.read_all against the per-axis getters of mavic_toolkit.Sensor.
+
+Both read the IMU, gyro, GPS and compass of the headless Mavic once per control step: the
+getters as the controllers did (read_imu, read_gyro, read_gps, read_compass_head, one device call
+per axis), read_all with one call per device into its preallocated array. The values must agree
+for both world conventions and units.
+
+The headless devices hand out a stored list. A Webots getter calls into the controller library
+through ctypes and builds a new list from the C buffer on every call; the "webots" row models
+that with a call into libc and a copy out of a ctypes array.
+
+run from the code/ directory:
+    python bench-sensors.py
+"""
+
+import ctypes
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "headless"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "libraries", "python"))
+import controller
+from mavic_toolkit import GPS, GYRO, HEADING, IMU, Actuator, Sensor
+
+
+def getters(sensor):
+    return sensor.read_imu() + sensor.read_gyro() + sensor.read_gps() + (sensor.read_compass_head(),)
+
+
+def read_all(sensor):
+    values = sensor.read_all()
+    return tuple(values[IMU]) + tuple(values[GYRO]) + tuple(values[GPS]) + (values[HEADING],)
+
+
+def copying(device, method):
+    """Make ``device.method`` call into C and return a fresh list copied out of a C array, like Webots."""
+    buffer = (ctypes.c_double * 3)(*getattr(device, method)())
+    library = ctypes.CDLL(None)
+
+    def get():
+        library.labs(0)
+        return [buffer[0], buffer[1], buffer[2]]
+
+    setattr(device, method, get)
+
+
+def timed(function, repeats):
+    function()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    controller.configure(duration=None)
+    robot = controller.Robot()
+    timestep = int(robot.getBasicTimeStep())
+    motor = Actuator(robot)
+    motor.arming(0.0)
+    # an uneven climb, so every axis reads something other than zero
+    motor.motor_speed(motor_fl=70.0, motor_fr=69.0, motor_rl=69.5, motor_rr=70.5)
+    sensors = {(world, degrees): Sensor(robot, world, degrees) for world in ("NUE", "ENU") for degrees in (True, False)}
+    next(iter(sensors.values())).enable(timestep)
+    for _ in range(200):
+        robot.step(timestep)
+
+    identical = all(np.allclose(getters(sensor), read_all(sensor), rtol=0, atol=1e-12) for sensor in sensors.values())
+    print("read_all matches the getters for NUE/ENU, degrees/radians: {}".format(identical))
+
+    repeats = 200000
+    sensor = sensors[("NUE", True)]
+    print("{:>8s} {:>12s} {:>13s} {:>8s} {:>6s}".format("devices", "getters[us]", "read_all[us]", "speedup", "calls"))
+    for name in ("headless", "webots"):
+        if name == "webots":
+            copying(sensor.imu, "getRollPitchYaw")
+            for device in (sensor.gyro, sensor.gps, sensor.compass):
+                copying(device, "getValues")
+        before = timed(lambda: getters(sensor), repeats)
+        after = timed(lambda: sensor.read_all(), repeats)
+        print("{:>8s} {:12.2f} {:13.2f} {:7.1f}x {:>6s}".format(name, before, after, before / after, "10/4"))
+
+
+if __name__ == "__main__":
+    main()
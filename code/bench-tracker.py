@@ -0,0 +1,42 @@
+"""Hit rate and per-frame time of full-frame detection vs. MarkerTracker ROI tracking during a synthetic descent.
+
+run from the code/ directory:
+    python bench-tracker.py
+"""
+
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "libraries", "python"))
+from mavic_toolkit import ArucoDetector, MarkerTracker
+
+import descent
+
+# single-threaded so the numbers reflect the work done, not the thread pool
+cv2.setNumThreads(1)
+
+ground = descent.make_ground()
+frames = list(descent.descent(ground))
+
+detector = ArucoDetector()
+tracker = MarkerTracker(ArucoDetector(), focal=descent.FOCAL)
+
+full_hits = 0
+full_busy = 0.0
+for t, image, speed, altitude, x, y in frames:
+    start = time.perf_counter()
+    corner, id, _ = detector.find_aruco(image)
+    full_busy += time.perf_counter() - start
+    full_hits += id is not None
+
+for t, image, speed, altitude, x, y in frames:
+    tracker.find_aruco(image, t, speed, altitude, yaw=0.0)
+hit_rate, busy, full_frames = tracker.report()
+
+print("descent {:.0f} m -> {:.0f} m, {} frames".format(frames[0][3], frames[-1][3], len(frames)))
+print("{:<10}{:>10}{:>12}{:>13}".format("mode", "hit rate", "busy[ms]", "full frames"))
+print("{:<10}{:>10.3f}{:>12.3f}{:>13}".format("full", full_hits / len(frames), full_busy / len(frames) * 1000, len(frames)))
+print("{:<10}{:>10.3f}{:>12.3f}{:>13}".format("tracking", hit_rate, busy, full_frames))
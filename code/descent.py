@@ -0,0 +1,66 @@
+"""Synthetic downward camera frames over the landing pad, for benchmarking the vision stack without Webots.
+
+The world matches mavic_2_pro_3.wbt: a 1 m pad textured with worlds/textures/aruco-land.png at the origin
+and a 400x240 camera with the default 0.7854 rad field of view looking straight down.
+"""
+
+import math
+import os
+
+import cv2
+import numpy as np
+
+WIDTH = 400
+HEIGHT = 240
+FOV = 0.7854
+FOCAL = WIDTH / 2 / math.tan(FOV / 2)
+PAD_SIZE = 1.0
+# ground texture resolution [px/m] and half extent [m]
+GROUND_RES = 64
+GROUND_EXTENT = 8.0
+
+TEXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "worlds", "textures", "aruco-land.png")
+
+
+def make_ground(seed=0):
+    rng = np.random.default_rng(seed)
+    size = int(2 * GROUND_EXTENT * GROUND_RES)
+    noise = rng.integers(60, 200, (size // 16, size // 16), dtype=np.uint8)
+    ground = cv2.resize(noise, (size, size), interpolation=cv2.INTER_CUBIC)
+    pad = cv2.cvtColor(cv2.imread(TEXTURE), cv2.COLOR_BGR2GRAY)
+    side = int(PAD_SIZE * GROUND_RES)
+    pad = cv2.resize(pad, (side, side), interpolation=cv2.INTER_AREA)
+    start = size // 2 - side // 2
+    ground[start : start + side, start : start + side] = pad
+    return ground
+
+
+def render(ground, x, y, altitude):
+    """Camera frame (BGRA, like Camera.getImage) for the drone at world x (forward), y (left) and altitude."""
+    center = ground.shape[0] / 2
+    scale = FOCAL / (altitude * GROUND_RES)
+    # ground image column grows with -y and row with -x, so flying forward moves the pad down the frame
+    col = center - y * GROUND_RES
+    row = center - x * GROUND_RES
+    if scale < 1.0:
+        # area-average first so high-altitude frames are not aliased
+        size = int(round(ground.shape[0] * scale))
+        ground = cv2.resize(ground, (size, size), interpolation=cv2.INTER_AREA)
+        col, row, scale = col * size / center / 2, row * size / center / 2, scale * center * 2 / size
+    warp = np.array(((scale, 0, WIDTH / 2 - scale * col), (0, scale, HEIGHT / 2 - scale * row)), np.float32)
+    gray = cv2.warpAffine(ground, warp, (WIDTH, HEIGHT), borderValue=128)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGRA)
+
+
+def descent(ground, start=10.0, end=2.0, duration=20.0, rate=25, drift=0.8):
+    """Yield (time, frame, speed, altitude, x, y) for a descent that weaves across the pad."""
+    steps = int(duration * rate)
+    for k in range(steps):
+        t = k / rate
+        altitude = start + (end - start) * t / duration
+        x = drift * math.sin(0.6 * t) * altitude / start
+        y = drift * math.cos(0.4 * t) * altitude / start
+        vz = (end - start) / duration
+        vx = drift * (0.6 * math.cos(0.6 * t) * altitude + math.sin(0.6 * t) * vz) / start
+        vy = drift * (-0.4 * math.sin(0.4 * t) * altitude + math.cos(0.4 * t) * vz) / start
+        yield t, render(ground, x, y, altitude), (vx, vy, vz), altitude, x, y
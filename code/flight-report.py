@@ -0,0 +1,155 @@
+"""Estimation and tracking error of a pid5 flight against the supervisor's ground truth.
+
+Both .flog files are read one chunk at a time and joined on simulation time: the ground-truth
+pose is interpolated at the time of every pid5 row. The report has, per axis, the error of the
+GPS/IMU estimate against the true pose, the error of the true pose against pid5's targets, and
+percentiles of the controller step time. Statistics are running sums and fixed log-spaced
+histograms, so memory stays the same for a minute or a day of flight. CSV logs can be converted
+with flightlog-convert.py first. pid5 logs with run(log=True), the supervisor with LOG_TRUTH = True.
+
+    python flight-report.py ../controllers/pid5_controller/logger.flog ../controllers/mavic_supervisor/ground_truth.flog
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "libraries", "python"))
+from flightlog import FlightLog
+
+# pid5 channel, ground-truth channel
+ESTIMATES = [("xpos", "x"), ("ypos", "y"), ("altitude", "z"), ("roll", "roll"), ("pitch", "pitch"), ("yaw", "yaw")]
+TARGETS = [("x_target", "x"), ("y_target", "y"), ("alti_target", "z")]
+ANGLES = ("roll", "pitch", "yaw")
+
+
+class Summary:
+    """Count, mean, RMS and maximum of a series, with percentiles of its magnitude from a histogram.
+
+    The bins are 1% wide between 1e-9 and 1e3, which bounds the percentile error to 1%.
+    """
+
+    EDGES = np.logspace(-9, 3, 2777)
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.squares = 0.0
+        self.peak = 0.0
+        self.histogram = np.zeros(len(self.EDGES) + 1, np.int64)
+
+    def add(self, values):
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        magnitude = np.abs(values)
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.squares += float(magnitude @ magnitude)
+        self.peak = max(self.peak, float(magnitude.max()))
+        self.histogram += np.bincount(np.searchsorted(self.EDGES, magnitude), minlength=len(self.histogram))
+
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    def rms(self):
+        return np.sqrt(self.squares / self.count) if self.count else np.nan
+
+    def percentile(self, q):
+        """Upper bin edge below which q percent of the magnitudes lie."""
+        if not self.count:
+            return np.nan
+        index = int(np.searchsorted(np.cumsum(self.histogram), q / 100.0 * self.count))
+        return min(float(self.EDGES[min(index, len(self.EDGES) - 1)]), self.peak)
+
+
+def chunks(log, names):
+    """The rows of a flight log one chunk at a time, as 1-D views of the listed channels."""
+    for chunk in log.iter_chunks():
+        rows = int(chunk["rows"])
+        if rows:
+            yield {name: chunk[name][:rows] for name in names}
+
+
+def join(estimate, truth, names):
+    """Estimate chunks with the ground truth interpolated at their times, outside its time range left out.
+
+    Ground-truth chunks are read as the estimate time passes them; the window holds only the rows
+    from the one just before the current estimate chunk onward.
+    """
+    fields = ["time"] + sorted({field for _, field in ESTIMATES + TARGETS})
+    truth_chunks = chunks(truth, fields)
+    window = next(truth_chunks, None)
+    if window is None:
+        return
+    window = {name: np.array(values) for name, values in window.items()}
+    for block in chunks(estimate, names):
+        t = block["time"]
+        while window["time"][-1] < t[-1]:
+            following = next(truth_chunks, None)
+            if following is None:
+                break
+            keep = max(int(np.searchsorted(window["time"], t[0])) - 1, 0)
+            window = {name: np.concatenate((window[name][keep:], following[name])) for name in fields}
+        inside = (t >= window["time"][0]) & (t <= window["time"][-1])
+        if not inside.any():
+            continue
+        times = t[inside]
+        matched = {}
+        for name in fields[1:]:
+            values = np.unwrap(window[name]) if name in ANGLES else window[name]
+            matched[name] = np.interp(times, window["time"], values)
+        yield {name: np.asarray(block[name])[inside] for name in names}, matched
+
+
+def wrap(angle):
+    return (angle + np.pi) % (2.0 * np.pi) - np.pi
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("estimate", help="pid5 telemetry .flog")
+    parser.add_argument("truth", help="mavic_supervisor ground-truth .flog")
+    args = parser.parse_args()
+
+    estimate, truth = FlightLog(args.estimate), FlightLog(args.truth)
+    names = ["time"] + [name for name, _ in ESTIMATES + TARGETS if name in estimate.names]
+    timed = "step_time" in estimate.names
+    if timed:
+        names.append("step_time")
+
+    estimation = {name: Summary() for name, _ in ESTIMATES}
+    tracking = {name: Summary() for name, _ in TARGETS if name in names}
+    step_time = Summary()
+    matched_rows = 0
+    for block, matched in join(estimate, truth, names):
+        matched_rows += len(block["time"])
+        for name, field in ESTIMATES:
+            error = block[name] - matched[field]
+            estimation[name].add(wrap(error) if field in ANGLES else error)
+        for name, summary in tracking.items():
+            summary.add(matched[dict(TARGETS)[name]] - block[name])
+        if timed:
+            step_time.add(block["step_time"])
+
+    print("{} of {} pid5 rows matched to {} ground-truth rows".format(matched_rows, len(estimate), len(truth)))
+    row = "{:12s} {:>10s} {:>10s} {:>10s} {:>10s} {:>10s} {:>10s}"
+    number = "{:12s} {:+10.4f} {:10.4f} {:10.4f} {:10.4f} {:10.4f} {:10.4f}"
+    for title, summaries in (("estimate - truth", estimation), ("truth - target", tracking)):
+        print(title)
+        print(row.format("", "mean", "rms", "p50", "p95", "p99", "max"))
+        for name, summary in summaries.items():
+            percentiles = (summary.percentile(q) for q in (50, 95, 99))
+            print(number.format(name, summary.mean(), summary.rms(), *percentiles, summary.peak))
+    if timed:
+        print(
+            "step time [ms]: mean {:.3f} p50 {:.3f} p95 {:.3f} p99 {:.3f} max {:.3f}".format(
+                step_time.mean() * 1e3, *(step_time.percentile(q) * 1e3 for q in (50, 95, 99)), step_time.peak * 1e3
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Convert pid5 flight logs between CSV and the binary .flog format.
+
+CSV files from both the old CsvLogger (date in the time column, values rounded to 0.01) and the
+TelemetryRecorder are read in blocks, so long flights are converted in bounded memory.
+
+    python flightlog-convert.py ../controllers/pid5_controller/logger.csv logger.flog
+    python flightlog-convert.py ../controllers/pid5_controller/logger.flog logger.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "libraries", "python"))
+from flightlog import EXTENSION, FlightLog, FlightLogWriter
+from mavic_toolkit.telemetry import CsvWriter, telemetry_dtype
+
+# datefmt of CsvLogger
+TIME_FORMAT = "%Y/%m/%d %H:%M:%S"
+
+
+def parse(value):
+    try:
+        return float(value)
+    except ValueError:
+        if value in ("True", "False"):
+            return value == "True"
+        return datetime.strptime(value, TIME_FORMAT).timestamp()
+
+
+def csv_to_flight_log(source, target, block=4096, chunk=1024):
+    with open(source, newline="") as file:
+        reader = csv.reader(file)
+        header = [name.strip() for name in next(reader)]
+        dtype = telemetry_dtype(header)
+        writer = FlightLogWriter(target, dtype, chunk)
+        rows = np.empty(block, dtype)
+        count = 0
+        for line in reader:
+            if not line:
+                continue
+            rows[count] = tuple(parse(value.strip()) for value in line)
+            count += 1
+            if count == block:
+                writer.write(rows)
+                count = 0
+        writer.write(rows[:count])
+        writer.close()
+    return writer.written
+
+
+def flight_log_to_csv(source, target):
+    log = FlightLog(source)
+    dtype = np.dtype(log.channels)
+    writer = CsvWriter(target, dtype)
+    for record in log.chunks:
+        count = int(record["rows"])
+        rows = np.empty(count, dtype)
+        for name in log.names:
+            rows[name] = record[name][:count]
+        writer.write(rows)
+    writer.close()
+    return len(log)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source")
+    parser.add_argument("target")
+    args = parser.parse_args()
+
+    if args.source.endswith(EXTENSION):
+        rows = flight_log_to_csv(args.source, args.target)
+    else:
+        rows = csv_to_flight_log(args.source, args.target)
+    print(
+        "{} rows {} -> {} ({} -> {} bytes)".format(
+            rows, args.source, args.target, os.path.getsize(args.source), os.path.getsize(args.target)
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,490 @@
+"""N quadrotors and their control laws stepped at once, for evaluating many gain sets per second.
+
+``BatchQuadrotor`` is ``controller.physics.Quadrotor`` over arrays of shape (N, ...); every drone
+has its own state and, optionally, its own mass and inertia. ``Pid5Law``, ``Pid4Law`` and
+``TakeOffLaw`` are the control loops of pid5_controller, pid4_controller and take_off with one
+gain set per drone: the same rate groups, device sampling periods, simple_pid semantics on the
+simulation clock and motor mixing, so a batch of one follows the single-drone headless run.
+
+    law = Pid5Law(4096, roll_p=np.linspace(20, 60, 4096))
+    result = rollout(law, 10.0)
+    best = np.argmin(np.where(result.crashed, np.inf, result.error))
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from controller.physics import GRAVITY, ROTORS, nue_attitude, nue_vector
+
+Readings = namedtuple("Readings", ["imu", "gyro", "gps", "compass"])
+Rollout = namedtuple("Rollout", ["position", "error", "tilt", "crashed", "trace"])
+
+
+def rotation_matrices(roll, pitch, yaw):
+    """(3, 3, N) body to world rotations, R = Rz(yaw) Ry(pitch) Rx(roll)."""
+    cr, sr = np.cos(roll), np.sin(roll)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    return np.array(
+        (
+            (cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr),
+            (sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr),
+            (-sp, cp * sr, cp * cr),
+        )
+    )
+
+
+def cross(a, b):
+    """Cross product over the first axis of (3, ...) arrays."""
+    return np.array((a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]))
+
+
+def roll_pitch_yaw(R):
+    """(3, N) roll, pitch, yaw of (3, 3, N) rotations, what the InertialUnit reports."""
+    return np.array((np.arctan2(R[2, 1], R[2, 2]), np.arcsin(np.clip(-R[2, 0], -1.0, 1.0)), np.arctan2(R[1, 0], R[0, 0])))
+
+
+def nue_readings(readings):
+    """The readings as the Mavic reports them in the NUE worlds, which take_off.py and pid4 were written for.
+
+    The mapping of ``controller.World(world="NUE")``: ``nue_attitude`` for the InertialUnit and
+    ``nue_vector`` for the GPS, gyro and compass unchanged.
+    """
+    return Readings(np.array(nue_attitude(*readings.imu)), readings.gyro, np.array(nue_vector(*readings.gps)), readings.compass)
+
+
+class BatchQuadrotor:
+    """N rigid-body quadrotors in an ENU world, the model of ``controller.physics.Quadrotor``.
+
+    The state is stored component-major, ``position`` (3, N) and ``rotation`` (3, 3, N), so every
+    operation of a step runs over contiguous length-N vectors; ``velocities`` is (N, 4) like the
+    laws' motor commands. Parameters are scalars or arrays of length N (inertia (3,) or (3, N))
+    to randomize the fleet.
+    """
+
+    def __init__(
+        self,
+        n,
+        mass=0.49,
+        inertia=(0.005, 0.005, 0.009),
+        thrust_constant=0.00026,
+        torque_constant=5.2e-6,
+        linear_drag=0.1,
+        angular_drag=0.002,
+        max_velocity=576.0,
+    ):
+        self.n = n
+        self.mass = np.broadcast_to(np.asarray(mass, np.float64), (n,))
+        inertia = np.asarray(inertia, np.float64)
+        self.inertia = np.broadcast_to(inertia.reshape(3, -1), (3, n))
+        self.thrust_constant = thrust_constant
+        self.torque_constant = torque_constant
+        self.linear_drag = linear_drag
+        self.angular_drag = angular_drag
+        self.max_velocity = max_velocity
+        self.velocities = np.zeros((n, 4))
+        self.reset()
+
+    def reset(self, position=(0.0, 0.0, 0.0), attitude=(0.0, 0.0, 0.0)):
+        """``position`` and ``attitude`` are (3,) for the whole fleet or (3, N)."""
+        self.position = np.array(np.broadcast_to(np.asarray(position, np.float64).reshape(3, -1), (3, self.n)))
+        self.velocity = np.zeros((3, self.n))
+        roll, pitch, yaw = np.broadcast_to(np.asarray(attitude, np.float64).reshape(3, -1), (3, self.n))
+        self.rotation = rotation_matrices(roll, pitch, yaw)
+        self.rates = np.zeros((3, self.n))
+        self.velocities[:] = 0.0
+        self.on_ground = self.position[2] <= 0.0
+
+    def step(self, dt):
+        omega = np.clip(self.velocities, -self.max_velocity, self.max_velocity)
+        thrusts = self.thrust_constant * omega * omega
+        thrust = thrusts.sum(axis=1)
+        p, q, r = self.rates
+        Ix, Iy, Iz = self.inertia
+        # rotor arm cross body-z thrust summed over the rotors, minus the gyroscopic term w x Iw
+        torque_x = thrusts @ ROTORS[:, 1] - self.angular_drag * p - (Iz - Iy) * q * r
+        torque_y = -(thrusts @ ROTORS[:, 0]) - self.angular_drag * q - (Ix - Iz) * r * p
+        # reaction torque of each propeller opposes its spin
+        torque_z = -self.torque_constant * np.sum(omega * np.abs(omega), axis=1) - self.angular_drag * r
+        torque_z -= (Iy - Ix) * p * q
+
+        acceleration = (self.rotation[:, 2] * thrust - self.linear_drag * self.velocity) / self.mass
+        acceleration[2] -= GRAVITY
+        # resting on the pad, the ground carries the weight
+        resting = self.on_ground & (acceleration[2] <= 0.0)
+
+        p += torque_x / Ix * dt
+        q += torque_y / Iy * dt
+        r += torque_z / Iz * dt
+        self.velocity += acceleration * dt
+        if resting.any():
+            self.velocity[:, resting] = 0.0
+            self.rates[:, resting] = 0.0
+        self.position += self.velocity * dt
+        self._rotate(self.rates * dt)
+
+        landed = ~resting & (self.position[2] <= 0.0)
+        if landed.any():
+            self.position[2, landed] = 0.0
+            self.velocity[:, landed] = 0.0
+            self.rates[:, landed] = 0.0
+            # level out on touchdown
+            yaw = np.arctan2(self.rotation[1, 0, landed], self.rotation[0, 0, landed])
+            self.rotation[:, :, landed] = rotation_matrices(np.zeros_like(yaw), np.zeros_like(yaw), yaw)
+        self.on_ground = resting | landed
+
+    def _rotate(self, rotation_vectors):
+        """R <- R exp([w]x) by Rodrigues' formula; row i of R [k]x is R_i x k."""
+        angle = np.sqrt(np.einsum("in,in->n", rotation_vectors, rotation_vectors))
+        # the axis of a zero rotation does not matter, sin(0) and 1 - cos(0) cancel it
+        axis = rotation_vectors / np.where(angle < 1e-12, 1.0, angle)
+        # rows of R as (3, 3, N) with the component first, so cross() works on them directly
+        rows = self.rotation.transpose(1, 0, 2)
+        first = cross(rows, axis[:, None])
+        second = cross(first, axis[:, None])
+        rows += np.sin(angle) * first + (1.0 - np.cos(angle)) * second
+
+    def read(self):
+        """Sensor values as the fake devices report them, (3, N) arrays in Webots device order."""
+        return Readings(roll_pitch_yaw(self.rotation), self.rates.copy(), self.position.copy(), self.rotation[0].copy())
+
+    @property
+    def tilt(self):
+        """Angle between body z and world z [rad]."""
+        return np.arccos(np.clip(self.rotation[2, 2], -1.0, 1.0))
+
+
+class BatchPID:
+    """``simple_pid.PID`` with per-drone gains and state, on one simulation clock shared by the batch.
+
+    Like simple_pid: proportional on error, derivative on measurement, integral clamped to the
+    output limits, and the previous output returned until ``sample_time`` has passed.
+    """
+
+    def __init__(self, kp, ki, kd, n, setpoint=0.0, output_limits=(None, None), sample_time=0.01):
+        self.kp = np.broadcast_to(np.asarray(kp, np.float64), (n,))
+        self.ki = np.broadcast_to(np.asarray(ki, np.float64), (n,))
+        self.kd = np.broadcast_to(np.asarray(kd, np.float64), (n,))
+        self.n = n
+        self.setpoint = np.array(np.broadcast_to(np.asarray(setpoint, np.float64), (n,)))
+        low, high = output_limits
+        self.low = -np.inf if low is None else low
+        self.high = np.inf if high is None else high
+        self.sample_time = sample_time
+        self.reset()
+
+    def reset(self, now=0.0):
+        self.integral = np.zeros(self.n)
+        self.last_time = now
+        self.last_input = None
+        self.last_output = None
+
+    def __call__(self, input_, now):
+        dt = now - self.last_time if now - self.last_time else 1e-16
+        if self.sample_time is not None and dt < self.sample_time and self.last_output is not None:
+            return self.last_output
+        error = self.setpoint - input_
+        d_input = input_ - (self.last_input if self.last_input is not None else input_)
+        self.integral = np.clip(self.integral + self.ki * error * dt, self.low, self.high)
+        output = np.clip(self.kp * error + self.integral - self.kd * d_input / dt, self.low, self.high)
+        self.last_output = output
+        self.last_input = input_
+        self.last_time = now
+        return output
+
+
+class RateGroup:
+    """Due times of one rate group, the arithmetic of ``mavic_toolkit.scheduler.Task``."""
+
+    def __init__(self, rate, timestep):
+        self.interval = 1000.0 / rate
+        self.period = max(timestep, int(self.interval // timestep) * timestep)
+        self.next_time = float(self.period)
+
+    def due(self, now):
+        now = now * 1000.0
+        if now + 1e-6 < self.next_time:
+            return False
+        self.next_time += self.interval
+        if self.next_time <= now:
+            self.next_time = now + self.interval
+        return True
+
+
+class BatchLaw:
+    """Base of the batched control laws.
+
+    ``GAINS`` maps gain names to the controller's values; any of them can be overridden per drone
+    with an array of length N. ``update`` is called once per control step with the current
+    readings, (3, N) arrays, and returns the (N, 4) signed propeller velocities.
+    """
+
+    GAINS = {}
+    RATES = {"attitude": 125, "position": 50}
+    # sensor -> rate group whose period the device samples at
+    SENSORS = {"imu": "attitude", "gyro": "attitude", "gps": "position", "compass": "attitude"}
+
+    def __init__(self, n, timestep=8, **gains):
+        unknown = set(gains) - set(self.GAINS)
+        if unknown:
+            raise TypeError("unknown gains: {}".format(", ".join(sorted(unknown))))
+        self.n = n
+        self.timestep = timestep
+        self.gains = {
+            name: np.broadcast_to(np.asarray(gains.get(name, value), np.float64), (n,)) for name, value in self.GAINS.items()
+        }
+        self.x_target = np.zeros(n)
+        self.y_target = np.zeros(n)
+        self.z_target = np.zeros(n)
+        self.yaw_target = np.zeros(n)
+        self.armed = np.ones(n, bool)
+        self.reset()
+
+    def reset(self):
+        self.groups = {name: RateGroup(rate, self.timestep) for name, rate in self.RATES.items()}
+        self.motors = np.zeros((self.n, 4))
+
+    def sensor_periods(self):
+        return {sensor: self.groups[group].period for sensor, group in self.SENSORS.items()}
+
+    def target(self):
+        """(3, N) world position the law is steering to, in the ENU frame of the model."""
+        return np.array((self.x_target, self.y_target, self.z_target))
+
+    def update(self, now, readings):
+        raise NotImplementedError
+
+
+class Pid5Law(BatchLaw):
+    """The attitude and position loops of pid5_controller, GPS mode, after take off."""
+
+    GAINS = {
+        "k_vertical_thrust": 68.5,
+        "roll_p": 45.0,
+        "roll_d": 7.0,
+        "pitch_p": 35.0,
+        "pitch_d": 7.0,
+        "alti_p": 4.0,
+        "alti_i": 0.05,
+        "alti_d": 10.0,
+        "yaw_p": 0.5,
+        "yaw_i": 0.0075,
+        "yaw_d": 3.0,
+    }
+
+    def reset(self):
+        super().reset()
+        g = self.gains
+        self.alti_pid = BatchPID(g["alti_p"], g["alti_i"], g["alti_d"], self.n, output_limits=(-1.5, 1.5))
+        self.yaw_pid = BatchPID(g["yaw_p"], g["yaw_i"], g["yaw_d"], self.n, output_limits=(-0.5, 0.5))
+        # "T" in pid5_controller
+        self.z_target[:] = 3.0
+        self.roll_error = np.zeros(self.n)
+        self.pitch_error = np.zeros(self.n)
+        self.vertical_input = np.zeros(self.n)
+
+    def update(self, now, readings):
+        g = self.gains
+        if self.groups["position"].due(now):
+            xpos, ypos, altitude = readings.gps
+            self.roll_error = np.clip(-ypos + 0.06 + self.y_target, -1.5, 1.5)
+            self.pitch_error = np.clip(-xpos - 0.13 + self.x_target, -1.5, 1.5)
+            self.alti_pid.setpoint = self.z_target
+            self.vertical_input = self.alti_pid(altitude, now)
+
+        if self.groups["attitude"].due(now):
+            roll, pitch, yaw = readings.imu
+            roll_accel, pitch_accel, _ = readings.gyro
+            self.yaw_pid.setpoint = self.yaw_target
+            roll_input = g["roll_p"] * np.clip(roll, -1, 1) + g["roll_d"] * roll_accel + self.roll_error
+            pitch_input = g["pitch_p"] * np.clip(pitch, -1, 1) + g["pitch_d"] * pitch_accel - self.pitch_error
+            yaw_input = self.yaw_pid(yaw, now)
+            base = g["k_vertical_thrust"] + self.vertical_input
+            motors = self.motors
+            motors[:, 0] = base - yaw_input + pitch_input - roll_input
+            motors[:, 1] = -(base + yaw_input + pitch_input + roll_input)
+            motors[:, 2] = -(base + yaw_input - pitch_input - roll_input)
+            motors[:, 3] = base - yaw_input - pitch_input + roll_input
+            motors[~self.armed] = 0.0
+        return self.motors
+
+
+class Pid4Law(BatchLaw):
+    """The loops of pid4_controller after take off, on its own sensor conventions.
+
+    pid4 reads the sensors as in its NUE worlds (``nue_readings``: roll offset by pi/2, altitude in
+    the second GPS component) with angles in degrees; the targets are in pid4's frame (x, NUE z,
+    altitude).
+    """
+
+    GAINS = {
+        "vertical_thrust": 68.5,
+        "x_p": 2.0,
+        "x_i": 0.0001,
+        "x_d": 5.0,
+        "y_p": 2.0,
+        "y_i": 0.0001,
+        "y_d": 5.0,
+        "z_p": 3.0,
+        "z_i": 0.08,
+        "z_d": 10.0,
+        "roll_p": 0.35,
+        "roll_d": 0.35,
+        "pitch_p": 0.40,
+        "pitch_d": 0.45,
+        "yaw_p": 0.75,
+        "yaw_i": 0.0,
+        "yaw_d": 0.25,
+    }
+    RATES = {"attitude": 125, "position": 50, "vision": 25}
+
+    def reset(self):
+        super().reset()
+        g = self.gains
+        self.x_pid = BatchPID(g["x_p"], g["x_i"], g["x_d"], self.n, output_limits=(-2.5, 2.5))
+        self.y_pid = BatchPID(g["y_p"], g["y_i"], g["y_d"], self.n, output_limits=(-2.5, 2.5))
+        self.z_pid = BatchPID(g["z_p"], g["z_i"], g["z_d"], self.n, output_limits=(-5, 5))
+        self.yaw_pid = BatchPID(g["yaw_p"], g["yaw_i"], g["yaw_d"], self.n, output_limits=(-2.5, 2.5))
+        # "T" in pid4_controller
+        self.z_target[:] = 3.0
+        self.roll_error = np.zeros(self.n)
+        self.pitch_error = np.zeros(self.n)
+        self.vertical_input = np.zeros(self.n)
+
+    def target(self):
+        # pid4's x, y, z are the NUE GPS components 0, 2, 1, back to ENU
+        return np.array((self.x_target, -self.y_target, self.z_target))
+
+    def update(self, now, readings):
+        g = self.gains
+        position = self.groups["position"].due(now)
+        attitude = self.groups["attitude"].due(now)
+        if not (position or attitude):
+            return self.motors
+        readings = nue_readings(readings)
+        if position:
+            xpos, zpos, ypos = readings.gps
+            self.x_pid.setpoint = self.x_target
+            self.y_pid.setpoint = self.y_target
+            self.z_pid.setpoint = self.z_target
+            self.roll_error = self.y_pid(ypos, now)
+            self.pitch_error = self.x_pid(xpos, now)
+            self.vertical_input = self.z_pid(zpos, now)
+
+        if attitude:
+            roll = np.degrees(readings.imu[0] + np.pi / 2.0)
+            pitch = np.degrees(readings.imu[1])
+            roll_accel, pitch_accel, _ = np.degrees(readings.gyro)
+            heading = np.arctan2(readings.compass[0], readings.compass[1]) - np.pi / 2
+            head = np.degrees(np.where(heading < -np.pi, heading + 2 * np.pi, heading))
+            self.yaw_pid.setpoint = self.yaw_target
+            roll_input = g["roll_p"] * roll + g["roll_d"] * roll_accel - self.roll_error
+            pitch_input = g["pitch_p"] * pitch - g["pitch_d"] * pitch_accel + self.pitch_error
+            yaw_input = self.yaw_pid(head, now)
+            base = g["vertical_thrust"] + self.vertical_input
+            motors = self.motors
+            motors[:, 0] = np.clip(base - roll_input - pitch_input - yaw_input, 0, 100)
+            motors[:, 1] = -np.clip(base + roll_input - pitch_input + yaw_input, 0, 100)
+            motors[:, 2] = -np.clip(base - roll_input + pitch_input + yaw_input, 0, 100)
+            motors[:, 3] = np.clip(base + roll_input + pitch_input - yaw_input, 0, 100)
+            motors[~self.armed] = 0.0
+        return self.motors
+
+
+class TakeOffLaw(BatchLaw):
+    """The loop of take_off.py: P attitude, cubic altitude law, gains as in its ``suggest_to_gain``.
+
+    take_off.py reads the NUE sensors (``nue_readings``); its targets are in that frame too, with
+    ``z_target`` the altitude.
+    """
+
+    GAINS = {
+        "k_vertical_thrust": 68.5,
+        "k_vertical_offset": 0.6,
+        "k_vertical_p": 3.0,
+        "k_roll_p": 50.0,
+        "k_pitch_p": 30.0,
+    }
+    RATES = {"attitude": 125}
+    SENSORS = {"imu": "attitude", "gyro": "attitude", "gps": "attitude", "compass": "attitude"}
+
+    def reset(self):
+        super().reset()
+        self.z_target[:] = 1.0
+
+    def target(self):
+        # NUE x, z, altitude back to ENU
+        return np.array((self.x_target, -self.y_target, self.z_target))
+
+    def update(self, now, readings):
+        g = self.gains
+        if not self.groups["attitude"].due(now):
+            return self.motors
+        readings = nue_readings(readings)
+        roll = readings.imu[0] + np.pi / 2.0
+        pitch, yaw = readings.imu[1], readings.imu[2]
+        px, altitude, py = readings.gps
+        roll_acceleration, pitch_acceleration, _ = readings.gyro
+
+        err_x = px - self.x_target
+        err_y = self.y_target - py
+        err_z = self.z_target - altitude
+        c, s = np.cos(yaw), np.sin(yaw)
+        pitch_err = err_x * c + err_y * s
+        roll_err = -err_x * s + err_y * c
+        roll_input = g["k_roll_p"] * np.clip(roll, -1.0, 1.0) + roll_acceleration - roll_err
+        pitch_input = g["k_pitch_p"] * np.clip(pitch, -1.0, 1.0) - pitch_acceleration - pitch_err
+        yaw_input = 0.1 * (self.yaw_target - yaw)
+        vertical_input = g["k_vertical_p"] * np.clip(err_z + g["k_vertical_offset"], -1.0, 1.0) ** 3
+        base = g["k_vertical_thrust"] + vertical_input
+        motors = self.motors
+        motors[:, 0] = base - roll_input - pitch_input + yaw_input
+        motors[:, 1] = -(base + roll_input - pitch_input - yaw_input)
+        motors[:, 2] = -(base - roll_input + pitch_input - yaw_input)
+        motors[:, 3] = base + roll_input + pitch_input + yaw_input
+        motors[~self.armed] = 0.0
+        return motors
+
+
+def rollout(law, duration, quadrotor=None, trace=False, max_tilt=1.2):
+    """Fly every drone of ``law`` for ``duration`` simulated seconds, like ``World.step`` does.
+
+    position -- (N, 3) final position
+    error    -- (N,) RMS distance to the law's target over the run [m]
+    tilt     -- (N,) largest tilt seen [rad]
+    crashed  -- (N,) bool, tilted past ``max_tilt``, touched down again after lifting off or diverged
+    trace    -- (steps, N, 3) positions when ``trace`` is True, else None
+    """
+    drones = quadrotor if quadrotor is not None else BatchQuadrotor(law.n)
+    periods = law.sensor_periods()
+    dt = law.timestep / 1000.0
+    steps = int(round(duration * 1000.0 / law.timestep))
+    # NaN until the first sample, like the Webots devices
+    readings = Readings(*(np.full((3, law.n), np.nan) for _ in Readings._fields))
+    squared = np.zeros(law.n)
+    tilt = np.zeros(law.n)
+    lifted = np.zeros(law.n, bool)
+    crashed = np.zeros(law.n, bool)
+    positions = np.empty((steps, law.n, 3)) if trace else None
+    target = law.target()
+    for k in range(steps):
+        drones.velocities[:] = law.motors
+        drones.step(dt)
+        time_ms = (k + 1) * law.timestep
+        if any(time_ms % period == 0 for period in periods.values()):
+            fresh = drones.read()
+            readings = Readings(
+                *(fresh[i] if time_ms % periods[name] == 0 else readings[i] for i, name in enumerate(Readings._fields))
+            )
+        law.update(time_ms / 1000.0, readings)
+
+        squared += np.sum((drones.position - target) ** 2, axis=0)
+        tilt = np.maximum(tilt, drones.tilt)
+        crashed |= lifted & drones.on_ground
+        lifted |= ~drones.on_ground
+        if trace:
+            positions[k] = drones.position.T
+    error = np.sqrt(squared / max(steps, 1))
+    crashed |= (tilt > max_tilt) | ~np.isfinite(error)
+    return Rollout(drones.position.T.copy(), error, tilt, crashed, positions)
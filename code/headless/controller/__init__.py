@@ -0,0 +1,425 @@
+"""Headless stand-in for the Webots ``controller`` module.
+
+Put ``code/headless`` in front of ``sys.path`` and the controllers import this package instead of
+Webots'. One Mavic 2 Pro is simulated with the rigid-body model in ``physics.py`` (ENU, z up, like
+the mavic_2_pro worlds). With ``world="NUE"`` the devices and the supervisor report it as in the
+NUE worlds (y up) that take_off, pid3, pid4 and mavic_controller were written for. ``configure``
+sets the run length, the scripted key presses and the camera renderer before the controller
+creates its Robot:
+
+    import controller
+    controller.configure(duration=30.0, keys=[(1.0, "T"), (12.0, "M")])
+
+Keys are given as (time [s], key), the key as a character or a Keyboard constant name such as
+"END"; each press is returned once by ``Keyboard.getKey``. The renderer is called as
+``renderer(quadrotor, gimbal)`` and returns a BGRA frame; without one the camera sees flat gray.
+With ``robots=2`` two controllers, each in its own thread, step the world in lockstep, e.g. a
+supervisor and the drone.
+"""
+
+import math
+import threading
+
+import numpy as np
+
+from controller.devices import (
+    GPS,
+    LED,
+    Camera,
+    Compass,
+    Device,
+    Emitter,
+    Gyro,
+    InertialUnit,
+    Motor,
+    Receiver,
+)
+from controller.physics import NUE, Quadrotor
+
+PROPELLERS = ("front left propeller", "front right propeller", "rear left propeller", "rear right propeller")
+GIMBAL = ("camera roll", "camera pitch", "camera yaw")
+DEVICES = {
+    "inertial unit": InertialUnit,
+    "gyro": Gyro,
+    "gps": GPS,
+    "compass": Compass,
+    "camera": Camera,
+    "front left led": LED,
+    "front right led": LED,
+    "emitter": Emitter,
+    "receiver": Receiver,
+}
+DEVICES.update({name: Motor for name in PROPELLERS + GIMBAL})
+
+settings = {
+    "duration": None,
+    "keys": (),
+    "renderer": None,
+    "basic_time_step": 8,
+    "quadrotor": None,
+    "robots": 1,
+    "world": "ENU",
+}
+world = None
+
+
+def configure(**kwargs):
+    """Set up the next world; must be called before the first Robot is created."""
+    unknown = set(kwargs) - set(settings)
+    if unknown:
+        raise TypeError("unknown settings: {}".format(", ".join(sorted(unknown))))
+    settings.update(kwargs)
+
+
+def get_world():
+    global world
+    if world is None:
+        world = World(**settings)
+    return world
+
+
+class World:
+    def __init__(self, duration=None, keys=(), renderer=None, basic_time_step=8, quadrotor=None, robots=1, world="ENU"):
+        if world not in ("ENU", "NUE"):
+            raise ValueError("world must be ENU or NUE, not {!r}".format(world))
+        self.coordinate_system = world
+        self.nue = world == "NUE"
+        self.duration = duration
+        self.renderer = renderer
+        self.basic_time_step = basic_time_step
+        self.drone = quadrotor if quadrotor is not None else Quadrotor()
+        self.keys = sorted((float(t), key_code(key)) for t, key in keys)
+        self.time_ms = 0
+        self.steps = 0
+        self.quit = False
+        self.devices = {}
+        self.enabled = []
+        self.receivers = []
+        self.outbox = []
+        self.labels = {}
+        # several controllers, each in its own thread, advance the world together like Webots does
+        self.barrier = threading.Barrier(robots, action=self.advance) if robots > 1 else None
+        # only one attached controller runs its own code at a time, see attach
+        self.turn = threading.Lock()
+        self.contexts = {}
+
+    def attach(self, context):
+        """Run the calling thread's controller in ``context``, taking turns with the other controllers.
+
+        ``context.enter()`` is called whenever the controller gets the turn, at the start and after
+        each step, and ``context.leave()`` before it hands the turn on, so every controller can keep
+        its own working directory and modules like the separate processes of Webots.
+        """
+        self.contexts[threading.get_ident()] = context
+        self.turn.acquire()
+        context.enter()
+
+    def detach(self):
+        context = self.contexts.pop(threading.get_ident(), None)
+        if context is not None:
+            context.leave()
+            self.turn.release()
+
+    def device(self, name):
+        if name not in self.devices:
+            if name not in DEVICES:
+                print("Warning: Device '{}' not found.".format(name))
+                return None
+            self.devices[name] = DEVICES[name](self, name)
+        return self.devices[name]
+
+    def enable(self, device):
+        if device not in self.enabled:
+            self.enabled.append(device)
+
+    def disable(self, device):
+        if device in self.enabled:
+            self.enabled.remove(device)
+
+    def send(self, channel, message):
+        self.outbox.append((channel, message))
+
+    def gimbal(self):
+        return tuple(self.devices[name].position if name in self.devices else 0.0 for name in GIMBAL)
+
+    @property
+    def time(self):
+        return self.time_ms / 1000.0
+
+    def step(self, duration):
+        for _ in range(max(1, int(duration) // self.basic_time_step)):
+            if self.quit or (self.duration is not None and self.time >= self.duration):
+                self.stop()
+                return -1
+            if self.barrier is None:
+                self.advance()
+                continue
+            context = self.contexts.get(threading.get_ident())
+            if context is not None:
+                context.leave()
+                self.turn.release()
+            try:
+                self.barrier.wait()
+            except threading.BrokenBarrierError:
+                return -1
+            finally:
+                if context is not None:
+                    self.turn.acquire()
+                    context.enter()
+        return 0
+
+    def stop(self):
+        self.quit = True
+        if self.barrier is not None:
+            # release the controllers still waiting for this one
+            self.barrier.abort()
+
+    def advance(self):
+        dt = self.basic_time_step / 1000.0
+        for i, name in enumerate(PROPELLERS):
+            motor = self.devices.get(name)
+            self.drone.velocities[i] = 0.0 if motor is None else motor.velocity
+        self.drone.step(dt)
+        self.time_ms += self.basic_time_step
+        self.steps += 1
+        outbox, self.outbox = self.outbox, []
+        for channel, message in outbox:
+            for receiver in self.receivers:
+                if receiver.channel == channel or receiver.channel == -1 or channel == -1:
+                    receiver.queue.append(message)
+        for device in self.enabled:
+            if device.period and self.time_ms % device.period == 0:
+                device.sample()
+
+    def pop_key(self):
+        if self.keys and self.keys[0][0] <= self.time + 1e-9:
+            return self.keys.pop(0)[1]
+        return -1
+
+
+class Keyboard:
+    END = 312
+    HOME = 313
+    LEFT = 314
+    UP = 315
+    RIGHT = 316
+    DOWN = 317
+    PAGEUP = 366
+    PAGEDOWN = 367
+    NUMPAD_HOME = 375
+    NUMPAD_LEFT = 376
+    NUMPAD_UP = 377
+    NUMPAD_RIGHT = 378
+    NUMPAD_DOWN = 379
+    NUMPAD_END = 382
+    KEY = 0xFFFF
+    SHIFT = 0x10000
+    CONTROL = 0x20000
+    ALT = 0x40000
+
+    def __init__(self, sampling_period=None):
+        self.world = get_world()
+        self.period = 0
+        if sampling_period is not None:
+            self.enable(sampling_period)
+
+    def enable(self, sampling_period):
+        self.period = int(sampling_period)
+
+    def disable(self):
+        self.period = 0
+
+    def getSamplingPeriod(self):
+        return self.period
+
+    def getKey(self):
+        if not self.period:
+            return -1
+        return self.world.pop_key()
+
+
+def key_code(key):
+    if isinstance(key, int):
+        return key
+    if len(key) == 1:
+        return ord(key.upper())
+    return getattr(Keyboard, key.upper())
+
+
+class Robot:
+    def __init__(self):
+        self.world = get_world()
+        self.keyboard = None
+
+    def step(self, duration):
+        return self.world.step(duration)
+
+    def getTime(self):
+        return self.world.time
+
+    def getBasicTimeStep(self):
+        return float(self.world.basic_time_step)
+
+    def getDevice(self, name):
+        return self.world.device(name)
+
+    def getKeyboard(self):
+        if self.keyboard is None:
+            self.keyboard = Keyboard()
+        return self.keyboard
+
+    def getName(self):
+        return "Mavic 2 PRO"
+
+    def getSupervisor(self):
+        return isinstance(self, Supervisor)
+
+
+class Field:
+    def __init__(self, node, name):
+        self.node = node
+        self.name = name
+
+    def getSFString(self):
+        if self.name == "coordinateSystem":
+            return self.node.world.coordinate_system
+        raise NotImplementedError(self.name)
+
+    def getCount(self):
+        if self.name == "children":
+            return len(self.node.children)
+        raise NotImplementedError(self.name)
+
+    def getMFNode(self, index):
+        if self.name == "children":
+            return self.node.children[index]
+        raise NotImplementedError(self.name)
+
+    def getSFVec3f(self):
+        if self.name == "translation":
+            return self.node.getPosition()
+        raise NotImplementedError(self.name)
+
+    def setSFVec3f(self, values):
+        if self.name != "translation":
+            raise NotImplementedError(self.name)
+        self.node.drone.position[:] = self.node.from_world(values)
+        self.node.drone.on_ground = self.node.drone.position[2] <= 0.0
+
+    def getSFRotation(self):
+        if self.name != "rotation":
+            raise NotImplementedError(self.name)
+        R = self.node.frame @ self.node.drone.rotation
+        angle = math.acos(max(-1.0, min(1.0, (np.trace(R) - 1.0) / 2.0)))
+        axis = np.array((R[2, 1] - R[1, 2], R[0, 2] - R[2, 0], R[1, 0] - R[0, 1]))
+        norm = np.linalg.norm(axis)
+        if norm < 1e-12:
+            return [0.0, 0.0, 1.0, 0.0]
+        return (axis / norm).tolist() + [angle]
+
+    def setSFRotation(self, values):
+        if self.name != "rotation":
+            raise NotImplementedError(self.name)
+        x, y, z, angle = values
+        K = np.array(((0.0, -z, y), (z, 0.0, -x), (-y, x, 0.0)))
+        R = np.eye(3) + math.sin(angle) * K + (1.0 - math.cos(angle)) * (K @ K)
+        self.node.drone.rotation = self.node.frame.T @ R
+
+
+class Node:
+    """The simulated drone as seen by a supervisor, in the coordinates of the world.
+
+    In the NUE world positions, velocities and the orientation are the ENU ones of the model
+    turned by ``physics.NUE``, so the drone rests rotated -90 degrees about x like in those worlds.
+    """
+
+    def __init__(self, world):
+        self.world = world
+        self.drone = world.drone
+        self.frame = NUE if world.nue else np.eye(3)
+
+    def to_world(self, vector):
+        return (self.frame @ vector).tolist()
+
+    def from_world(self, values):
+        return self.frame.T @ np.asarray(values, np.float64)
+
+    def getTypeName(self):
+        return "Mavic2Pro"
+
+    def getPosition(self):
+        return self.to_world(self.drone.position)
+
+    def getOrientation(self):
+        return (self.frame @ self.drone.rotation).reshape(-1).tolist()
+
+    def getVelocity(self):
+        return self.to_world(self.drone.velocity) + self.to_world(self.drone.rotation @ self.drone.rates)
+
+    def getField(self, name):
+        return Field(self, name)
+
+    def setVelocity(self, velocity):
+        """Linear and angular velocity in world coordinates."""
+        self.drone.velocity[:] = self.from_world(velocity[:3])
+        self.drone.rates[:] = self.drone.rotation.T @ self.from_world(velocity[3:])
+
+    def resetPhysics(self):
+        self.drone.velocity[:] = 0.0
+        self.drone.rates[:] = 0.0
+
+
+class WorldInfo:
+    def __init__(self, world):
+        self.world = world
+
+    def getTypeName(self):
+        return "WorldInfo"
+
+    def getField(self, name):
+        return Field(self, name)
+
+
+class Root:
+    """The scene tree root, with the WorldInfo and the drone as its children."""
+
+    def __init__(self, world):
+        self.world = world
+        self.children = [WorldInfo(world), Node(world)]
+
+    def getTypeName(self):
+        return "Group"
+
+    def getField(self, name):
+        return Field(self, name)
+
+
+class Supervisor(Robot):
+    # DEF names that resolve to the simulated drone
+    DEFS = ("drone",)
+
+    def getRoot(self):
+        return Root(self.world)
+
+    def getFromDef(self, name):
+        return Node(self.world) if name in self.DEFS else None
+
+    def getSelf(self):
+        return Node(self.world)
+
+    def setLabel(self, id, label, x, y, size, color, transparency=0, font="Arial"):
+        self.world.labels[id] = label
+
+    def simulationReset(self):
+        self.world.drone.reset()
+        self.world.time_ms = 0
+
+    def simulationResetPhysics(self):
+        self.getSelf().resetPhysics()
+
+    def simulationQuit(self, status):
+        self.world.stop()
+
+    def worldReload(self):
+        # the controllers are restarted by Webots, here they just stop
+        self.world.stop()
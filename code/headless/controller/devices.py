@@ -0,0 +1,242 @@
+import math
+
+import numpy as np
+
+from controller.physics import nue_attitude, nue_vector
+
+
+class Device:
+    """Base of all fake devices; sensors sample on simulation steps that are a multiple of their period."""
+
+    def __init__(self, world, name):
+        self.world = world
+        self.name = name
+        self.period = 0
+
+    def getName(self):
+        return self.name
+
+    def enable(self, sampling_period):
+        self.period = int(sampling_period)
+        self.world.enable(self)
+
+    def disable(self):
+        self.period = 0
+        self.world.disable(self)
+
+    def getSamplingPeriod(self):
+        return self.period
+
+    def sample(self):
+        pass
+
+
+class InertialUnit(Device):
+    def __init__(self, world, name):
+        super().__init__(world, name)
+        self.values = [math.nan] * 3
+
+    def sample(self):
+        attitude = self.world.drone.attitude
+        self.values = list(nue_attitude(*attitude) if self.world.nue else attitude)
+
+    def getRollPitchYaw(self):
+        return self.values
+
+    def getQuaternion(self):
+        roll, pitch, yaw = self.values
+        cr, sr = math.cos(roll / 2), math.sin(roll / 2)
+        cp, sp = math.cos(pitch / 2), math.sin(pitch / 2)
+        cy, sy = math.cos(yaw / 2), math.sin(yaw / 2)
+        return [
+            sr * cp * cy - cr * sp * sy,
+            cr * sp * cy + sr * cp * sy,
+            cr * cp * sy - sr * sp * cy,
+            cr * cp * cy + sr * sp * sy,
+        ]
+
+
+class Gyro(Device):
+    """Angular velocity in the body frame [rad/s]."""
+
+    def __init__(self, world, name):
+        super().__init__(world, name)
+        self.values = [math.nan] * 3
+
+    def sample(self):
+        self.values = self.world.drone.rates.tolist()
+
+    def getValues(self):
+        return self.values
+
+
+class GPS(Device):
+    def __init__(self, world, name):
+        super().__init__(world, name)
+        self.values = [math.nan] * 3
+        self.speed = [math.nan] * 3
+
+    def sample(self):
+        position, velocity = self.world.drone.position.tolist(), self.world.drone.velocity.tolist()
+        if self.world.nue:
+            position, velocity = list(nue_vector(*position)), list(nue_vector(*velocity))
+        self.values = position
+        self.speed = velocity
+
+    def getValues(self):
+        return self.values
+
+    def getSpeedVector(self):
+        return self.speed
+
+    def getSpeed(self):
+        return math.sqrt(sum(v * v for v in self.speed))
+
+
+class Compass(Device):
+    """North (world +x, the Webots default) expressed in the body frame."""
+
+    def __init__(self, world, name):
+        super().__init__(world, name)
+        self.values = [math.nan] * 3
+
+    def sample(self):
+        self.values = self.world.drone.rotation[0].tolist()
+
+    def getValues(self):
+        return self.values
+
+
+class Camera(Device):
+    """BGRA camera; frames come from the world's renderer, a flat gray image when there is none."""
+
+    def __init__(self, world, name, width=400, height=240, fov=0.7854):
+        super().__init__(world, name)
+        self.width = width
+        self.height = height
+        self.fov = fov
+        # black until the first sample, the buffer exists as soon as the camera is enabled
+        self.image = bytes(width * height * 4)
+        self.flat = None
+
+    def sample(self):
+        if self.world.renderer is None:
+            if self.flat is None:
+                self.flat = np.full((self.height, self.width, 4), 128, np.uint8).tobytes()
+            self.image = self.flat
+            return
+        frame = self.world.renderer(self.world.drone, self.world.gimbal())
+        self.image = np.ascontiguousarray(frame, np.uint8).tobytes()
+
+    def getImage(self):
+        return self.image
+
+    def getWidth(self):
+        return self.width
+
+    def getHeight(self):
+        return self.height
+
+    def getFov(self):
+        return self.fov
+
+    def saveImage(self, filename, quality):
+        import cv2
+
+        image = np.frombuffer(self.image, np.uint8).reshape(self.height, self.width, 4)
+        return 0 if cv2.imwrite(filename, image) else -1
+
+
+class Motor(Device):
+    def __init__(self, world, name, max_velocity=576.0):
+        super().__init__(world, name)
+        self.position = 0.0
+        self.velocity = 0.0
+        self.max_velocity = max_velocity
+
+    def setPosition(self, position):
+        self.position = position
+
+    def getTargetPosition(self):
+        return self.position
+
+    def setVelocity(self, velocity):
+        if math.isnan(velocity):
+            print("Error: wb_motor_set_velocity() called with an invalid 'velocity' argument (NaN).")
+            return
+        self.velocity = max(-self.max_velocity, min(self.max_velocity, velocity))
+
+    def getVelocity(self):
+        return self.velocity
+
+    def getMaxVelocity(self):
+        return self.max_velocity
+
+
+class LED(Device):
+    def __init__(self, world, name):
+        super().__init__(world, name)
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class Emitter(Device):
+    def __init__(self, world, name, channel=0):
+        super().__init__(world, name)
+        self.channel = channel
+
+    def send(self, message):
+        if isinstance(message, str):
+            message = message.encode()
+        self.world.send(self.channel, bytes(message))
+        return 1
+
+    def setChannel(self, channel):
+        self.channel = channel
+
+    def getChannel(self):
+        return self.channel
+
+
+class Receiver(Device):
+    """Packets sent on the channel during a step are delivered at the next step, like Webots."""
+
+    def __init__(self, world, name, channel=0):
+        super().__init__(world, name)
+        self.channel = channel
+        self.queue = []
+
+    def enable(self, sampling_period):
+        super().enable(sampling_period)
+        self.world.receivers.append(self)
+
+    def disable(self):
+        super().disable()
+        if self in self.world.receivers:
+            self.world.receivers.remove(self)
+
+    def getQueueLength(self):
+        return len(self.queue)
+
+    def getData(self):
+        return self.queue[0]
+
+    def getBytes(self):
+        return self.queue[0]
+
+    def getString(self):
+        return self.queue[0].decode()
+
+    def nextPacket(self):
+        self.queue.pop(0)
+
+    def setChannel(self, channel):
+        self.channel = channel
+
+    def getChannel(self):
+        return self.channel
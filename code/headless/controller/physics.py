@@ -0,0 +1,125 @@
+import math
+
+import numpy as np
+
+GRAVITY = 9.81
+
+# propeller positions in the body frame (x forward, y left, z up) and spin direction, in the order
+# front left, front right, rear left, rear right; the controllers command the right pair negative
+ROTORS = np.array(((0.1, 0.12, 0.0), (0.1, -0.12, 0.0), (-0.1, 0.12, 0.0), (-0.1, -0.12, 0.0)))
+
+
+def rotation_matrix(roll, pitch, yaw):
+    """Body to world rotation, R = Rz(yaw) Ry(pitch) Rx(roll), as used by the Webots InertialUnit."""
+    cr, sr = math.cos(roll), math.sin(roll)
+    cp, sp = math.cos(pitch), math.sin(pitch)
+    cy, sy = math.cos(yaw), math.sin(yaw)
+    return np.array(
+        (
+            (cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr),
+            (sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr),
+            (-sp, cp * sr, cp * cr),
+        )
+    )
+
+
+def roll_pitch_yaw(R):
+    return math.atan2(R[2, 1], R[2, 2]), math.asin(max(-1.0, min(1.0, -R[2, 0]))), math.atan2(R[1, 0], R[0, 0])
+
+
+# ENU to NUE world coordinates: the NUE worlds are the ENU one turned -90 degrees about x (y up, z = -y)
+NUE = np.array(((1.0, 0.0, 0.0), (0.0, 0.0, 1.0), (0.0, -1.0, 0.0)))
+
+
+def nue_vector(x, y, z):
+    """An ENU position or velocity in NUE coordinates; components may be arrays."""
+    return x, z, -y
+
+
+def nue_attitude(roll, pitch, yaw):
+    """What the InertialUnit of the Mavic reads in the NUE worlds for an ENU attitude.
+
+    It reads roll - pi/2 at level, the offset the NUE controllers add back, and pitch and yaw
+    with the opposite sign; the gyro keeps its axes.
+    """
+    return roll - math.pi / 2.0, -pitch, -yaw
+
+
+class Quadrotor:
+    """Rigid-body quadrotor in an ENU world (z up), shaped after the Mavic 2 Pro.
+
+    Thrust and drag torque grow with the square of the propeller velocity; with the default mass
+    the drone lifts off just below the controllers' 68.5 rad/s. The ground is the plane z = 0.
+    """
+
+    def __init__(
+        self,
+        mass=0.49,
+        inertia=(0.005, 0.005, 0.009),
+        thrust_constant=0.00026,
+        torque_constant=5.2e-6,
+        linear_drag=0.1,
+        angular_drag=0.002,
+        max_velocity=576.0,
+    ):
+        self.mass = mass
+        self.inertia = np.array(inertia, np.float64)
+        self.thrust_constant = thrust_constant
+        self.torque_constant = torque_constant
+        self.linear_drag = linear_drag
+        self.angular_drag = angular_drag
+        self.max_velocity = max_velocity
+        self.velocities = np.zeros(4)
+        self.reset()
+
+    def reset(self, position=(0.0, 0.0, 0.0), attitude=(0.0, 0.0, 0.0)):
+        self.position = np.array(position, np.float64)
+        self.velocity = np.zeros(3)
+        self.rotation = rotation_matrix(*attitude)
+        self.rates = np.zeros(3)
+        self.velocities[:] = 0.0
+        self.on_ground = self.position[2] <= 0.0
+
+    def step(self, dt):
+        omega = np.clip(self.velocities, -self.max_velocity, self.max_velocity)
+        thrusts = self.thrust_constant * omega * omega
+        torque = np.cross(ROTORS, np.outer(thrusts, (0.0, 0.0, 1.0))).sum(axis=0)
+        # reaction torque of each propeller opposes its spin
+        torque[2] -= self.torque_constant * np.sum(omega * np.abs(omega))
+        torque -= self.angular_drag * self.rates
+
+        force = self.rotation[:, 2] * thrusts.sum() - self.linear_drag * self.velocity
+        force[2] -= self.mass * GRAVITY
+        acceleration = force / self.mass
+        if self.on_ground and acceleration[2] <= 0.0:
+            # resting on the pad, the ground carries the weight
+            self.velocity[:] = 0.0
+            self.rates[:] = 0.0
+            return
+
+        self.rates += (torque - np.cross(self.rates, self.inertia * self.rates)) / self.inertia * dt
+        self.velocity += acceleration * dt
+        self.position += self.velocity * dt
+        self.rotation = self.rotation @ self._exp(self.rates * dt)
+        self.on_ground = False
+        if self.position[2] <= 0.0:
+            self.position[2] = 0.0
+            self.velocity[:] = 0.0
+            self.rates[:] = 0.0
+            # level out on touchdown
+            roll, pitch, yaw = roll_pitch_yaw(self.rotation)
+            self.rotation = rotation_matrix(0.0, 0.0, yaw)
+            self.on_ground = True
+
+    @staticmethod
+    def _exp(rotation_vector):
+        angle = math.sqrt(float(rotation_vector @ rotation_vector))
+        if angle < 1e-12:
+            return np.eye(3)
+        x, y, z = rotation_vector / angle
+        K = np.array(((0.0, -z, y), (z, 0.0, -x), (-y, x, 0.0)))
+        return np.eye(3) + math.sin(angle) * K + (1.0 - math.cos(angle)) * (K @ K)
+
+    @property
+    def attitude(self):
+        return roll_pitch_yaw(self.rotation)
@@ -0,0 +1,108 @@
+"""Replay a logged descent through pid5's raw marker/GPS switching and through the LandingFilter.
+
+The log is recorded once from synthetic frames (descent.py) at the 50 Hz position rate: GPS
+position and speed with noise, gyro rates and the solvePnP marker fix of every vision frame. The
+GPS target is 0.3 m / -0.2 m off the pad, as when the home position is not exactly on the marker.
+Both strategies are then replayed with vision at 25, 12.5 and 6.25 Hz.
+
+    python replay-landing.py [-o replay-landing.npz]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "libraries", "python"))
+from mavic_toolkit import ArucoDetector, LandingFilter, PoseEstimator, select_marker, stack_corners
+
+import descent
+
+RATE = 50
+PAD = (0.3, -0.2)
+
+
+def record(output, seed=0):
+    rng = np.random.default_rng(seed)
+    ground = descent.make_ground(seed)
+    detector = ArucoDetector()
+    pose = PoseEstimator(descent.WIDTH, descent.HEIGHT, descent.FOV)
+    columns = {name: [] for name in ("time", "gps", "speed", "gyro", "marker", "truth")}
+    for k, (t, frame, speed, altitude, x, y) in enumerate(descent.descent(ground, rate=RATE)):
+        marker = (np.nan, np.nan)
+        # the camera samples at 25 Hz, every other position step
+        if k % 2 == 0:
+            corner, id, _ = detector.find_aruco(frame)
+            target = select_marker(id, 1)
+            if target is not None:
+                offset = pose.offset(stack_corners(corner)[target])
+                if offset is not None:
+                    marker = offset[:2]
+        columns["time"].append(t)
+        columns["gps"].append((x + PAD[0], y + PAD[1]) + rng.normal(0, 0.02, 2))
+        columns["speed"].append(speed[:2] + rng.normal(0, 0.05, 2))
+        columns["gyro"].append(rng.normal(0, 0.05, 3))
+        columns["marker"].append(marker)
+        columns["truth"].append((-x, -y))
+    np.savez(output, **{name: np.array(values) for name, values in columns.items()})
+
+
+def replay_switching(log, vision_every):
+    """pid5 without the filter: the marker fix while the last frame had one, the GPS error otherwise."""
+    setpoints = np.empty_like(log["truth"])
+    marker = None
+    for k in range(len(log["time"])):
+        if k % vision_every == 0:
+            marker = None if np.isnan(log["marker"][k, 0]) else log["marker"][k]
+        setpoints[k] = marker if marker is not None else -log["gps"][k]
+    return setpoints
+
+
+def replay_filter(log, vision_every):
+    setpoints = np.empty_like(log["truth"])
+    landing_filter = LandingFilter()
+    landing_filter.reset(log["gps"][0], timestamp=log["time"][0])
+    start = time.perf_counter()
+    for k, t in enumerate(log["time"]):
+        landing_filter.predict(t)
+        landing_filter.update_gps(log["gps"][k], log["speed"][k])
+        if k % vision_every == 0 and not np.isnan(log["marker"][k, 0]):
+            landing_filter.update_marker(log["marker"][k], t, log["gyro"][k])
+        setpoints[k] = landing_filter.relative()
+    busy = (time.perf_counter() - start) / len(log["time"]) * 1e6
+    return setpoints, busy
+
+
+def metrics(setpoints, truth):
+    error = np.linalg.norm(setpoints - truth, axis=1)
+    step = np.linalg.norm(np.diff(setpoints, axis=0), axis=1)
+    return np.sqrt(np.mean(error**2)), np.sqrt(np.mean(step**2)), step.max()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default="replay-landing.npz")
+    args = parser.parse_args()
+
+    record(args.output)
+    # NpzFile reads the array again on every access, load the columns once
+    log = dict(np.load(args.output))
+    print("marker fixes in {:.0%} of the camera frames".format(np.mean(~np.isnan(log["marker"][::2, 0]))))
+    print(
+        "{:>12}{:>11}{:>12}{:>14}{:>14}{:>10}".format(
+            "vision[Hz]", "strategy", "rms err[m]", "rms step[m]", "max step[m]", "us/step"
+        )
+    )
+    for vision_every in (2, 4, 8):
+        rate = RATE / vision_every
+        rms, jitter, jump = metrics(replay_switching(log, vision_every), log["truth"])
+        print("{:>12.2f}{:>11}{:>12.3f}{:>14.4f}{:>14.3f}{:>10}".format(rate, "switching", rms, jitter, jump, "-"))
+        setpoints, busy = replay_filter(log, vision_every)
+        rms, jitter, jump = metrics(setpoints, log["truth"])
+        print("{:>12.2f}{:>11}{:>12.3f}{:>14.4f}{:>14.3f}{:>10.1f}".format(rate, "filter", rms, jitter, jump, busy))
+
+
+if __name__ == "__main__":
+    main()
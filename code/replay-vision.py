@@ -0,0 +1,122 @@
+"""Replay a pid5 frame dump through the vision stack, for timing and accuracy regressions.
+
+Record the dump with ``robot.run(dump=True)`` in pid5_controller.py; the frames land in
+controllers/pid5_controller/frames/. Each frame is detected as in flight, on the reader's gray
+frame: the full-frame detector, the MarkerTracker fed the dumped time, speed, altitude and yaw,
+and the PyramidDetector fed the altitude. The marker pose goes through PoseEstimator.offset with
+the dumped gimbal pitch and yaw and is compared with the pad position seen from the dumped GPS
+position. Every mode runs twice and both passes must find the same corners.
+
+    python replay-vision.py [../controllers/pid5_controller/frames] [--pad 0 0] [--target-id 1]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "libraries", "python"))
+from mavic_toolkit import ArucoDetector, FrameReplay, MarkerTracker, PoseEstimator, PyramidDetector
+from mavic_toolkit import select_marker, stack_corners
+
+
+def make_modes(replay, target_id):
+    detector = ArucoDetector()
+    tracker = MarkerTracker(detector, focal=replay.focal, target_id=target_id)
+    pyramid = PyramidDetector(detector, focal=replay.focal)
+
+    def full(frame):
+        return detector.find_aruco(frame.reader.gray)
+
+    def tracking(frame):
+        state = frame.state
+        speed = (state["speed_x"], state["speed_y"], state["speed_z"])
+        return tracker.find_aruco(frame.reader.gray, state["time"], speed, state["altitude"], state["yaw"])
+
+    def pyramid_mode(frame):
+        return pyramid.find_aruco(frame.reader.gray, frame.state["altitude"])
+
+    return {"full": (full, None), "tracking": (tracking, tracker.reset), "pyramid": (pyramid_mode, None)}
+
+
+def replay_mode(replay, find, reset, pose, target_id, pad):
+    """Per-frame detection time [ms], target corners (NaN when missed) and pose error [m]."""
+    if reset is not None:
+        reset()
+    busy = np.empty(len(replay))
+    corners = np.full((len(replay), 4, 2), np.nan)
+    errors = np.full((len(replay), 2), np.nan)
+    for frame in replay:
+        start = time.perf_counter()
+        corner, id, _ = find(frame)
+        busy[frame.index] = (time.perf_counter() - start) * 1e3
+        target = select_marker(id, target_id)
+        if target is None:
+            continue
+        corners[frame.index] = stack_corners(corner)[target]
+        state = frame.state
+        offset = pose.offset(corners[frame.index], state["gimbal_pitch"], state["yaw"])
+        if offset is not None:
+            errors[frame.index] = (
+                offset[0] - (pad[0] - state["xpos"]),
+                offset[1] - (pad[1] - state["ypos"]),
+            )
+    return busy, corners, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "controllers", "pid5_controller", "frames")
+    parser.add_argument("dump", nargs="?", default=default, help="frame dump directory")
+    parser.add_argument("--pad", nargs=2, type=float, default=(0.0, 0.0), help="pad position in the world [m]")
+    parser.add_argument("--target-id", type=int, default=1, help="id of the landing pad marker")
+    args = parser.parse_args()
+
+    replay = FrameReplay(args.dump)
+    pose = PoseEstimator(replay.camera.getWidth(), replay.camera.getHeight(), replay.camera.getFov())
+    state = replay.state[: len(replay)]
+    print(
+        "{} frames {}x{}, {:.1f}-{:.1f} s, altitude {:.2f}-{:.2f} m".format(
+            len(replay),
+            replay.camera.getWidth(),
+            replay.camera.getHeight(),
+            state["time"][0] if len(replay) else 0.0,
+            state["time"][-1] if len(replay) else 0.0,
+            state["altitude"].min() if len(replay) else 0.0,
+            state["altitude"].max() if len(replay) else 0.0,
+        )
+    )
+    print(
+        "{:>9s} {:>6s} {:>9s} {:>9s} {:>9s} {:>12s} {:>12s} {:>13s}".format(
+            "mode", "hits", "mean[ms]", "p50[ms]", "p99[ms]", "corner[px]", "pose rms[m]", "deterministic"
+        )
+    )
+    reference = None
+    for name, (find, reset) in make_modes(replay, args.target_id).items():
+        busy, corners, errors = replay_mode(replay, find, reset, pose, args.target_id, args.pad)
+        _, again, _ = replay_mode(replay, find, reset, pose, args.target_id, args.pad)
+        if reference is None:
+            reference = corners
+        # largest corner deviation from the full-frame detector on frames both found
+        both = ~np.isnan(corners[:, 0, 0]) & ~np.isnan(reference[:, 0, 0])
+        deviation = np.abs(corners[both] - reference[both]).max() if both.any() else float("nan")
+        found = ~np.isnan(errors[:, 0])
+        rms = np.sqrt(np.mean(np.sum(errors[found] ** 2, axis=1))) if found.any() else float("nan")
+        print(
+            "{:>9s} {:6d} {:9.3f} {:9.3f} {:9.3f} {:12.3f} {:12.3f} {:>13s}".format(
+                name,
+                int(np.count_nonzero(~np.isnan(corners[:, 0, 0]))),
+                busy.mean() if len(busy) else 0.0,
+                np.percentile(busy, 50) if len(busy) else 0.0,
+                np.percentile(busy, 99) if len(busy) else 0.0,
+                deviation,
+                rms,
+                str(np.array_equal(corners, again, equal_nan=True)),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Run a controller without Webots, against the headless controller module, and time it.
+
+The controller script runs unchanged from its own directory, like Webots starts it, with
+code/headless in front of sys.path so ``from controller import Robot`` gets the fake module.
+Several controllers, e.g. the drone and a supervisor, run in threads and step the world in
+lockstep. They take turns: each one runs with its own working directory, its own directory in
+front of sys.path and its own copies of same-named local modules such as params or var. OpenCV
+windows are disabled unless --window is given. The world reports NUE coordinates when one of the
+controllers was written for the NUE worlds (NUE_CONTROLLERS), ENU otherwise; --world overrides it.
+
+    python run-headless.py pid5_controller --duration 60 --keys 1:T 15:M --camera
+    python run-headless.py pid4_controller --duration 30
+    python run-headless.py take_off --duration 20
+    python run-headless.py take_off mavic_supervisor --duration 60
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CONTROLLERS = os.path.join(HERE, "..", "controllers")
+# controllers that read the sensors as in the NUE worlds, altitude in the second GPS component
+NUE_CONTROLLERS = (
+    "controller",
+    "mavic_controller",
+    "mavic_planar_motion",
+    "my_controller",
+    "pid_controller",
+    "pid2_controller",
+    "pid3_controller",
+    "pid4_controller",
+    "planar_motion",
+    "take_off",
+    "test_controller",
+)
+
+
+def pad_renderer():
+    """Straight-down view of the landing pad at the origin, the camera model of descent.py."""
+    import descent
+
+    ground = descent.make_ground()
+
+    def render(drone, gimbal):
+        x, y, z = drone.position
+        return descent.render(ground, x, y, max(float(z), 0.3))
+
+    return render
+
+
+def use_simulation_clock(world):
+    """simple_pid measures dt with time.monotonic; faster than real time that freezes the PIDs."""
+    import simple_pid
+
+    init = simple_pid.PID.__init__
+
+    def __init__(self, *args, time_fn=None, **kwargs):
+        init(self, *args, time_fn=time_fn or (lambda: world.time), **kwargs)
+
+    simple_pid.PID.__init__ = __init__
+
+
+def disable_windows():
+    import cv2
+
+    cv2.imshow = lambda *args: None
+    cv2.waitKey = lambda *args: -1
+    cv2.destroyWindow = lambda *args: None
+    cv2.destroyAllWindows = lambda *args: None
+
+
+class ControllerContext:
+    """Working directory, sys.path entry and local modules of one controller, swapped in on its turn."""
+
+    def __init__(self, directory, directories):
+        self.directory = directory
+        self.directories = directories
+        self.modules = {}
+        self.count = None
+
+    def enter(self):
+        os.chdir(self.directory)
+        sys.path[:] = [path for path in sys.path if path not in self.directories]
+        sys.path.insert(0, self.directory)
+        sys.modules.update(self.modules)
+        self.count = len(sys.modules)
+
+    def _local(self, module):
+        filename = getattr(module, "__file__", None)
+        return filename is not None and os.path.abspath(filename).startswith(self.directory + os.sep)
+
+    def leave(self):
+        # rescan only when the controller imported something since it got the turn
+        if len(sys.modules) != self.count:
+            self.modules = {name: module for name, module in list(sys.modules.items()) if self._local(module)}
+        for name in self.modules:
+            sys.modules.pop(name, None)
+
+
+def run_controller(world, script, context):
+    world.attach(context)
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit:
+        pass
+    finally:
+        # a controller that ends must not leave the others waiting on the lockstep
+        world.stop()
+        world.detach()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "controllers",
+        nargs="+",
+        help="directory names under controllers/, e.g. pid5_controller or take_off mavic_supervisor",
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="simulated time [s]")
+    parser.add_argument("--keys", nargs="*", default=["1:T"], help="scripted key presses as time:key, e.g. 12:M 20:END")
+    parser.add_argument("--world", choices=("ENU", "NUE"), help="coordinate system of the world, by default the controllers' own")
+    parser.add_argument("--camera", action="store_true", help="render the landing pad instead of a flat gray image")
+    parser.add_argument("--window", action="store_true", help="keep cv2.imshow windows")
+    parser.add_argument("--profile", type=int, default=0, metavar="N", help="print the N most expensive functions")
+    args = parser.parse_args()
+
+    sys.path.insert(0, HERE)
+    sys.path.insert(0, os.path.join(HERE, "headless"))
+    import controller
+
+    coordinate_system = args.world
+    if coordinate_system is None:
+        coordinate_system = "NUE" if any(name in NUE_CONTROLLERS for name in args.controllers) else "ENU"
+    keys = []
+    for item in args.keys:
+        t, key = item.split(":", 1)
+        keys.append((float(t), key))
+    controller.configure(
+        duration=args.duration,
+        keys=keys,
+        renderer=pad_renderer() if args.camera else None,
+        robots=len(args.controllers),
+        world=coordinate_system,
+    )
+    world = controller.get_world()
+    use_simulation_clock(world)
+    if not args.window:
+        disable_windows()
+
+    directories = [os.path.abspath(os.path.join(CONTROLLERS, name)) for name in args.controllers]
+    scripts = [os.path.join(directory, os.path.basename(directory) + ".py") for directory in directories]
+    contexts = [ControllerContext(directory, directories) for directory in directories]
+    # the first controller runs on the main thread, the others in threads
+    sys.argv = [scripts[0]]
+    threads = [
+        threading.Thread(target=run_controller, args=(world, script, context))
+        for script, context in zip(scripts[1:], contexts[1:])
+    ]
+
+    profiler = cProfile.Profile() if args.profile else None
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    if profiler is not None:
+        profiler.runcall(run_controller, world, scripts[0], contexts[0])
+    else:
+        run_controller(world, scripts[0], contexts[0])
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if profiler is not None:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.profile)
+
+    x, y, z = world.drone.position
+    print(
+        "{} ({}): {:.1f} s simulated in {:.2f} s, {:.1f}x real time, {:.0f} us/step, final ENU position {:+.2f} {:+.2f} {:+.2f}".format(
+            " + ".join(args.controllers),
+            world.coordinate_system,
+            world.time,
+            elapsed,
+            world.time / elapsed,
+            elapsed / max(world.steps, 1) * 1e6,
+            x,
+            y,
+            z,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""Bayesian-optimization tuner for the five take_off.py gains, on the batched quadrotor model.
+
+Every iteration a Gaussian process fitted to the costs so far proposes a batch of candidates
+(expected improvement, the batch filled in by believing the model's own predictions). The batch
+is split over a process pool and each worker flies its candidates in one vectorized rollout,
+every candidate in every scenario: take off to 1 m from a tilted start and move to a horizontal
+target. The cost weighs altitude rise time, overshoot, settling time and steady-state offset with
+the horizontal error and crashes.
+
+The optimizer state is written to the checkpoint after every batch, an interrupted run continues
+where it stopped with --resume:
+
+    python tune-gains.py --iterations 40 --batch 16 --workers 4 --checkpoint tune.npz
+    python tune-gains.py --iterations 80 --checkpoint tune.npz --resume
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import minimize
+from scipy.stats import norm
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "headless"))
+from batch import BatchQuadrotor, TakeOffLaw, rollout
+
+# the parameter vector of take_off.py's suggest_to_gain, with search bounds
+SPACE = (
+    ("k_vertical_thrust", 60.0, 76.0),
+    ("k_vertical_offset", 0.0, 1.5),
+    ("k_vertical_p", 0.2, 10.0),
+    ("k_roll_p", 5.0, 90.0),
+    ("k_pitch_p", 5.0, 90.0),
+)
+NAMES = [name for name, _, _ in SPACE]
+LOW = np.array([low for _, low, _ in SPACE])
+HIGH = np.array([high for _, _, high in SPACE])
+
+# (roll, pitch) at the start [rad] and horizontal target in take_off's frame (x, z) [m]
+SCENARIOS = (
+    ((0.0, 0.0), (0.0, 0.0)),
+    ((0.15, -0.1), (0.5, 0.0)),
+    ((-0.1, 0.15), (0.0, -0.5)),
+)
+ALTITUDE = 1.0
+# rise to 90 % of the target altitude, settle within 5 % of it around the final altitude
+RISE = 0.9
+BAND = 0.05
+METRICS = ("rise", "overshoot", "settling", "offset", "horizontal", "crashed")
+WEIGHTS = np.array((1.0, 5.0, 1.0, 5.0, 2.0, 50.0))
+
+
+def to_gains(unit):
+    """(N, 5) points in the unit cube to take_off's gain dict of arrays."""
+    values = LOW + np.asarray(unit) * (HIGH - LOW)
+    return {name: values[:, i] for i, name in enumerate(NAMES)}
+
+
+def to_unit(gains):
+    return (np.array([gains[name] for name in NAMES], np.float64) - LOW) / (HIGH - LOW)
+
+
+def evaluate(unit, duration):
+    """Fly every candidate in every scenario in one batch; (N, len(METRICS)) averaged metrics."""
+    unit = np.atleast_2d(unit)
+    n, count = len(unit), len(SCENARIOS)
+    gains = {name: np.repeat(values, count) for name, values in to_gains(unit).items()}
+    law = TakeOffLaw(n * count, **gains)
+    drones = BatchQuadrotor(n * count)
+    attitude = np.zeros((3, n * count))
+    for k, ((roll, pitch), (x, z)) in enumerate(SCENARIOS):
+        attitude[0, k::count] = roll
+        attitude[1, k::count] = pitch
+        law.x_target[k::count] = x
+        law.y_target[k::count] = z
+    law.z_target[:] = ALTITUDE
+    drones.reset(attitude=attitude)
+    result = rollout(law, duration, quadrotor=drones, trace=True)
+
+    dt = law.timestep / 1000.0
+    altitude = result.trace[:, :, 2]
+    reached = altitude >= RISE * ALTITUDE
+    rise = np.where(reached.any(axis=0), reached.argmax(axis=0) * dt, duration)
+    overshoot = np.clip(altitude.max(axis=0) - ALTITUDE, 0.0, None) / ALTITUDE
+    # the final altitude is the mean over the last tenth of the run
+    final = altitude[-max(1, len(altitude) // 10) :].mean(axis=0)
+    outside = np.abs(altitude - final) > BAND * ALTITUDE
+    # time of the last sample outside the band, the whole run if it ends outside
+    last = len(altitude) - outside[::-1].argmax(axis=0)
+    settling = np.where(outside.any(axis=0), last * dt, 0.0)
+    offset = np.abs(final - ALTITUDE)
+    target = law.target()[:2].T
+    horizontal = np.sqrt(np.mean(np.sum((result.trace[:, :, :2] - target) ** 2, axis=2), axis=0))
+    metrics = np.stack((rise, overshoot, settling, offset, horizontal, result.crashed.astype(np.float64)), axis=1)
+    metrics[~np.isfinite(metrics)] = duration
+    return metrics.reshape(n, count, len(METRICS)).mean(axis=1)
+
+
+def cost(metrics):
+    return metrics @ WEIGHTS
+
+
+class GaussianProcess:
+    """GP regression with a squared-exponential ARD kernel; hyperparameters by maximum likelihood."""
+
+    def __init__(self, dimensions, noise=1e-4):
+        # log of lengthscales and signal variance
+        self.theta = np.concatenate((np.full(dimensions, np.log(0.3)), [0.0]))
+        self.noise = noise
+
+    def kernel(self, a, b, theta=None):
+        theta = self.theta if theta is None else theta
+        scaled_a = a / np.exp(theta[:-1])
+        scaled_b = b / np.exp(theta[:-1])
+        distance = np.sum(scaled_a**2, axis=1)[:, None] + np.sum(scaled_b**2, axis=1)[None, :] - 2 * scaled_a @ scaled_b.T
+        return np.exp(theta[-1]) * np.exp(-0.5 * np.clip(distance, 0.0, None))
+
+    def negative_log_likelihood(self, theta):
+        K = self.kernel(self.X, self.X, theta) + self.noise * np.eye(len(self.X))
+        try:
+            factor = cho_factor(K, lower=True)
+        except np.linalg.LinAlgError:
+            return 1e10
+        alpha = cho_solve(factor, self.y)
+        return 0.5 * self.y @ alpha + np.sum(np.log(np.diag(factor[0])))
+
+    def fit(self, X, y, optimize=True):
+        self.X = np.asarray(X, np.float64)
+        self.mean = float(np.mean(y))
+        self.scale = float(np.std(y)) or 1.0
+        self.y = (np.asarray(y, np.float64) - self.mean) / self.scale
+        if optimize:
+            bounds = [(np.log(0.02), np.log(5.0))] * (len(self.theta) - 1) + [(np.log(0.05), np.log(20.0))]
+            result = minimize(self.negative_log_likelihood, self.theta, method="L-BFGS-B", bounds=bounds)
+            if np.isfinite(result.fun):
+                self.theta = result.x
+        K = self.kernel(self.X, self.X) + self.noise * np.eye(len(self.X))
+        self.factor = cho_factor(K, lower=True)
+        self.alpha = cho_solve(self.factor, self.y)
+        return self
+
+    def predict(self, X):
+        Ks = self.kernel(X, self.X)
+        mean = Ks @ self.alpha
+        variance = np.exp(self.theta[-1]) - np.sum(Ks * cho_solve(self.factor, Ks.T).T, axis=1)
+        std = np.sqrt(np.clip(variance, 1e-12, None))
+        return mean * self.scale + self.mean, std * self.scale
+
+
+def expected_improvement(mean, std, best, xi=0.01):
+    improvement = best - mean - xi
+    z = improvement / std
+    return improvement * norm.cdf(z) + std * norm.pdf(z)
+
+
+class Tuner:
+    """Optimizer state: every evaluated point in the unit cube, its metrics and the random state."""
+
+    def __init__(self, seed=0, duration=10.0):
+        self.rng = np.random.default_rng(seed)
+        self.duration = duration
+        self.X = np.empty((0, len(SPACE)))
+        self.metrics = np.empty((0, len(METRICS)))
+        self.iteration = 0
+
+    @property
+    def costs(self):
+        return cost(self.metrics)
+
+    def initial(self, count):
+        """take_off.py's gains and a Latin hypercube around the space."""
+        strata = (np.arange(count - 1)[:, None] + self.rng.random((count - 1, len(SPACE)))) / (count - 1)
+        for column in strata.T:
+            self.rng.shuffle(column)
+        defaults = to_unit({name: value for name, value in TakeOffLaw.GAINS.items()})
+        return np.vstack((defaults, strata))
+
+    def propose(self, count, pool=4096):
+        # log keeps the crash penalty from flattening the model everywhere else
+        y = np.log1p(self.costs)
+        gp = GaussianProcess(len(SPACE)).fit(self.X, y)
+        best = self.X[np.argmin(y)]
+        candidates = np.vstack(
+            (
+                self.rng.random((pool, len(SPACE))),
+                np.clip(best + self.rng.normal(0.0, 0.05, (pool // 4, len(SPACE))), 0.0, 1.0),
+            )
+        )
+        X, y_seen, chosen = self.X, y, []
+        for _ in range(count):
+            mean, std = gp.predict(candidates)
+            pick = int(np.argmax(expected_improvement(mean, std, y_seen.min())))
+            chosen.append(candidates[pick])
+            # kriging believer: pretend the prediction came true so the next pick goes elsewhere
+            X = np.vstack((X, candidates[pick]))
+            y_seen = np.append(y_seen, mean[pick])
+            candidates = np.delete(candidates, pick, axis=0)
+            gp.fit(X, y_seen, optimize=False)
+        return np.array(chosen)
+
+    def tell(self, X, metrics):
+        self.X = np.vstack((self.X, X))
+        self.metrics = np.vstack((self.metrics, metrics))
+        self.iteration += 1
+
+    def best(self):
+        i = int(np.argmin(self.costs))
+        gains = {name: float(values[0]) for name, values in to_gains(self.X[i : i + 1]).items()}
+        return gains, dict(zip(METRICS, self.metrics[i])), float(self.costs[i])
+
+    def save(self, filename):
+        # write next to the target and rename, an interruption never leaves half a checkpoint
+        temporary = filename + ".tmp"
+        with open(temporary, "wb") as file:
+            np.savez(
+                file,
+                X=self.X,
+                metrics=self.metrics,
+                iteration=self.iteration,
+                duration=self.duration,
+                space=json.dumps(SPACE),
+                rng=json.dumps(self.rng.bit_generator.state),
+            )
+        os.replace(temporary, filename)
+
+    @classmethod
+    def load(cls, filename):
+        data = np.load(filename)
+        if json.loads(str(data["space"])) != [list(item) for item in SPACE]:
+            raise ValueError("{} was written for a different search space".format(filename))
+        tuner = cls(duration=float(data["duration"]))
+        tuner.X = data["X"]
+        tuner.metrics = data["metrics"]
+        tuner.iteration = int(data["iteration"])
+        tuner.rng.bit_generator.state = json.loads(str(data["rng"]))
+        return tuner
+
+
+def evaluate_batch(executor, X, duration, workers):
+    if executor is None:
+        return evaluate(X, duration)
+    chunks = np.array_split(X, min(workers, len(X)))
+    return np.vstack(list(executor.map(evaluate, chunks, [duration] * len(chunks))))
+
+
+def ignore_interrupt():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def report(tuner, elapsed):
+    gains, metrics, value = tuner.best()
+    print(
+        "iteration {:3d} evaluated {:4d} in {:6.1f} s | best cost {:.3f} ({})".format(
+            tuner.iteration, len(tuner.X), elapsed, value, format_metrics(list(metrics.values()))
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=30, help="total batches, including the initial design")
+    parser.add_argument("--batch", type=int, default=16, help="candidates per iteration")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes evaluating a batch")
+    parser.add_argument("--duration", type=float, default=10.0, help="simulated time per flight [s]")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint", default="tune-gains.npz")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint")
+    args = parser.parse_args()
+
+    if args.resume and os.path.exists(args.checkpoint):
+        tuner = Tuner.load(args.checkpoint)
+        print("resumed {} at iteration {} with {} evaluations".format(args.checkpoint, tuner.iteration, len(tuner.X)))
+    else:
+        tuner = Tuner(args.seed, args.duration)
+
+    # Ctrl-C goes to the whole process group, only the main process handles it
+    executor = ProcessPoolExecutor(args.workers, initializer=ignore_interrupt) if args.workers > 1 else None
+    start = time.perf_counter()
+    try:
+        while tuner.iteration < args.iterations:
+            if len(tuner.X) == 0:
+                X = tuner.initial(2 * args.batch)
+            else:
+                X = tuner.propose(args.batch)
+            tuner.tell(X, evaluate_batch(executor, X, tuner.duration, args.workers))
+            tuner.save(args.checkpoint)
+            report(tuner, time.perf_counter() - start)
+    except KeyboardInterrupt:
+        print("interrupted, {} holds iteration {}".format(args.checkpoint, tuner.iteration))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    if len(tuner.X) == 0:
+        return
+    gains, metrics, value = tuner.best()
+    defaults = tuner.metrics[0]
+    print("take_off.py gains: cost {:.3f} ({})".format(cost(defaults[None])[0], format_metrics(defaults)))
+    print("best gains:        cost {:.3f} ({})".format(value, format_metrics(list(metrics.values()))))
+    for name in NAMES:
+        print("{} = {:.4f}".format(name, gains[name]))
+
+
+def format_metrics(values):
+    return ", ".join("{} {:.3f}".format(name, value) for name, value in zip(METRICS, values))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,19 @@
 """mavic_controller controller."""
 
 from controller import Robot, Keyboard
-from mavic_toolkit import Sensor, Actuator, Controller
-from time import sleep
-import cv2
+import os
+import sys
 from var import *
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "libraries", "python"))
+from mavic_toolkit import Sensor, Actuator, Controller, IMU, GYRO, GPS, HEADING
+from keyinput import CommandQueue, KeyInput
+from preview import Preview
+
 robot = Robot()
 timestep = int(robot.getBasicTimeStep())
 
-sensor = Sensor(robot)
+sensor = Sensor(robot, degrees=False)
 sensor.enable(timestep)
 
 motor = Actuator(robot)
@@ -17,6 +21,8 @@ motor.arming(10.0)
 
 keyboard = Keyboard()
 keyboard.enable(timestep)
+keys = KeyInput(keyboard, toggle_keys, commands=CommandQueue(command_file, command_port))
+preview = Preview("camera", preview_rate).start()
 
 controller = Controller(
     roll_param=roll_param,
@@ -26,10 +32,12 @@ controller = Controller(
 )
 
 while robot.step(timestep) != -1:
-    imu = sensor.read_imu()
-    gyro = sensor.read_gyro()
-    gps = sensor.read_gps()
-    head = sensor.read_compass()
+    # one call per device, the slices are views of the sensor's array, valid until the next step
+    values = sensor.read_all()
+    imu = values[IMU]
+    gyro = values[GYRO]
+    gps = values[GPS]
+    head = values[HEADING]
     image = sensor.read_camera()
 
     # print("roll={: .2f}|pitch={: .2f}|yaw={: .2f}".format(imu[0], imu[1], imu[2]))
@@ -38,25 +46,23 @@ while robot.step(timestep) != -1:
     # print("heading={: .2f}".format(head))
     # print("x_tar={: .2f}|y_tar={: .2f}|z_tar={: .2f}|yaw_tar={: .2f}".format(x_target, y_target, z_target, yaw_target))
 
-    key = keyboard.getKey()
-    while key > 0:
+    for key in keys.poll(robot.getTime()):
         if key == ord("T") and status_takeoff == False:
             status_takeoff = True
             status_landing = False
             motor.arming(arming_speed=10.0)
-            motor.gimbal_down(pitch_angle=1.6)
+            motor.gimbal_control(pitch_angle=1.6)
             z_target = 3.0
             print("Arming and Take Off")
-            sleep(0.25)
-            break
+            continue
         if key == Keyboard.UP:
             z_target += 0.01
             print("z_target=", z_target)
-            break
+            continue
         if key == Keyboard.DOWN:
             z_target -= 0.01
             print("z_target=", z_target)
-            break
+            continue
         if key == Keyboard.RIGHT:
             yaw_target += 0.001
             if yaw_target >= 3.14:
@@ -64,7 +70,7 @@ while robot.step(timestep) != -1:
             elif yaw_target <= -3.14:
                 yaw_target = -3.14
             print("yaw_target=", yaw_target)
-            break
+            continue
         if key == Keyboard.LEFT:
             yaw_target -= 0.001
             if yaw_target >= 3.14:
@@ -72,38 +78,36 @@ while robot.step(timestep) != -1:
             elif yaw_target <= -3.14:
                 yaw_target = -3.14
             print("yaw_target=", yaw_target)
-            break
+            continue
         if key == ord("W"):
             x_target -= 0.1
             print("x_target=", x_target)
-            break
+            continue
         if key == ord("S"):
             x_target += 0.1
             print("x_target=", x_target)
-            break
+            continue
         if key == ord("A"):
             y_target += 0.1
             print("y_target=", y_target)
-            break
+            continue
         if key == ord("D"):
             y_target -= 0.1
             print("y_target=", y_target)
-            break
+            continue
         if key == Keyboard.HOME:
             print(" Go Home")
             x_target = 0.0
             y_target = 0.0
             z_target = 10.0
             yaw_target = 0.0
-            sleep(0.25)
-            break
+            continue
         if key == ord("L") and status_landing == False:
             status_landing = True
             status_takeoff = False
             z_target = 0.0
             print("Landing")
-            sleep(0.25)
-            break
+            continue
 
     target = [x_target, y_target, z_target, yaw_target]
 
@@ -149,9 +153,8 @@ while robot.step(timestep) != -1:
     motor_rr = action[0] + action[1] + action[2] + action[3] - action[4]
 
     motor.motor_speed(motor_fl=motor_fl, motor_fr=motor_fr, motor_rl=motor_rl, motor_rr=motor_rr)
-    motor.gimbal_down(gimbal_cal[0], gimbal_cal[1], gimbal_cal[2])
+    motor.gimbal_control(gimbal_cal[0], gimbal_cal[1], gimbal_cal[2])
 
-    cv2.imshow("camera", image)
-    cv2.waitKey(1)
+    preview.submit(image)
 
-cv2.destroyAllWindows()
+preview.stop()
@@ -34,3 +34,12 @@ x_dif_error = 0
 y_dif_error = 0
 z_dif_error = 0
 yaw_dif_error = 0
+
+# mode keys fire once per press, debounced on simulation time
+toggle_keys = ["T", "HOME", "L"]
+# scripted commands, see keyinput: a file read as it grows and a UDP port, None to turn off
+command_file = "commands.txt"
+command_port = None
+
+# camera window [frames per wall-clock second], drawn off the control thread
+preview_rate = 15
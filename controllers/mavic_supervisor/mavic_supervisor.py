@@ -1,9 +1,59 @@
 """mavic_supervisor controller."""
 
 from controller import Supervisor
+import csv
+import math
+import os
 import sys
+import time
 import numpy as np
-from scipy.spatial.transform import Rotation as R
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "libraries", "python"))
+
+# labels are refreshed LABEL_RATE times per simulated second
+LABEL_RATE = 10.0
+# ground-truth pose of every step into GROUND_TRUTH, for comparison with the controller's IMU/GPS estimate
+LOG_TRUTH = False
+GROUND_TRUTH = "ground_truth.flog"
+TRUTH_CHANNELS = ["time", "x", "y", "z", "roll", "pitch", "yaw"]
+
+# gain sweep: one gain set per row of SWEEP_FILE, each flown for EPISODE seconds from the start pose,
+# only when the file exists and the supervisor has an emitter; the simulation quits when it is done
+SWEEP_FILE = "sweep.csv"
+RESULTS_FILE = "sweep_results.csv"
+EPISODE = 10.0
+# the episode cost is the RMS distance to take_off's hover, TARGET_ALTITUDE above the start along the world's up axis
+TARGET_ALTITUDE = 1.0
+
+
+def euler_xyz(r):
+    """Roll, pitch, yaw of a row-major rotation matrix (getOrientation), as Rotation.as_euler("xyz")."""
+    return math.atan2(r[7], r[8]), -math.asin(max(-1.0, min(1.0, r[6]))), math.atan2(r[3], r[0])
+
+
+def up_axis(supervisor):
+    """Unit vector of the world's up axis, y in the NUE worlds and z in the ENU ones (the default)."""
+    children = supervisor.getRoot().getField("children")
+    for i in range(children.getCount()):
+        node = children.getMFNode(i)
+        if node.getTypeName() == "WorldInfo":
+            field = node.getField("coordinateSystem")
+            if field is not None and field.getSFString() == "NUE":
+                return np.array([0.0, 1.0, 0.0])
+    return np.array([0.0, 0.0, 1.0])
+
+
+def load_sweep(filename):
+    rows = []
+    with open(filename, newline="") as file:
+        for line in csv.reader(file):
+            try:
+                rows.append([float(value) for value in line])
+            except ValueError:
+                # header
+                continue
+    return rows
+
 
 supervisor = Supervisor()
 timestep = int(supervisor.getBasicTimeStep())
@@ -13,13 +63,96 @@ if drone is None:
     sys.stderr.write("No DEF supervisor node found in the current world file\n")
     sys.exit(1)
 
+sweep = load_sweep(SWEEP_FILE) if os.path.exists(SWEEP_FILE) else []
+emitter = supervisor.getDevice("emitter") if sweep else None
+sender = None
+if emitter is not None:
+    from gainlink import GainSender
+
+    sender = GainSender(emitter)
+translation = drone.getField("translation")
+rotation = drone.getField("rotation")
+start_translation = translation.getSFVec3f()
+start_rotation = rotation.getSFRotation()
+target = np.array(start_translation) + TARGET_ALTITUDE * up_axis(supervisor)
+episode = -1
+episode_end = 0.0
+restart = False
+episode_wall = 0.0
+squared = 0.0
+samples = 0
+results = []
+
+label_steps = max(1, int(round(1000.0 / (LABEL_RATE * timestep))))
+truth = None
+if LOG_TRUTH is True:
+    from flightlog import FlightLogWriter
+
+    # rows are collected in a block and handed to the writer whole
+    truth = np.zeros(1024, [(name, np.float64) for name in TRUTH_CHANNELS])
+    truth_writer = FlightLogWriter(GROUND_TRUTH, truth.dtype)
+    truth_rows = 0
+steps = 0
+
 while supervisor.step(timestep) != -1:
-    pos = np.array(drone.getPosition())
-    # print(robot_pos)
-    supervisor.setLabel(0, "X=% .2f Y=% .2f Z=% .2f" % (pos[0], pos[1], pos[2]), 0, 0.9, 0.2, 0xFF0000, 0, "Arial")
-
-    r = np.array(drone.getOrientation()).reshape(3, 3)
-    Rot = R.from_matrix([[r[0][0], r[0][1], r[0][2]], [r[1][0], r[1][1], r[1][2]], [r[2][0], r[2][1], r[2][2]]])
-    rr = Rot.as_euler("xyz", degrees=False)
-    # print("rolz={: .2f}|pitcz={: .2f}|yaz={: .2f}".format(rr[0], rr[1], rr[2]))
-    supervisor.setLabel(1, "R=% .2f P=% .2f Y=% .2f" % (rr[0], rr[1], rr[2]), 0, 0.8, 0.2, 0xFF0000, 0, "Arial")
+    position = drone.getPosition()
+    rr = euler_xyz(drone.getOrientation())
+    if truth is not None:
+        truth[truth_rows] = (supervisor.getTime(), *position, *rr)
+        truth_rows += 1
+        if truth_rows == len(truth):
+            truth_writer.write(truth)
+            truth_rows = 0
+    if steps % label_steps == 0:
+        supervisor.setLabel(0, "X=% .2f Y=% .2f Z=% .2f" % tuple(position), 0, 0.9, 0.2, 0xFF0000, 0, "Arial")
+        supervisor.setLabel(1, "R=% .2f P=% .2f Y=% .2f" % rr, 0, 0.8, 0.2, 0xFF0000, 0, "Arial")
+    steps += 1
+
+    if sender is None:
+        continue
+    if restart is True:
+        # next episode in the same run: back to the start pose at rest, no world reload. take_off gets
+        # the reset packet on this step too and re-arms, so every episode starts from the same state.
+        translation.setSFVec3f(start_translation)
+        rotation.setSFRotation(start_rotation)
+        drone.setVelocity([0.0] * 6)
+        drone.resetPhysics()
+        restart = False
+        episode_end = supervisor.getTime() + EPISODE
+        episode_wall = time.perf_counter()
+        squared = 0.0
+        samples = 0
+        supervisor.setLabel(2, "episode %d/%d" % (episode + 1, len(sweep)), 0, 0.7, 0.2, 0xFF0000, 0, "Arial")
+        continue
+    pos = np.array(position)
+    if episode >= 0:
+        squared += float(np.sum((pos - target) ** 2))
+        samples += 1
+    if supervisor.getTime() >= episode_end:
+        if episode >= 0:
+            cost = np.sqrt(squared / max(samples, 1))
+            results.append([episode] + sweep[episode] + [cost] + pos.tolist() + [time.perf_counter() - episode_wall])
+        episode += 1
+        if episode == len(sweep):
+            with open(RESULTS_FILE, "w", newline="") as file:
+                writer = csv.writer(file)
+                header = ["gain{}".format(i) for i in range(len(sweep[0]))]
+                writer.writerow(["episode"] + header + ["cost", "x", "y", "z", "wall"])
+                writer.writerows(results)
+            print(
+                "sweep of {} episodes in {} packets, {:.3f} s wall per episode, results in {}".format(
+                    episode, sender.packets, np.mean([row[-1] for row in results]), RESULTS_FILE
+                )
+            )
+            supervisor.simulationQuit(0)
+            sender = None
+            continue
+        # the reset and the new gains go out together in one packet, delivered on the next step
+        sender.reset(episode)
+        sender.gains(sweep[episode])
+        sender.flush()
+        restart = True
+
+if truth is not None:
+    truth_writer.write(truth[:truth_rows])
+    truth_writer.close()
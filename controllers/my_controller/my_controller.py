@@ -14,6 +14,8 @@ from controller import (
 )
 
 import math
+import os
+import sys
 import numpy as np
 import struct
 import cv2, PIL
@@ -22,6 +24,9 @@ import matplotlib.pyplot as plt
 import matplotlib as mpl
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "libraries", "python"))
+from preview import Preview
+
 robot = Robot()
 
 timestep = int(robot.getBasicTimeStep())
@@ -29,6 +34,7 @@ timestep = int(robot.getBasicTimeStep())
 # definition the hardware
 keyboard = Keyboard()
 keyboard.enable(timestep)
+preview = Preview("camera", preview_rate).start()
 
 imu = robot.getDevice("inertial unit")
 imu.enable(timestep)
@@ -79,6 +85,24 @@ def convert_to_pitch_roll(x_error, y_error, yaw):
     return exy_[0], exy_[1]
 
 
+# build the aruco dictionary and parameters once instead of on every frame
+# for opencv 4.7.0 and above
+if hasattr(aruco, "ArucoDetector"):
+    aruco_dict = aruco.getPredefinedDictionary(aruco.DICT_6X6_250)
+    aruco_detector = aruco.ArucoDetector(aruco_dict, aruco.DetectorParameters())
+# for opencv 4.6.0 and below
+else:
+    aruco_dict = aruco.Dictionary_get(aruco.DICT_6X6_250)
+    aruco_parameters = aruco.DetectorParameters_create()
+    aruco_detector = None
+
+
+def detect_aruco(gray):
+    if aruco_detector is not None:
+        return aruco_detector.detectMarkers(gray)
+    return aruco.detectMarkers(gray, aruco_dict, parameters=aruco_parameters)
+
+
 # tutorial https://www.youtube.com/watch?v=AQXLC2Btag4
 def findAruco(img, marker_size=6, total_markers=250, draw=True):
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -136,9 +160,7 @@ def read_aruco(camera):
 
     # gray = cv2.cvtColor(image, cv2.COLOR_RGBA2GRAY)
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    aruco_dict = aruco.Dictionary_get(aruco.DICT_6X6_250)
-    parameters = aruco.DetectorParameters_create()
-    corners, ids, rejectedImgPoints = aruco.detectMarkers(gray, aruco_dict, parameters=parameters)
+    corners, ids, rejectedImgPoints = detect_aruco(gray)
     image = cv2.circle(image, (int(camera_res_width / 2), int(camera_res_height / 2)), radius, color_center, thickness)
     x_center = 0
     y_center = 0
@@ -186,10 +208,11 @@ while robot.step(timestep) != -1:
 
     # read aruco marker
     status, image, x_center, y_center = read_aruco(camera)
-    if status:
-        image = cv2.circle(image, (int(x_center), int(y_center)), radius, color_pos, thickness)
-    cv2.imshow("camera", image)
-    cv2.waitKey(1)
+    # the marker dot is only drawn on frames that are shown
+    if preview.due():
+        if status:
+            image = cv2.circle(image, (int(x_center), int(y_center)), radius, color_pos, thickness)
+        preview.submit(image)
 
     status = 0
     # calculate error based on aruco position
@@ -249,4 +272,4 @@ while robot.step(timestep) != -1:
     #    )
     # )
 
-cv2.destroyAllWindows()
+preview.stop()
@@ -24,3 +24,6 @@ radius = 3
 color_center = (255, 255, 0)
 color_pos = (0, 0, 255)
 thickness = 3
+
+# camera window [frames per wall-clock second], drawn off the control thread
+preview_rate = 15
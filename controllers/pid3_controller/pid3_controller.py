@@ -1,12 +1,16 @@
 """pid3_controller controller."""
 
 from controller import Robot, Keyboard
-from mavic_toolkit import Sensor, Actuator, Controller
+import os
+import sys
 from time import sleep
 import cv2
 from simple_pid import PID
 from params import *
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "libraries", "python"))
+from mavic_toolkit import Sensor, Actuator, IMU, GYRO, GPS, HEADING
+
 robot = Robot()
 timestep = int(robot.getBasicTimeStep())
 sensor = Sensor(robot)
@@ -27,10 +31,11 @@ yawPID.output_limits = (-5, 5)
 throttlePID.output_limits = (-5, 5)
 
 while robot.step(timestep) != -1:
-    roll, pitch, yaw = sensor.read_imu()
-    roll_accel, pitch_accel, yaw_accel = sensor.read_gyro()
-    xpos, ypos, zpos = sensor.read_gps()
-    head = sensor.read_compass_head()
+    values = sensor.read_all()
+    roll, pitch, yaw = values[IMU]
+    roll_accel, pitch_accel, yaw_accel = values[GYRO]
+    xpos, ypos, zpos = values[GPS]
+    head = values[HEADING]
     # image = sensor.read_camera()
 
     key = keyboard.getKey()
@@ -39,7 +44,7 @@ while robot.step(timestep) != -1:
             status_takeoff = True
             status_landing = False
             motor.arming(arming_speed=10.0)
-            # motor.gimbal_down(pitch_angle=1.6)
+            # motor.gimbal_control(pitch_angle=1.6)
             z_target = 3.0
             print("Arming and Take Off")
             sleep(0.25)
@@ -59,9 +64,7 @@ while robot.step(timestep) != -1:
     yaw_input = yawPID(head)
 
     # print("roll_error={: .2f}|pitch_error={: .2f}|yaw_input={: .2f}".format(roll_error, pitch_error, yaw_input))
-    print(
-        "vertical_input={: .2f}|roll_input={: .2f}|pitch_input={: .2f}".format(vertical_input, roll_input, pitch_input)
-    )
+    print("vertical_input={: .2f}|roll_input={: .2f}|pitch_input={: .2f}".format(vertical_input, roll_input, pitch_input))
 
     motor_fl = vertical_thrust + vertical_input - roll_input - pitch_input - yaw_input
     motor_fr = vertical_thrust + vertical_input + roll_input - pitch_input + yaw_input
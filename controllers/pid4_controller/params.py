@@ -10,6 +10,11 @@ yaw_param = [0.75, 0, 0.25]
 
 vertical_thrust = 68.5
 
+# rate groups [Hz]
+attitude_rate = 125
+position_rate = 50
+vision_rate = 25
+
 x_target = 0.0
 y_target = 0.0
 z_target = 0.0
@@ -25,9 +30,20 @@ status_landing = False
 status_gimbal = False
 status_aruco = False
 status_home = False
+# search the marker only around its last position, see mavic_toolkit.tracker
+aruco_tracking = False
 
 roll_gimbal_angle = 0.0
 pitch_gimbal_angle = 0.0
 yaw_gimbal_angle = 0.0
 
 counter = 0
+
+# mode keys fire once per press, debounced on simulation time
+toggle_keys = ["T", "G", "R", "HOME", "L"]
+# scripted commands, see keyinput: a file read as it grows and a UDP port, None to turn off
+command_file = "commands.txt"
+command_port = None
+
+# camera window [frames per wall-clock second], drawn off the control thread
+preview_rate = 15
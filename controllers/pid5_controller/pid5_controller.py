@@ -1,13 +1,21 @@
 from tracemalloc import start
 from controller import Robot, Keyboard
 from simple_pid import PID
-from time import sleep
+from time import perf_counter
+import os
+import sys
 import numpy as np
 import cv2
-from cv2 import aruco
-from csv_logger import CsvLogger
 
-filename = "logger.csv"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "libraries", "python"))
+from mavic_toolkit import ArucoDetector, VisionWorker, RateScheduler, MarkerTracker, CameraReader, PyramidDetector
+from mavic_toolkit import marker_geometry, select_marker, stack_corners, PoseEstimator, LandingFilter
+from mavic_toolkit import TelemetryRecorder, VideoRecorder, FrameDump
+from keyinput import CommandQueue, KeyInput
+from overlay import Overlay
+from preview import Preview
+
+filename = "logger.flog"
 header = [
     "time",
     "counter",
@@ -37,8 +45,12 @@ header = [
     "status_home",
     "status_aruco",
     "status_landing",
+    "x_target",
+    "y_target",
+    "alti_target",
+    # wall-clock time of the control step up to the log row [s]
+    "step_time",
 ]
-csvlogger = CsvLogger(filename=filename, header=header)
 
 
 def clamp(value, value_min, value_max):
@@ -47,6 +59,17 @@ def clamp(value, value_min, value_max):
 
 class Mavic(Robot):
     K_VERTICAL_THRUST = 68.5
+    # rate groups [Hz], snapped to whole multiples of basicTimeStep
+    ATTITUDE_RATE = 125
+    POSITION_RATE = 50
+    VISION_RATE = 25
+    LOGGING_RATE = 10
+    # camera window [frames per wall-clock second], drawn off the control thread
+    PREVIEW_RATE = 15
+    # frame rate of the saved video, sampled on simulation time
+    VIDEO_RATE = 20
+    # raw frames kept by run(dump=True), 60 s at the vision rate
+    DUMP_CAPACITY = 1500
     X_PID = [2, 2, 4]
     Y_PID = [1.5, 2, 3]
     ALTI_PID = [4, 0.05, 10]
@@ -61,9 +84,21 @@ class Mavic(Robot):
     yaw_target = 0.0
     alti_target = 0.0
 
+    # mode keys fire once per press, debounced on simulation time
+    TOGGLE_KEYS = ["T", "END", "G", "HOME", "M", "PAGEDOWN"]
+    # scripted commands, see keyinput: a file read as it grows and a UDP port, None to turn off
+    COMMAND_FILE = "commands.txt"
+    COMMAND_PORT = None
+
+    # id of the landing pad marker, other markers in view are ignored
+    TARGET_ID = 1
     x_target_aruco = 0.0
     y_target_aruco = 0.0
 
+    # marker observations older than this [s] are ignored when vision runs asynchronously
+    VISION_MAX_AGE = 0.2
+    vision_age = -1.0
+
     roll_angle_gimbal = 0.0
     pitch_angle_gimbal = 0.0
     yaw_angle_gimbal = 0.0
@@ -90,16 +125,21 @@ class Mavic(Robot):
 
         self.keyboard = self.getKeyboard()
         self.keyboard.enable(10 * self.timeStep)
+        self.keys = KeyInput(self.keyboard, self.TOGGLE_KEYS, commands=CommandQueue(self.COMMAND_FILE, self.COMMAND_PORT))
         self.water_to_drop = 0
 
         self.camera = self.getDevice("camera")
-        self.camera.enable(self.timeStep)
+        self.camera_reader = CameraReader(self.camera)
         self.imu = self.getDevice("inertial unit")
-        self.imu.enable(self.timeStep)
         self.gps = self.getDevice("gps")
-        self.gps.enable(self.timeStep)
         self.gyro = self.getDevice("gyro")
-        self.gyro.enable(self.timeStep)
+
+        # each device samples at the rate of the task that reads it
+        self.scheduler = RateScheduler(self.timeStep)
+        self.scheduler.add("attitude", self.ATTITUDE_RATE, devices=[self.imu, self.gyro])
+        self.scheduler.add("position", self.POSITION_RATE, devices=[self.gps])
+        self.scheduler.add("vision", self.VISION_RATE, devices=[self.camera])
+        self.scheduler.add("logging", self.LOGGING_RATE)
 
         self.front_left_motor = self.getDevice("front left propeller")
         self.front_right_motor = self.getDevice("front right propeller")
@@ -113,342 +153,406 @@ class Mavic(Robot):
         self.camera_roll = self.getDevice("camera roll")
         self.camera_pitch = self.getDevice("camera pitch")
         self.camera_yaw = self.getDevice("camera yaw")
+        self.detector = ArucoDetector()
+        focal = self.camera.getWidth() / 2 / np.tan(self.camera.getFov() / 2)
+        self.tracker = MarkerTracker(self.detector, focal=focal, target_id=self.TARGET_ID)
+        self.pyramid = PyramidDetector(self.detector, focal=focal)
+        self.pose = PoseEstimator.from_camera(self.camera)
+        self.landing_filter = LandingFilter()
         # gimbals = [self.camera_roll, self.camera_pitch, self.camera_yaw]
         # for gimbal in gimbals:
         #    gimbal.setPosition(0.0)
 
-    def convert_to_attitude(self, x_error, y_error, yaw):
-        self.c, self.s = np.cos(yaw), np.sin(yaw)
-        self.R = np.array(((self.c, -self.s), (self.s, self.c)))
-        self.converted = np.matmul([x_error, y_error], self.R)
-        return self.converted
-
     def read_camera(self):
-        self.camera_height = self.camera.getHeight()
-        self.camera_width = self.camera.getWidth()
-        self.image = self.camera.getImage()
-        self.image = np.frombuffer(self.image, np.uint8).reshape((self.camera_height, self.camera_width, 4))
+        # read-only BGRA view of the Webots image, use camera_reader.gray / .bgr for converted frames
+        self.camera_height, self.camera_width = self.camera_reader.resolution
+        self.image = self.camera_reader.read().raw
         return self.image
 
-    # for opencv 4.6.0 and below
     def find_aruco(self, image):
         self.image = image
-        self.gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
-        self.aruco_dict = aruco.Dictionary_get(aruco.DICT_6X6_250)
-        self.parameters = aruco.DetectorParameters_create()
-        self.corner, self.id, self.reject = aruco.detectMarkers(self.gray, self.aruco_dict, parameters=self.parameters)
+        self.corner, self.id, self.reject = self.detector.find_aruco(self.image)
         return self.corner, self.id, self.reject
 
-    def run(self, show=False, log=False, save=False):
+    def run(
+        self,
+        show=False,
+        log=False,
+        save=False,
+        async_vision=False,
+        tracking=False,
+        pyramid=False,
+        pose=False,
+        filtering=False,
+        dump=False,
+    ):
         counter = 0
+        if filtering is True:
+            # the filter fuses metric pad offsets with GPS, the pixel gain is neither metric nor yawed
+            pose = True
 
-        videoWriter = 0
+        vision = None
+        if async_vision is True:
+            vision = VisionWorker(self.detector).start()
+
+        preview = Preview("Camera", self.PREVIEW_RATE).start()
+        overlay = Overlay()
+
+        recorder = None
+        if log is True:
+            recorder = TelemetryRecorder(filename, header).start()
+
+        video = None
         if save is True:
-            fourcc = cv2.VideoWriter_fourcc("X", "V", "I", "D")
-            # fourcc = cv2.VideoWriter_fourcc(*"XVID")
-            # fourcc = cv2.VideoWriter_fourcc("M", "J", "P", "G")
-            # fourcc = cv2.VideoWriter_fourcc("m", "p", "4", "v")
-            videoWriter = cv2.VideoWriter("./video.avi", fourcc, 20, (400, 240))
+            # encoded on its own thread, fourcc "MJPG" or "mp4v" also work
+            height, width = self.camera_reader.resolution
+            video = VideoRecorder("./video.avi", (width, height), fps=self.VIDEO_RATE, fourcc="XVID").start()
+
+        frames = None
+        if dump is True:
+            # raw frames for replaying the vision stack offline, see mavic_toolkit.framedump
+            frames = FrameDump.from_camera("./frames", self.camera, self.DUMP_CAPACITY)
+
+        image = None
+        marker_found = False
+        xpos = ypos = altitude = 0.0
+        speed = [0.0, 0.0, 0.0]
+        roll = pitch = yaw = roll_accel = pitch_accel = yaw_accel = 0.0
+        gimbal = (0.0, 0.0, 0.0)
+        roll_error = pitch_error = vertical_input = 0.0
+        roll_input = pitch_input = yaw_input = 0.0
+        front_left_motor_input = front_right_motor_input = rear_left_motor_input = rear_right_motor_input = 0.0
 
         while self.step(self.timeStep) != -1:
-            # Read sensors
-            roll, pitch, yaw = self.imu.getRollPitchYaw()
-            roll_accel, pitch_accel, yaw_accel = self.gyro.getValues()
-            xpos, ypos, altitude = self.gps.getValues()
-            image = self.read_camera()
-
-            key = self.keyboard.getKey()
-
-            # Command
-            ## takeoff
-            if key == ord("T"):
-                self.status_takeoff = True
-                self.status_gimbal = True
-                self.alti_target = 3.0
-                self.pitch_angle_gimbal = 1.6
-                print("Take Off")
-                sleep(0.15)
-            ## landing
-            elif key == Keyboard.END:
-                self.status_landing = True
-                self.alti_target = 0.1
-                print("Landing")
-                sleep(0.15)
-            ## gimbal
-            elif key == ord("G"):
-                self.status_gimbal = not self.status_gimbal
-                if self.status_gimbal == True:
-                    self.roll_angle_gimbal = 0.0
+            step_start = perf_counter()
+            self.scheduler.tick(self.getTime())
+
+            for key in self.keys.poll(self.getTime()):
+                # Command
+                ## takeoff
+                if key == ord("T"):
+                    self.status_takeoff = True
+                    self.status_gimbal = True
+                    self.alti_target = 3.0
                     self.pitch_angle_gimbal = 1.6
-                    self.yaw_angle_gimbal = 0.0
-                print("Gimbal Stabilize", self.status_gimbal)
-                sleep(0.15)
-            elif key == ord("I"):
-                self.pitch_angle_gimbal += 0.005
-                if self.pitch_angle_gimbal >= 1.7:
-                    self.pitch_angle_gimbal = 1.7
-                print("Pitch Gimbal Angle:", self.pitch_angle_gimbal)
-            elif key == ord("K"):
-                self.pitch_angle_gimbal -= 0.005
-                if self.pitch_angle_gimbal <= -0.5:
-                    self.pitch_angle_gimbal = -0.5
-                print("Pitch Gimbal Angle:", self.pitch_angle_gimbal)
-            elif key == ord("J"):
-                self.roll_angle_gimbal += 0.005
-                if self.roll_angle_gimbal >= 0.5:
-                    self.roll_angle_gimbal = 0.5
-                print("Roll Gimbal Angle:", self.roll_angle_gimbal)
-            elif key == ord("L"):
-                self.roll_angle_gimbal -= 0.005
-                if self.roll_angle_gimbal <= -0.5:
-                    self.roll_angle_gimbal = -0.5
-                print("Roll Gimbal Angle:", self.roll_angle_gimbal)
-            elif key == ord("U"):
-                self.yaw_angle_gimbal += 0.005
-                if self.yaw_angle_gimbal >= 1.7:
-                    self.yaw_angle_gimbal = 1.7
-                print("Yaw Gimbal Angle:", self.yaw_angle_gimbal)
-            elif key == ord("O"):
-                self.yaw_angle_gimbal -= 0.005
-                if self.yaw_angle_gimbal <= -1.7:
-                    self.yaw_angle_gimbal = -1.7
-                print("Yaw Gimbal Angle:", self.yaw_angle_gimbal)
-            # moving
-            elif key == ord("W"):
-                self.x_target += 0.1
-                print("target x:{: .2f}[m]".format(self.x_target))
-            elif key == ord("S"):
-                self.x_target -= 0.1
-                print("target x:{: .2f}[m]".format(self.x_target))
-            elif key == ord("A"):
-                self.y_target += 0.1
-                print("target y:{: .2f}[m]".format(self.y_target))
-            elif key == ord("D"):
-                self.y_target -= 0.1
-                print("target y:{: .2f}[m]".format(self.y_target))
-            elif key == Keyboard.LEFT:
-                self.yaw_target += 0.05
-                print("target yaw:{: .2f}[rad]".format(self.yaw_target))
-            elif key == Keyboard.RIGHT:
-                self.yaw_target -= 0.05
-                print("target yaw:{: .2f}[rad]".format(self.yaw_target))
-            elif key == Keyboard.UP:
-                self.alti_target += 0.05
-                print("target altitude:{: .2f}[m]".format(self.alti_target))
-            elif key == Keyboard.DOWN:
-                self.alti_target -= 0.05
-                print("target altitude:{: .2f}[m]".format(self.alti_target))
-            ## home
-            elif key == Keyboard.HOME:
-                self.status_home = not self.status_home
-                if self.status_home == True:
-                    self.x_target = 0.0
-                    self.y_target = 0.0
-                    self.yaw_target = 0.0
-                    self.alti_target = 10.0
-                print("Status Home:", self.status_home)
-                sleep(0.15)
-            ## aruco
-            elif key == ord("M"):
-                self.status_aruco = not self.status_aruco
-                print("Status Aruco:", self.status_aruco)
-                sleep(0.15)
-            ## rth
-            elif key == Keyboard.PAGEDOWN:
-                self.status_home_A = not self.status_home_A
-                self.status_aruco = not self.status_aruco
-                if self.status_home_A == True:
-                    self.yaw_target = 0.0
-                    self.alti_target = 20.0
-                    # self.status_home_A = True
-                print("Return To Home:", self.status_home_A)
-                sleep(0.15)
-
-            if self.status_home_A == True:
-                # error_X = xpos - self.x_target
-                # error_Y = ypos - self.y_target
-                error_alti = altitude - self.alti_target
-                if error_alti < 0.25 and error_alti > -0.25:
-                    self.x_target = 0.0
-                    self.y_target = 0.0
-                # print(error_alti)
-                # if (
-                #    (error_X < 0.25 and error_X > -0.25)
-                #    and (error_Y < 0.25 and error_Y > -0.25)
-                #    and (error_alti < 0.25 and error_alti > -0.25)
-                # ):
-                #    self.status_home_A = False
-                #    print(self.status_home_A)
-            # elif self.status_home_A == True and self.status_takeoff == True:
-            #    self.status_aruco = True
-
-            cam_height = int(self.camera.getHeight())  # 240
-            cam_width = int(self.camera.getWidth())  # 400
-            # print(cam_height, cam_width)
-
-            if self.status_aruco == True:
-                corner, id, _ = self.find_aruco(image=image)
-                if id is not None:
-                    # counter += 1
-                    # print(counter)
-                    image = cv2.line(
-                        image, (int(cam_width / 2), cam_height), (int(cam_width / 2), 0), (255, 255, 0), 1
-                    )
-                    image = cv2.line(
-                        image, (0, int(cam_height / 2)), (cam_width, int(cam_height / 2)), (255, 255, 0), 1
-                    )
-
-                    center_x = corner[0][0][1][0] + ((corner[0][0][0][0] - corner[0][0][1][0]) / 2)
-                    center_y = corner[0][0][2][1] + ((corner[0][0][0][1] - corner[0][0][2][1]) / 2)
-                    # image = cv2.circle(image, (int(center_x), int(center_y)), 2, (0, 0, 255), 3)
-                    start_point = (int(corner[0][0][1][0]), int(corner[0][0][0][1]))
-                    end_point = (int(corner[0][0][0][0]), int(corner[0][0][2][1]))
-                    # shapes = np.zeros_like(image, np.uint8)
-                    shapes = image.copy()
-                    cv2.rectangle(shapes, start_point, end_point, (0, 255, 0), -1)
-                    alpha = 0.4
-                    image = cv2.addWeighted(shapes, alpha, image, 1 - alpha, 0)
-                    self.x_target_aruco = -4 * ((center_y - (cam_height / 2)) / cam_height)
-                    self.y_target_aruco = 4 * ((center_x - (cam_width / 2)) / cam_width)
-                    roll_error = clamp(-self.y_target_aruco + 0.06, -1.5, 1.5)
-                    pitch_error = clamp(self.x_target_aruco - 0.13, -1.5, 1.5)
-                    # print("xe={: .2f}|ye={: .2f}".format(self.x_target_aruco, self.y_target_aruco))
-                    error_alti = altitude - self.alti_target
-                    if (
-                        (self.x_target_aruco < 0.1 and self.x_target_aruco > -0.1)
-                        and (self.y_target_aruco < 0.1 and self.y_target_aruco > -0.1)
-                        and (error_alti < 0.5 and error_alti > -0.5)
-                        and self.status_landing == False
-                    ):
-                        self.status_landing = True
-                        self.alti_target = 0.0
-                        print("Landing")
-                else:
-                    roll_error = clamp(-ypos + 0.06 + self.y_target, -1.5, 1.5)
-                    pitch_error = clamp(-xpos - 0.13 + self.x_target, -1.5, 1.5)
-            else:
-                roll_error = clamp(-ypos + 0.06 + self.y_target, -1.5, 1.5)
-                pitch_error = clamp(-xpos - 0.13 + self.x_target, -1.5, 1.5)
-
-            self.yawPID.setpoint = self.yaw_target
-            self.altiPID.setpoint = self.alti_target
-
-            roll_input = (self.ROLL_PID[0] * clamp(roll, -1, 1)) + (self.ROLL_PID[2] * roll_accel) + roll_error
-            pitch_input = (self.PITCH_PID[0] * clamp(pitch, -1, 1)) + (self.PITCH_PID[2] * pitch_accel) - pitch_error
-            yaw_input = self.yawPID(yaw)
-            vertical_input = self.altiPID(altitude)
-
-            front_left_motor_input = self.K_VERTICAL_THRUST + vertical_input - yaw_input + pitch_input - roll_input
-            front_right_motor_input = self.K_VERTICAL_THRUST + vertical_input + yaw_input + pitch_input + roll_input
-            rear_left_motor_input = self.K_VERTICAL_THRUST + vertical_input + yaw_input - pitch_input - roll_input
-            rear_right_motor_input = self.K_VERTICAL_THRUST + vertical_input - yaw_input - pitch_input + roll_input
-
-            if self.status_takeoff == False or (self.status_landing == True and altitude <= 0.1):
-                self.status_takeoff = False
-                self.status_landing = False
-                self.status_gimbal = False
-                self.status_home = False
-                front_left_motor_input = 0.0
-                front_right_motor_input = 0.0
-                rear_left_motor_input = 0.0
-                rear_right_motor_input = 0.0
-
-            self.front_left_motor.setVelocity(front_left_motor_input)
-            self.front_right_motor.setVelocity(-front_right_motor_input)
-            self.rear_left_motor.setVelocity(-rear_left_motor_input)
-            self.rear_right_motor.setVelocity(rear_right_motor_input)
-
-            if self.status_gimbal == True:
-                roll_gimbal = clamp((-0.001 * roll_accel + self.roll_angle_gimbal), -0.5, 0.5)
-                pitch_gimbal = clamp(((-0.001 * pitch_accel) + self.pitch_angle_gimbal), -0.5, 1.7)
-                yaw_gimbal = clamp((-0.001 * yaw_accel + self.yaw_angle_gimbal), -1.7, 1.7)
-                self.camera_roll.setPosition(roll_gimbal)
-                self.camera_pitch.setPosition(pitch_gimbal)
-                self.camera_yaw.setPosition(yaw_gimbal)
-
-            speed = self.gps.getSpeedVector()
-            # print("SX={:+.2f}|SY={:+.2f}|SZ={:+.2f}".format(speed[0], speed[1], speed[2]))
-
-            logs = [
-                roll,
-                pitch,
-                yaw,
-                roll_accel,
-                pitch_accel,
-                yaw_accel,
-                xpos,
-                ypos,
-                altitude,
-                roll_error,
-                pitch_error,
-                roll_input,
-                pitch_input,
-                yaw_input,
-                vertical_input,
-                front_left_motor_input,
-                front_right_motor_input,
-                rear_left_motor_input,
-                rear_right_motor_input,
-                speed[0],
-                speed[1],
-                speed[2],
-                self.status_takeoff,
-                self.status_home,
-                self.status_aruco,
-                self.status_landing,
-            ]
-
-            dlogs = []
-            for i in logs:
-                dlogs.append(float("{:.2f}".format(i)))
-
-            debug_mode = show
-            if debug_mode == True:
-                print(
-                    "r={:+.2f}|p={:+.2f}|y={:+.2f}|ra={:+.2f}|pa={:+.2f}|ya={:+.2f}|x={:+.2f}|y={:+.2f}|z={:+.2f}|re={:+.2f}|pe={:+.2f}|ri={:+.2f}|pi={:+.2f}|yi={:+.2f}|vi={:+.2f}|fl={:+.2f}|fr={:+.2f}|rl={:+.2f}|rr={:+.2f}|sx={:+.2f}|sy={:+.2f}|sz={:+.2f}|st={}|sh={}|sa={}|sl={}".format(
-                        dlogs[0],
-                        dlogs[1],
-                        dlogs[2],
-                        dlogs[3],
-                        dlogs[4],
-                        dlogs[5],
-                        dlogs[6],
-                        dlogs[7],
-                        dlogs[8],
-                        dlogs[9],
-                        dlogs[10],
-                        dlogs[11],
-                        dlogs[12],
-                        dlogs[13],
-                        dlogs[14],
-                        dlogs[15],
-                        dlogs[16],
-                        dlogs[17],
-                        dlogs[18],
-                        dlogs[19],
-                        dlogs[20],
-                        dlogs[21],
-                        int(dlogs[22]),
-                        int(dlogs[23]),
-                        int(dlogs[24]),
-                        int(dlogs[25]),
-                    )
+                    print("Take Off")
+                ## landing
+                elif key == Keyboard.END:
+                    self.status_landing = True
+                    self.alti_target = 0.1
+                    print("Landing")
+                ## gimbal
+                elif key == ord("G"):
+                    self.status_gimbal = not self.status_gimbal
+                    if self.status_gimbal == True:
+                        self.roll_angle_gimbal = 0.0
+                        self.pitch_angle_gimbal = 1.6
+                        self.yaw_angle_gimbal = 0.0
+                    print("Gimbal Stabilize", self.status_gimbal)
+                elif key == ord("I"):
+                    self.pitch_angle_gimbal += 0.005
+                    if self.pitch_angle_gimbal >= 1.7:
+                        self.pitch_angle_gimbal = 1.7
+                    print("Pitch Gimbal Angle:", self.pitch_angle_gimbal)
+                elif key == ord("K"):
+                    self.pitch_angle_gimbal -= 0.005
+                    if self.pitch_angle_gimbal <= -0.5:
+                        self.pitch_angle_gimbal = -0.5
+                    print("Pitch Gimbal Angle:", self.pitch_angle_gimbal)
+                elif key == ord("J"):
+                    self.roll_angle_gimbal += 0.005
+                    if self.roll_angle_gimbal >= 0.5:
+                        self.roll_angle_gimbal = 0.5
+                    print("Roll Gimbal Angle:", self.roll_angle_gimbal)
+                elif key == ord("L"):
+                    self.roll_angle_gimbal -= 0.005
+                    if self.roll_angle_gimbal <= -0.5:
+                        self.roll_angle_gimbal = -0.5
+                    print("Roll Gimbal Angle:", self.roll_angle_gimbal)
+                elif key == ord("U"):
+                    self.yaw_angle_gimbal += 0.005
+                    if self.yaw_angle_gimbal >= 1.7:
+                        self.yaw_angle_gimbal = 1.7
+                    print("Yaw Gimbal Angle:", self.yaw_angle_gimbal)
+                elif key == ord("O"):
+                    self.yaw_angle_gimbal -= 0.005
+                    if self.yaw_angle_gimbal <= -1.7:
+                        self.yaw_angle_gimbal = -1.7
+                    print("Yaw Gimbal Angle:", self.yaw_angle_gimbal)
+                # moving
+                elif key == ord("W"):
+                    self.x_target += 0.1
+                    print("target x:{: .2f}[m]".format(self.x_target))
+                elif key == ord("S"):
+                    self.x_target -= 0.1
+                    print("target x:{: .2f}[m]".format(self.x_target))
+                elif key == ord("A"):
+                    self.y_target += 0.1
+                    print("target y:{: .2f}[m]".format(self.y_target))
+                elif key == ord("D"):
+                    self.y_target -= 0.1
+                    print("target y:{: .2f}[m]".format(self.y_target))
+                elif key == Keyboard.LEFT:
+                    self.yaw_target += 0.05
+                    print("target yaw:{: .2f}[rad]".format(self.yaw_target))
+                elif key == Keyboard.RIGHT:
+                    self.yaw_target -= 0.05
+                    print("target yaw:{: .2f}[rad]".format(self.yaw_target))
+                elif key == Keyboard.UP:
+                    self.alti_target += 0.05
+                    print("target altitude:{: .2f}[m]".format(self.alti_target))
+                elif key == Keyboard.DOWN:
+                    self.alti_target -= 0.05
+                    print("target altitude:{: .2f}[m]".format(self.alti_target))
+                ## home
+                elif key == Keyboard.HOME:
+                    self.status_home = not self.status_home
+                    if self.status_home == True:
+                        self.x_target = 0.0
+                        self.y_target = 0.0
+                        self.yaw_target = 0.0
+                        self.alti_target = 10.0
+                    print("Status Home:", self.status_home)
+                ## aruco
+                elif key == ord("M"):
+                    self.status_aruco = not self.status_aruco
+                    print("Status Aruco:", self.status_aruco)
+                ## rth
+                elif key == Keyboard.PAGEDOWN:
+                    self.status_home_A = not self.status_home_A
+                    self.status_aruco = not self.status_aruco
+                    if self.status_home_A == True:
+                        self.yaw_target = 0.0
+                        self.alti_target = 20.0
+                        # self.status_home_A = True
+                    print("Return To Home:", self.status_home_A)
+
+            # vision runs before position, so a marker fix of this step reaches this step's position errors
+            if self.scheduler.due("vision"):
+                with self.scheduler.timed("vision"):
+                    self.read_camera()
+                    if frames is not None:
+                        frames.append(self.image, self.getTime(), (xpos, ypos, altitude), (roll, pitch, yaw), speed, gimbal)
+                    # the overlay is only drawn for frames that are shown or saved
+                    draw = preview.due() or (video is not None and video.due(self.getTime()))
+                    # writable BGR copy for the overlay, detection runs on the cached gray frame
+                    image = self.camera_reader.bgr if draw else None
+                    cam_height = int(self.camera_height)  # 240
+                    cam_width = int(self.camera_width)  # 400
+                    marker_found = False
+
+                    if self.status_aruco == True:
+                        gray = self.camera_reader.gray
+                        marker_time = self.getTime()
+                        if vision is not None:
+                            # the gray buffer is reused by the next frame, so hand the worker its own copy
+                            vision.submit(gray.copy(), self.getTime())
+                            observation = vision.latest()
+                            corner, id = [], None
+                            if observation is not None:
+                                self.vision_age = vision.age(self.getTime(), observation)
+                                if self.vision_age <= self.VISION_MAX_AGE:
+                                    corner, id = observation.corner, observation.id
+                                    marker_time = observation.timestamp
+                        elif tracking is True:
+                            corner, id, _ = self.tracker.find_aruco(gray, self.getTime(), speed, altitude, yaw)
+                        elif pyramid is True:
+                            corner, id, _ = self.pyramid.find_aruco(gray, altitude)
+                        else:
+                            corner, id, _ = self.find_aruco(image=gray)
+                        target = select_marker(id, self.TARGET_ID)
+                        if target is not None:
+                            marker_found = True
+                            geometry = marker_geometry(stack_corners(corner), (cam_height, cam_width))
+                            if draw:
+                                overlay.line((cam_width / 2, cam_height), (cam_width / 2, 0), (255, 255, 0))
+                                overlay.line((0, cam_height / 2), (cam_width, cam_height / 2), (255, 255, 0))
+                                # overlay.circle(geometry.centers[target], 2, (0, 0, 255), 3)
+                                x0, y0, x1, y1 = geometry.boxes[target]
+                                # translucent box over the marker, blended only inside the box
+                                overlay.box((x0, y0), (x1, y1), (0, 255, 0), alpha=0.4)
+                            offset = None
+                            if pose is True:
+                                offset = self.pose.offset(stack_corners(corner)[target], self.pitch_angle_gimbal, yaw)
+                            if offset is not None:
+                                # metric marker position relative to the drone, same convention as the pixel gain
+                                self.x_target_aruco = offset[0]
+                                self.y_target_aruco = -offset[1]
+                            else:
+                                self.x_target_aruco = -4 * geometry.errors[target, 1]
+                                self.y_target_aruco = 4 * geometry.errors[target, 0]
+                            # only a solvePnP fix is a world-frame offset in metres
+                            if filtering is True and offset is not None:
+                                self.landing_filter.update_marker(
+                                    offset[:2],
+                                    marker_time,
+                                    (roll_accel, pitch_accel, yaw_accel),
+                                )
+                            # print("xe={: .2f}|ye={: .2f}".format(self.x_target_aruco, self.y_target_aruco))
+                            error_alti = altitude - self.alti_target
+                            if (
+                                (self.x_target_aruco < 0.1 and self.x_target_aruco > -0.1)
+                                and (self.y_target_aruco < 0.1 and self.y_target_aruco > -0.1)
+                                and (error_alti < 0.5 and error_alti > -0.5)
+                                and self.status_landing == False
+                            ):
+                                self.status_landing = True
+                                self.alti_target = 0.0
+                                print("Landing")
+
+                    if draw:
+                        image = overlay.render(image)
+                        preview.submit(image)
+                    if video is not None:
+                        video.submit(image, self.getTime())
+
+            if self.scheduler.due("position"):
+                with self.scheduler.timed("position"):
+                    xpos, ypos, altitude = self.gps.getValues()
+                    speed = self.gps.getSpeedVector()
+                    if filtering is True:
+                        if self.status_aruco == False:
+                            # the pad is at the GPS target until marker fixes say otherwise
+                            self.landing_filter.set_pad(self.x_target, self.y_target)
+                        self.landing_filter.predict(self.getTime())
+                        self.landing_filter.update_gps((xpos, ypos), speed)
+                    # print("SX={:+.2f}|SY={:+.2f}|SZ={:+.2f}".format(speed[0], speed[1], speed[2]))
+
+                    if self.status_home_A == True:
+                        # error_X = xpos - self.x_target
+                        # error_Y = ypos - self.y_target
+                        error_alti = altitude - self.alti_target
+                        if error_alti < 0.25 and error_alti > -0.25:
+                            self.x_target = 0.0
+                            self.y_target = 0.0
+                        # print(error_alti)
+                    # elif self.status_home_A == True and self.status_takeoff == True:
+                    #    self.status_aruco = True
+
+                    if filtering is True:
+                        # filtered pad offset, the same error with or without a marker in the last frame
+                        relative_x, relative_y = self.landing_filter.relative()
+                        roll_error = clamp(relative_y + 0.06, -1.5, 1.5)
+                        pitch_error = clamp(relative_x - 0.13, -1.5, 1.5)
+                    # the last marker fix is held between vision updates
+                    elif self.status_aruco == True and marker_found == True:
+                        roll_error = clamp(-self.y_target_aruco + 0.06, -1.5, 1.5)
+                        pitch_error = clamp(self.x_target_aruco - 0.13, -1.5, 1.5)
+                    else:
+                        roll_error = clamp(-ypos + 0.06 + self.y_target, -1.5, 1.5)
+                        pitch_error = clamp(-xpos - 0.13 + self.x_target, -1.5, 1.5)
+
+                    self.altiPID.setpoint = self.alti_target
+                    vertical_input = self.altiPID(altitude)
+
+            if self.scheduler.due("attitude"):
+                with self.scheduler.timed("attitude"):
+                    roll, pitch, yaw = self.imu.getRollPitchYaw()
+                    roll_accel, pitch_accel, yaw_accel = self.gyro.getValues()
+
+                    self.yawPID.setpoint = self.yaw_target
+
+                    roll_input = (self.ROLL_PID[0] * clamp(roll, -1, 1)) + (self.ROLL_PID[2] * roll_accel) + roll_error
+                    pitch_input = (self.PITCH_PID[0] * clamp(pitch, -1, 1)) + (self.PITCH_PID[2] * pitch_accel) - pitch_error
+                    yaw_input = self.yawPID(yaw)
+
+                    front_left_motor_input = self.K_VERTICAL_THRUST + vertical_input - yaw_input + pitch_input - roll_input
+                    front_right_motor_input = self.K_VERTICAL_THRUST + vertical_input + yaw_input + pitch_input + roll_input
+                    rear_left_motor_input = self.K_VERTICAL_THRUST + vertical_input + yaw_input - pitch_input - roll_input
+                    rear_right_motor_input = self.K_VERTICAL_THRUST + vertical_input - yaw_input - pitch_input + roll_input
+
+                    if self.status_takeoff == False or (self.status_landing == True and altitude <= 0.1):
+                        self.status_takeoff = False
+                        self.status_landing = False
+                        self.status_gimbal = False
+                        self.status_home = False
+                        front_left_motor_input = 0.0
+                        front_right_motor_input = 0.0
+                        rear_left_motor_input = 0.0
+                        rear_right_motor_input = 0.0
+
+                    self.front_left_motor.setVelocity(front_left_motor_input)
+                    self.front_right_motor.setVelocity(-front_right_motor_input)
+                    self.rear_left_motor.setVelocity(-rear_left_motor_input)
+                    self.rear_right_motor.setVelocity(rear_right_motor_input)
+
+                    if self.status_gimbal == True:
+                        roll_gimbal = clamp((-0.001 * roll_accel + self.roll_angle_gimbal), -0.5, 0.5)
+                        pitch_gimbal = clamp(((-0.001 * pitch_accel) + self.pitch_angle_gimbal), -0.5, 1.7)
+                        yaw_gimbal = clamp((-0.001 * yaw_accel + self.yaw_angle_gimbal), -1.7, 1.7)
+                        self.camera_roll.setPosition(roll_gimbal)
+                        self.camera_pitch.setPosition(pitch_gimbal)
+                        self.camera_yaw.setPosition(yaw_gimbal)
+                        gimbal = (roll_gimbal, pitch_gimbal, yaw_gimbal)
+
+            if self.scheduler.due("attitude") or self.scheduler.due("logging"):
+                logs = (
+                    roll,
+                    pitch,
+                    yaw,
+                    roll_accel,
+                    pitch_accel,
+                    yaw_accel,
+                    xpos,
+                    ypos,
+                    altitude,
+                    roll_error,
+                    pitch_error,
+                    roll_input,
+                    pitch_input,
+                    yaw_input,
+                    vertical_input,
+                    front_left_motor_input,
+                    front_right_motor_input,
+                    rear_left_motor_input,
+                    rear_right_motor_input,
+                    speed[0],
+                    speed[1],
+                    speed[2],
+                    self.status_takeoff,
+                    self.status_home,
+                    self.status_aruco,
+                    self.status_landing,
                 )
 
-            cv2.imshow("Camera", image)
-            if save is True:
-                videoWriter.write(image)
-            cv2.waitKey(1)
-
-            log_mode = log
-            if log_mode == True:
-                dlogs.insert(0, counter)
-                csvlogger.critical(dlogs)
+            # telemetry is recorded on every control step, the recorder only copies the row
+            if recorder is not None and self.scheduler.due("attitude"):
+                targets = (self.x_target, self.y_target, self.alti_target)
+                recorder.append((self.getTime(), counter) + logs + targets + (perf_counter() - step_start,))
+
+            if self.scheduler.due("logging"):
+                with self.scheduler.timed("logging"):
+                    debug_mode = show
+                    if debug_mode == True:
+                        print(
+                            "r={:+.2f}|p={:+.2f}|y={:+.2f}|ra={:+.2f}|pa={:+.2f}|ya={:+.2f}|x={:+.2f}|y={:+.2f}|z={:+.2f}|re={:+.2f}|pe={:+.2f}|ri={:+.2f}|pi={:+.2f}|yi={:+.2f}|vi={:+.2f}|fl={:+.2f}|fr={:+.2f}|rl={:+.2f}|rr={:+.2f}|sx={:+.2f}|sy={:+.2f}|sz={:+.2f}|st={}|sh={}|sa={}|sl={}".format(
+                                *logs[:22], *(int(status) for status in logs[22:])
+                            )
+                        )
+                        if vision is not None:
+                            print("vision age={:.3f}[s]".format(self.vision_age))
 
             counter += 1
-        if save is True:
-            videoWriter.release()
-        cv2.destroyAllWindows()
+        self.scheduler.print_report()
+        if recorder is not None:
+            recorder.stop()
+            print("telemetry rows={} written={} dropped={} flushes={}".format(*recorder.report()))
+        if tracking is True:
+            print("aruco tracking hit rate={:.2f} busy={:.3f}[ms] full frames={}".format(*self.tracker.report()))
+        if pyramid is True:
+            print("aruco pyramid hit rate={:.2f} busy={:.3f}[ms]".format(*self.pyramid.report()))
+        if filtering is True:
+            print("landing filter gps updates={} marker updates={}".format(*self.landing_filter.report()))
+        if vision is not None:
+            vision.stop()
+            print("vision submitted={} processed={} dropped={} age mean={:.3f}[s] max={:.3f}[s]".format(*vision.report()))
+        if video is not None:
+            video.stop()
+            print("video frames={} written={} dropped={}".format(*video.report()))
+        if frames is not None:
+            frames.close()
+            print("frame dump frames={} dropped={}".format(*frames.report()))
+        preview.stop()
 
 
 robot = Mavic()
@@ -14,8 +14,12 @@ from controller import (
     Receiver,
 )
 import math
+import os
+import sys
 import numpy as np
-import struct
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "libraries", "python"))
+from gainlink import GainReceiver
 
 
 def suggest_to_gain(params_dict):
@@ -55,7 +59,11 @@ motors = [front_left_motor, front_right_motor, rear_left_motor, rear_right_motor
 receiver = robot.getDevice("receiver")
 emitter = robot.getDevice("emitter")
 
-receiver.enable(timestep)
+# gains streamed from the supervisor, only in worlds with a receiver in the bodySlot
+link = None
+if receiver is not None:
+    receiver.enable(timestep)
+    link = GainReceiver(receiver, 5)
 
 # bayes opt
 # initial gain
@@ -66,10 +74,15 @@ k_roll_p = 50.0
 k_pitch_p = 30.0
 
 reward = 0
-# arming
-for i in range(4):
-    motors[i].setPosition(float("inf"))
-    motors[i].setVelocity(1.0)
+
+
+def arming():
+    for i in range(4):
+        motors[i].setPosition(float("inf"))
+        motors[i].setVelocity(1.0)
+
+
+arming()
 print("arming")
 
 # target
@@ -92,18 +105,19 @@ def convert_to_pitch_roll(ex, ey, yaw):
 # Main loop:
 # - perform simulation steps until Webots is stopping the controller
 while robot.step(timestep) != -1:
+    if link is not None:
+        update = link.poll()
+        if update.gains is not None:
+            # the newest set from the queue, all five at once
+            k_vertical_thrust, k_vertical_offset, k_vertical_p, k_roll_p, k_pitch_p = update.gains
+        if update.episode is not None:
+            # the supervisor put the drone back at rest: start over from the arming state and targets
+            reward = 0
+            target_z, target_x, target_y, target_yaw = 1, 0, 0, 0
+            arming()
+            continue
+
     # Read the sensors:
-    """
-    message = receiver.getData()
-    paramList = struct.unpack("5f", message)
-    receiver.nextPacket()
-    k_vertical_thrust, k_vertical_offset, k_vertical_p, k_roll_p, k_pitch_p = (
-        paramList[0],
-        paramList[1],
-        paramList[2],
-        paramList[3],
-        paramList[4],
-    )"""
 
     roll = imu.getRollPitchYaw()[0] + math.pi / 2.0
     pitch = imu.getRollPitchYaw()[1]
@@ -9,6 +9,11 @@ from controller import (
     LED,
     Keyboard,
 )
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "libraries", "python"))
+from gainlink import GainReceiver
 
 robot = Robot()
 
@@ -48,11 +53,25 @@ compass.enable(timestep)
 gyro = robot.getDevice("gyro")
 gyro.enable(timestep)
 
+# takeoff signal and roll, pitch, throttle gains; streamed by the supervisor when the world has a receiver
+gains = (60.0, 10.0, 10.0, 10.0)
+receiver = robot.getDevice("receiver")
+link = None
+if receiver is not None:
+    receiver.enable(timestep)
+    link = GainReceiver(receiver, len(gains))
+
 z_coord = []
 x_coord = []
 y_coord = []
 
 while robot.step(timestep) != -1:
+    if link is not None:
+        update = link.poll()
+        if update.gains is not None:
+            gains = update.gains
+    takeoff_gain, roll_gain, pitch_gain, throttle_gain = gains
+
     led_state = int(robot.getTime()) % 2
     front_left_led.set(led_state)
     front_right_led.set(led_state)
@@ -77,10 +96,10 @@ while robot.step(timestep) != -1:
         )
     )
 
-    takeoffSignal = 60
-    rollSignal = (roll + 1.57) * 10
-    pitchSignal = (pitch - 0.07) * 10
-    throttleSignal = (zGPS + 2) * 10
+    takeoffSignal = takeoff_gain
+    rollSignal = (roll + 1.57) * roll_gain
+    pitchSignal = (pitch - 0.07) * pitch_gain
+    throttleSignal = (zGPS + 2) * throttle_gain
 
     frontLeftMotorSpeed = takeoffSignal - rollSignal - pitchSignal + throttleSignal
     frontRightMotorSpeed = takeoffSignal + rollSignal - pitchSignal + throttleSignal
@@ -0,0 +1,119 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"MAVLOG\x00\x01"
+EXTENSION = ".flog"
+ALIGN = 64
+
+
+def chunk_dtype(channels, chunk):
+    """One on-disk chunk: its row count, then every channel as a column of ``chunk`` values."""
+    return np.dtype([("rows", "<u8")] + [(name, dtype, (chunk,)) for name, dtype in channels])
+
+
+class FlightLogWriter:
+    """Write rows column by column into a binary flight log.
+
+    The file starts with a fixed header (magic, schema length, JSON channel schema) padded to 64
+    bytes, followed by chunks of ``chunk`` rows. Inside a chunk each channel is one contiguous
+    column, so the whole body can be memory-mapped as an array of chunks. Full chunks are written
+    as soon as they fill; the last, partial chunk is padded on ``close``, so a crash loses at most
+    one chunk.
+    """
+
+    def __init__(self, filename, dtype, chunk=1024):
+        self.dtype = np.dtype(dtype)
+        self.channels = [(name, self.dtype[name].newbyteorder("<").str) for name in self.dtype.names]
+        self.chunk = chunk
+        self.record = np.zeros(1, chunk_dtype(self.channels, chunk))
+        self.rows = 0
+        self.written = 0
+        self.file = open(filename, "wb")
+        schema = json.dumps({"version": 1, "chunk": chunk, "channels": self.channels}).encode()
+        header = MAGIC + struct.pack("<I", len(schema)) + schema
+        self.file.write(header + b"\x00" * (-len(header) % ALIGN))
+
+    def write(self, rows):
+        """Append a structured array (or anything with the channel fields) of rows."""
+        start = 0
+        while start < len(rows):
+            count = min(self.chunk - self.rows, len(rows) - start)
+            for name in self.dtype.names:
+                self.record[name][0, self.rows : self.rows + count] = rows[name][start : start + count]
+            self.rows += count
+            start += count
+            if self.rows == self.chunk:
+                self._write_chunk()
+
+    def _write_chunk(self):
+        self.record["rows"] = self.rows
+        self.file.write(self.record.tobytes())
+        self.written += self.rows
+        self.rows = 0
+
+    def close(self):
+        if self.file is None:
+            return
+        if self.rows:
+            # stale values of the previous chunk past ``rows`` are ignored by the reader
+            self._write_chunk()
+        self.file.close()
+        self.file = None
+
+
+class FlightLog:
+    """Memory-mapped reader for binary flight logs; ``log["altitude"]`` is a NumPy column."""
+
+    def __init__(self, filename):
+        with open(filename, "rb") as file:
+            magic = file.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError("{} is not a flight log".format(filename))
+            (length,) = struct.unpack("<I", file.read(4))
+            schema = json.loads(file.read(length))
+        self.filename = filename
+        self.chunk = schema["chunk"]
+        self.channels = [tuple(channel) for channel in schema["channels"]]
+        self.names = [name for name, _ in self.channels]
+        self.chunk_dtype = chunk_dtype(self.channels, self.chunk)
+        offset = len(MAGIC) + 4 + length
+        offset += -offset % ALIGN
+        self.offset = offset
+        # a chunk cut short by a crash is left out
+        count = (os.path.getsize(filename) - offset) // self.chunk_dtype.itemsize
+        if count > 0:
+            self.chunks = np.memmap(filename, self.chunk_dtype, mode="r", offset=offset, shape=(count,))
+        else:
+            self.chunks = np.zeros(0, self.chunk_dtype)
+        # only the last chunk can be partial; summing every row count would page in the whole file
+        self.rows = (len(self.chunks) - 1) * self.chunk + int(self.chunks["rows"][-1]) if len(self.chunks) else 0
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        """Channel as a 1-D array; a view into the file for single-chunk logs, one column copy otherwise."""
+        return self.chunks[name].reshape(-1)[: self.rows]
+
+    def columns(self, name):
+        """Channel as a (chunks, chunk) view into the file, without copying."""
+        return self.chunks[name]
+
+    def iter_chunks(self):
+        """Chunks read from the file one at a time, for scans of logs larger than memory.
+
+        Unlike the memory map, pages of chunks already scanned are not kept mapped.
+        """
+        with open(self.filename, "rb") as file:
+            file.seek(self.offset)
+            for _ in range(len(self.chunks)):
+                yield np.fromfile(file, self.chunk_dtype, count=1)[0]
+
+    def to_array(self):
+        rows = np.empty(self.rows, [(name, dtype) for name, dtype in self.channels])
+        for name in self.names:
+            rows[name] = self[name]
+        return rows
@@ -0,0 +1,125 @@
+"""Binary gain messages between a supervisor and the drone controller over Emitter/Receiver.
+
+A packet holds one or more messages, each a header and float32 values:
+
+    version  uint8    VERSION, packets of another version are dropped whole
+    kind     uint8    GAINS or RESET
+    count    uint16   number of float32 values that follow
+    sequence uint32   increasing per sender; older or repeated messages are ignored
+
+The sender queues messages during a step and ``flush`` sends them as one packet. The receiver
+drains the whole queue in ``poll`` and returns only the newest gain set, so a controller that
+falls behind applies the latest parameters in one assignment instead of replaying every packet.
+
+The world needs an Emitter in the supervisor's children and a Receiver in the Mavic2Pro
+bodySlot, on the same channel.
+"""
+
+import struct
+from collections import namedtuple
+
+VERSION = 1
+GAINS = 1
+RESET = 2
+
+HEADER = struct.Struct("<BBHI")
+Message = namedtuple("Message", ["kind", "sequence", "values"])
+Update = namedtuple("Update", ["gains", "episode", "messages", "dropped"])
+
+
+def encode(messages):
+    """One packet from (kind, sequence, values) messages."""
+    parts = []
+    for kind, sequence, values in messages:
+        parts.append(HEADER.pack(VERSION, kind, len(values), sequence & 0xFFFFFFFF))
+        parts.append(struct.pack("<{}f".format(len(values)), *values))
+    return b"".join(parts)
+
+
+def decode(data):
+    """Messages of one packet; raises ValueError for a packet of another version or a truncated one."""
+    messages = []
+    offset = 0
+    while offset < len(data):
+        if len(data) - offset < HEADER.size:
+            raise ValueError("truncated header at byte {}".format(offset))
+        version, kind, count, sequence = HEADER.unpack_from(data, offset)
+        if version != VERSION:
+            raise ValueError("gainlink version {}, expected {}".format(version, VERSION))
+        offset += HEADER.size
+        end = offset + 4 * count
+        if end > len(data):
+            raise ValueError("truncated values at byte {}".format(offset))
+        messages.append(Message(kind, sequence, struct.unpack_from("<{}f".format(count), data, offset)))
+        offset = end
+    return messages
+
+
+class GainSender:
+    def __init__(self, emitter):
+        self.emitter = emitter
+        self.sequence = 0
+        self.pending = []
+        self.packets = 0
+
+    def _queue(self, kind, values):
+        self.sequence += 1
+        self.pending.append((kind, self.sequence, tuple(float(value) for value in values)))
+
+    def gains(self, values):
+        self._queue(GAINS, values)
+
+    def reset(self, episode):
+        self._queue(RESET, (episode,))
+
+    def flush(self):
+        """Send everything queued since the last flush as one packet."""
+        if not self.pending:
+            return 0
+        self.emitter.send(encode(self.pending))
+        count = len(self.pending)
+        self.pending = []
+        self.packets += 1
+        return count
+
+
+class GainReceiver:
+    """Drains a Receiver; ``size`` is the length of a valid gain set, other lengths are dropped."""
+
+    def __init__(self, receiver, size):
+        self.receiver = receiver
+        self.size = size
+        self.sequence = 0
+        self.received = 0
+        self.dropped = 0
+
+    def poll(self):
+        """Read every queued packet; the newest gain set and reset episode, None when there was none."""
+        gains = episode = None
+        messages = dropped = 0
+        receiver = self.receiver
+        while receiver.getQueueLength() > 0:
+            data = receiver.getBytes()
+            receiver.nextPacket()
+            try:
+                packet = decode(data)
+            except ValueError:
+                dropped += 1
+                continue
+            for kind, sequence, values in packet:
+                messages += 1
+                # a restarted sender begins again at 1, take that as a new stream
+                if sequence <= self.sequence and sequence != 1:
+                    dropped += 1
+                    continue
+                self.sequence = sequence
+                if kind == GAINS and len(values) == self.size:
+                    gains = values
+                elif kind == RESET and len(values) == 1:
+                    # a reset discards gains that were queued before it
+                    episode, gains = int(values[0]), None
+                else:
+                    dropped += 1
+        self.received += messages
+        self.dropped += dropped
+        return Update(gains, episode, messages, dropped)
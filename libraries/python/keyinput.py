@@ -0,0 +1,146 @@
+"""Keyboard and scripted commands for the control loops, without blocking them.
+
+Webots reports a held key on every keyboard sample, so the controllers used to sleep after a
+toggle key to avoid toggling it again on the next step, holding the motors at stale commands
+meanwhile. ``KeyInput`` instead fires a toggle key once when it goes down and ignores it again
+for ``debounce`` seconds of simulation time; other keys repeat while held, as before.
+
+Commands can also come from a ``CommandQueue``: a text file that is read as it grows, opened on
+the first poll after it appears, or UDP datagrams, one command per line:
+
+    T           press T now
+    12.5 M      press M at 12.5 s of simulation time
+    # comment
+
+Keys are single characters or Keyboard constant names (END, HOME, UP, PAGEDOWN, ...).
+
+    echo "HOME" >> commands.txt
+    echo "END" | nc -u -w0 127.0.0.1 5005
+"""
+
+import heapq
+import os
+import socket
+
+
+class CommandQueue:
+    """Commands from a file another process appends to and/or a UDP port, read without blocking."""
+
+    def __init__(self, path=None, port=None, host="127.0.0.1"):
+        self.path = path
+        self.file = None
+        self._open()
+        self.partial = ""
+        self.socket = None
+        if port is not None:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket.bind((host, port))
+            self.socket.setblocking(False)
+        # (time, order, key) of commands that wait for their simulation time
+        self.pending = []
+        self.order = 0
+        self.received = 0
+        self.rejected = 0
+
+    def _open(self):
+        # the file may be created after the controller starts, poll keeps trying until it exists
+        if self.path is not None and os.path.exists(self.path):
+            try:
+                self.file = open(self.path)
+            except FileNotFoundError:
+                pass
+
+    def _parse(self, text):
+        for line in text.splitlines():
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            try:
+                at = float(fields[0]) if len(fields) == 2 else float("-inf")
+            except ValueError:
+                self.rejected += 1
+                continue
+            if len(fields) > 2:
+                self.rejected += 1
+                continue
+            heapq.heappush(self.pending, (at, self.order, fields[-1]))
+            self.order += 1
+            self.received += 1
+
+    def poll(self, time):
+        """Keys whose time has come, in the order they were queued."""
+        if self.file is None:
+            self._open()
+        if self.file is not None:
+            text = self.partial + self.file.read()
+            # a line still being written is kept for the next poll
+            complete, _, self.partial = text.rpartition("\n")
+            self._parse(complete)
+        if self.socket is not None:
+            while True:
+                try:
+                    data = self.socket.recv(4096)
+                except (BlockingIOError, InterruptedError):
+                    break
+                self._parse(data.decode(errors="replace"))
+        keys = []
+        while self.pending and self.pending[0][0] <= time:
+            keys.append(heapq.heappop(self.pending)[2])
+        return keys
+
+    def close(self):
+        self.path = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+
+class KeyInput:
+    """Edge-triggered, debounced keys of a Webots Keyboard, plus the keys of a CommandQueue.
+
+    ``toggles`` are the keys that fire once per press, as characters, key codes or Keyboard
+    constant names. Queued commands fire once each, without debouncing.
+    """
+
+    def __init__(self, keyboard, toggles=(), debounce=0.15, commands=None):
+        self.keyboard = keyboard
+        self.toggles = {self.code(key) for key in toggles}
+        self.debounce = debounce
+        self.commands = commands
+        self.held = set()
+        self.fired = {}
+        self.unknown = 0
+
+    def code(self, key):
+        if isinstance(key, int):
+            return key
+        if len(key) == 1:
+            return ord(key.upper())
+        return getattr(self.keyboard, key.upper())
+
+    def poll(self, time):
+        """Key codes to handle this step: keyboard keys first, then queued commands."""
+        pressed = []
+        key = self.keyboard.getKey()
+        while key > 0:
+            if key not in pressed:
+                pressed.append(key)
+            key = self.keyboard.getKey()
+        keys = []
+        for key in pressed:
+            if key in self.toggles:
+                if key in self.held or time - self.fired.get(key, float("-inf")) < self.debounce:
+                    continue
+                self.fired[key] = time
+            keys.append(key)
+        self.held = set(pressed)
+        if self.commands is not None:
+            for name in self.commands.poll(time):
+                try:
+                    keys.append(self.code(name))
+                except AttributeError:
+                    self.unknown += 1
+        return keys
@@ -0,0 +1,318 @@
+"""Devices, control and vision of the Mavic 2 Pro, shared by every controller.
+
+Put ``libraries/python`` on ``sys.path`` and import from here. Nothing is read from a
+controller's ``params.py`` or ``var.py``: gains and targets are passed in, and ``Sensor`` is told
+the world's coordinate system (the older worlds are NUE, y up; mavic_2_pro is ENU, z up) and
+whether angles are wanted in degrees.
+"""
+
+import math
+
+import numpy as np
+
+from flightlog import FlightLog, FlightLogWriter
+from overlay import Overlay
+from mavic_toolkit.camera import CameraReader
+from mavic_toolkit.detector import ArucoDetector
+from mavic_toolkit.geometry import MarkerGeometry, convert_to_attitude, marker_geometry, select_marker, stack_corners
+from mavic_toolkit.vision import VisionWorker, Observation
+from mavic_toolkit.scheduler import RateScheduler
+from mavic_toolkit.tracker import MarkerTracker
+from mavic_toolkit.pyramid import PyramidDetector
+from mavic_toolkit.pose import PoseEstimator, camera_matrix
+from mavic_toolkit.kalman import LandingFilter
+from mavic_toolkit.telemetry import TelemetryRecorder, telemetry_dtype
+from mavic_toolkit.video import VideoRecorder
+from mavic_toolkit.framedump import FrameDump, FrameReplay, state_dtype
+
+# layout of Sensor.values, filled by Sensor.read_all
+IMU = slice(0, 3)
+GYRO = slice(3, 6)
+GPS = slice(6, 9)
+COMPASS = slice(9, 12)
+HEADING = 12
+
+
+class Sensor:
+    """The attitude and position sensors and the camera.
+
+    ``read_imu``, ``read_gyro``, ``read_gps`` and ``read_compass`` read one sensor, calling the
+    device once per axis. ``read_all`` calls each of the four devices once and writes roll, pitch,
+    yaw, the gyro rates, the GPS position, the compass vector and the heading into ``values``, an
+    array allocated once, converted as by the single-sensor reads; slice it with IMU, GYRO, GPS,
+    COMPASS and HEADING. The array is overwritten by the next ``read_all``.
+
+    world -- "NUE" (the inertial unit reports roll a quarter turn off and GPS y is the altitude)
+             or "ENU".
+    degrees -- attitude, gyro rates and heading in degrees, else radians.
+    """
+
+    def __init__(self, robot, world="NUE", degrees=True):
+        if world not in ("NUE", "ENU"):
+            raise ValueError("world must be 'NUE' or 'ENU', not {!r}".format(world))
+        self.robot = robot
+        self.timestep = int(self.robot.getBasicTimeStep())
+        self.imu = self.robot.getDevice("inertial unit")
+        self.gyro = self.robot.getDevice("gyro")
+        self.gps = self.robot.getDevice("gps")
+        self.compass = self.robot.getDevice("compass")
+        self.camera = self.robot.getDevice("camera")
+        self.camera_reader = CameraReader(self.camera)
+        self.world = world
+        self.roll_offset = math.pi / 2.0 if world == "NUE" else 0.0
+        # index of the horizontal y and of the altitude in the GPS values
+        self.gps_y, self.gps_z = (2, 1) if world == "NUE" else (1, 2)
+        self.scale = 180 / math.pi if degrees else 1.0
+        self.values = np.zeros(13)
+
+    def enable(self, timestep, gps_timestep=None, camera_timestep=None):
+        # gps and camera can sample slower than the attitude sensors
+        self.imu.enable(timestep)
+        self.gyro.enable(timestep)
+        self.gps.enable(gps_timestep or timestep)
+        self.compass.enable(timestep)
+        self.camera.enable(camera_timestep or timestep)
+
+    def read_all(self):
+        roll, pitch, yaw = self.imu.getRollPitchYaw()
+        roll_accel, pitch_accel, yaw_accel = self.gyro.getValues()
+        gps = self.gps.getValues()
+        compass = self.compass.getValues()
+        scale = self.scale
+        # a single assignment, slicing the array per sensor costs more than the device calls
+        self.values[:] = (
+            (roll + self.roll_offset) * scale,
+            pitch * scale,
+            yaw * scale,
+            roll_accel * scale,
+            pitch_accel * scale,
+            yaw_accel * scale,
+            gps[0],
+            gps[self.gps_y],
+            gps[self.gps_z],
+            compass[0],
+            compass[1],
+            compass[2],
+            self._heading(compass),
+        )
+        return self.values
+
+    def _heading(self, compass):
+        heading = math.atan2(compass[0], compass[1]) - (math.pi / 2)
+        if heading < -math.pi:
+            heading = heading + (2 * math.pi)
+        return heading * self.scale
+
+    def read_imu(self, show=False):
+        self.roll = (self.imu.getRollPitchYaw()[0] + self.roll_offset) * self.scale
+        self.pitch = self.imu.getRollPitchYaw()[1] * self.scale
+        self.yaw = self.imu.getRollPitchYaw()[2] * self.scale
+        if show:
+            print("roll={: .2f}|pitch={: .2f}|yaw={: .2f}".format(self.roll, self.pitch, self.yaw))
+        return self.roll, self.pitch, self.yaw
+
+    def read_gyro(self, show=False):
+        self.roll_accel = self.gyro.getValues()[0] * self.scale
+        self.pitch_accel = self.gyro.getValues()[1] * self.scale
+        self.yaw_accel = self.gyro.getValues()[2] * self.scale
+        if show:
+            print(
+                "roll_accel={: .2f}|pitch_accel={: .2f}|yaw_accel={: .2f}".format(
+                    self.roll_accel, self.pitch_accel, self.yaw_accel
+                )
+            )
+        return self.roll_accel, self.pitch_accel, self.yaw_accel
+
+    def read_gps(self, show=False):
+        self.xpos = self.gps.getValues()[0]
+        self.ypos = self.gps.getValues()[self.gps_y]
+        self.zpos = self.gps.getValues()[self.gps_z]
+        if show:
+            print("xpos={: .2f}|ypos={: .2f}|zpos={: .2f}".format(self.xpos, self.ypos, self.zpos))
+        return self.xpos, self.ypos, self.zpos
+
+    def read_speed(self):
+        """GPS velocity [m/s] as (x, y, z), z up and y a quarter turn left of x, the frame yaw turns in.
+
+        This is the horizontal convention of MarkerTracker and PoseEstimator. In a NUE world the
+        GPS y is the climb rate and east is z, so it is (x, -z, y) of the speed vector.
+        """
+        vx, vy, vz = self.gps.getSpeedVector()
+        if self.world == "NUE":
+            return vx, -vz, vy
+        return vx, vy, vz
+
+    def read_compass(self, show=False):
+        self.xcom = self.compass.getValues()[0]
+        self.ycom = self.compass.getValues()[1]
+        self.zcom = self.compass.getValues()[2]
+        if show:
+            print("xcom={: .2f}|ycom={: .2f}|zcom={: .2f}".format(self.xcom, self.ycom, self.zcom))
+        return self.xcom, self.ycom, self.zcom
+
+    def read_compass_head(self, show=False):
+        self.compass_value = self.compass.getValues()
+        self.heading = self._heading(self.compass_value)
+        if show:
+            print("heading={: .2f}".format(self.heading))
+        return self.heading
+
+    def read_camera(self):
+        # read-only BGRA view of the Webots image, use camera_reader.gray / .bgr for converted frames
+        self.image = self.camera_reader.read().raw
+        return self.image
+
+    def read_camera_resolution(self):
+        self.camera_height, self.camera_width = self.camera_reader.resolution
+        return self.camera_height, self.camera_width
+
+
+class Actuator:
+    def __init__(self, robot):
+        self.robot = robot
+        self.motor_fl = self.robot.getDevice("front left propeller")
+        self.motor_fr = self.robot.getDevice("front right propeller")
+        self.motor_rl = self.robot.getDevice("rear left propeller")
+        self.motor_rr = self.robot.getDevice("rear right propeller")
+        self.camera_roll = self.robot.getDevice("camera roll")
+        self.camera_pitch = self.robot.getDevice("camera pitch")
+        self.camera_yaw = self.robot.getDevice("camera yaw")
+
+    def arming(self, arming_speed=0.0):
+        self.motor_fl.setPosition(float("inf"))
+        self.motor_fr.setPosition(float("inf"))
+        self.motor_rl.setPosition(float("inf"))
+        self.motor_rr.setPosition(float("inf"))
+        self.motor_fl.setVelocity(arming_speed)
+        self.motor_fr.setVelocity(arming_speed)
+        self.motor_rl.setVelocity(arming_speed)
+        self.motor_rr.setVelocity(arming_speed)
+
+    def gimbal_control(self, roll_angle=0.0, pitch_angle=0.0, yaw_angle=0.0):
+        self.camera_roll.setPosition(roll_angle)
+        self.camera_pitch.setPosition(pitch_angle)
+        self.camera_yaw.setPosition(yaw_angle)
+
+    def motor_speed(self, motor_fl=0, motor_fr=0, motor_rl=0, motor_rr=0, show=False):
+        self.motor_fl.setVelocity(motor_fl)
+        self.motor_fr.setVelocity(-motor_fr)
+        self.motor_rl.setVelocity(-motor_rl)
+        self.motor_rr.setVelocity(motor_rr)
+        if show:
+            print(
+                "motor_fl={: .2f}|motor_fr={: .2f}|motor_rl={: .2f}|motor_rr={: .2f}".format(
+                    motor_fl, -motor_fr, -motor_rl, motor_rr
+                )
+            )
+
+
+class Controller:
+    def __init__(
+        self,
+        roll_param,
+        pitch_param,
+        yaw_param,
+        z_param,
+        z_takeoff=68.5,
+        # z_takeoff=75,
+        # z_offset=0.6,
+        z_offset=0.0,
+    ):
+        self.roll_param = roll_param
+        self.pitch_param = pitch_param
+        self.yaw_param = yaw_param
+        self.z_param = z_param
+        self.z_takeoff = z_takeoff
+        self.z_offset = z_offset
+
+    def error_calculation(self, target=[0, 0, 0, 0], gps=[0, 0, 0], marker=[0, 0, 0, 0], head=0, status=False):
+        self.x_target = target[0]
+        self.y_target = target[1]
+        self.z_target = target[2]
+        self.yaw_target = target[3]
+        self.z_error = self.z_target - gps[2]
+        if status:
+            if marker[1] != 0:
+                self.y_error = (marker[2] - marker[1]) / (marker[1] / 3)
+                self.x_error = -(marker[3] - marker[0]) / (marker[0] / 3)
+            else:
+                self.x_error = 0
+                self.y_error = 0
+        else:
+            self.x_error = gps[0] - self.x_target
+            self.y_error = gps[1] - self.y_target
+
+        self.yaw_error = self.yaw_target - head
+        # print(head)
+        return self.x_error, self.y_error, self.z_error, self.yaw_error
+
+    def calculate(self, imu=[0, 0, 0], gyro=[0, 0, 0], error=[[0, 0, 0], [0, 0, 0], [0, 0, 0], [0, 0, 0]], head=0):
+        self.x_error = error[0]
+        self.y_error = error[1]
+        self.z_error = error[2]
+        self.yaw_error = error[3]
+
+        self.pitch_error, self.roll_error = convert_to_attitude(
+            np.clip(self.x_error[0], -1.5, 1.5), np.clip(self.y_error[0], -1.5, 1.5), head
+        )
+
+        self.roll_input = (self.roll_param[0] * np.clip(imu[0], -0.5, 0.5)) + (self.roll_param[2] * gyro[0]) + self.roll_error
+        self.pitch_input = (self.pitch_param[0] * np.clip(imu[1], -0.5, 0.5)) - (self.pitch_param[2] * gyro[1]) - self.pitch_error
+
+        self.yaw_input = (self.yaw_param[0] * self.yaw_error[0]) - (self.yaw_param[2] * self.yaw_error[2])
+
+        self.z_input = (
+            (self.z_param[0] * self.z_error[0]) + (self.z_param[1] * self.z_error[1]) + (self.z_param[2] * self.z_error[2])
+        )
+
+        return self.z_takeoff, self.z_input, self.roll_input, self.pitch_input, self.yaw_input
+
+    def gimbal_control(self, gyro=[0, 0, 0], roll_angle=0.0, pitch_angle=0.0, yaw_angle=0.0):
+        pitch_gimbal = np.clip(((-0.1 * gyro[1]) + pitch_angle), -0.5, 1.7)
+        roll_gimbal = np.clip((-0.115 * gyro[0] + roll_angle), -0.5, 0.5)
+        yaw_gimbal = np.clip((-0.115 * gyro[2] + yaw_angle), -1.7, 1.7)
+        return roll_gimbal, pitch_gimbal, yaw_gimbal
+
+
+class Marker:
+    def __init__(self, focal=None, target_id=1):
+        self.radius = 3
+        self.color_blue = (0, 0, 255)
+        self.color_red = (255, 0, 0)
+        self.thickness = 3
+        self.detector = ArucoDetector()
+        # id of the landing pad marker, None to take whichever marker was detected first
+        self.target_id = target_id
+        self.tracker = MarkerTracker(self.detector, focal=focal, target_id=target_id)
+        self.overlay = Overlay()
+
+    def find_aruco(self, image, gray=None):
+        # image is what create_marker draws on, detection runs on gray when it is given
+        self.image = image
+        self.corner, self.id, self.reject = self.detector.find_aruco(self.image if gray is None else gray)
+        return self.corner, self.id, self.reject
+
+    def track_aruco(self, image, timestamp, speed=None, altitude=None, yaw=0.0, gray=None):
+        self.image = image
+        self.corner, self.id, self.reject = self.tracker.find_aruco(
+            self.image if gray is None else gray, timestamp, speed, altitude, yaw
+        )
+        return self.corner, self.id, self.reject
+
+    def get_center(self, cam_reso=[0, 0]):
+        # None when the target marker is not among the detected ones
+        self.image_height, self.image_width = cam_reso
+        target = select_marker(self.id, self.target_id)
+        if target is None:
+            return None
+        self.geometry = marker_geometry(stack_corners(self.corner), cam_reso)
+        self.center_x, self.center_y = (float(v) for v in self.geometry.centers[target])
+        return int(self.image_height / 2), int(self.image_width / 2), self.center_x, self.center_y
+
+    def create_marker(self, xpos, ypos, radius=3, color=(255, 0, 0), thickness=1):
+        # queued, draw_overlay draws every primitive of the frame in one pass
+        self.overlay.circle((xpos, ypos), radius, color, thickness)
+        return self.overlay
+
+    def draw_overlay(self, image):
+        return self.overlay.render(image)
@@ -0,0 +1,56 @@
+import cv2
+import numpy as np
+
+
+class CameraReader:
+    """Read Webots camera frames without per-frame allocation.
+
+    The resolution is queried once. ``read`` only wraps the new BGRA buffer; ``gray`` and ``bgr``
+    are converted on first access after a read, into buffers allocated once, so a frame is never
+    converted to a format nobody asked for.
+
+    Aliasing:
+        raw   -- read-only view of the buffer returned by ``Camera.getImage``. It aliases the Webots
+                 image, is not copied and must not be kept past the next simulation step.
+        gray  -- view of this reader's own gray buffer, not of the Webots image. Writable, but
+                 overwritten by the next frame; copy it to keep it.
+        bgr   -- same as gray, for the 3-channel buffer.
+    """
+
+    def __init__(self, camera):
+        self.camera = camera
+        self.height = camera.getHeight()
+        self.width = camera.getWidth()
+        self.gray_buffer = np.empty((self.height, self.width), np.uint8)
+        self.bgr_buffer = np.empty((self.height, self.width, 3), np.uint8)
+        self.frame = 0
+        self._raw = None
+        self._gray_frame = -1
+        self._bgr_frame = -1
+
+    def read(self):
+        self._raw = np.frombuffer(self.camera.getImage(), np.uint8).reshape((self.height, self.width, 4))
+        self.frame += 1
+        return self
+
+    @property
+    def resolution(self):
+        return self.height, self.width
+
+    @property
+    def raw(self):
+        return self._raw
+
+    @property
+    def gray(self):
+        if self._gray_frame != self.frame:
+            cv2.cvtColor(self._raw, cv2.COLOR_BGRA2GRAY, dst=self.gray_buffer)
+            self._gray_frame = self.frame
+        return self.gray_buffer
+
+    @property
+    def bgr(self):
+        if self._bgr_frame != self.frame:
+            cv2.cvtColor(self._raw, cv2.COLOR_BGRA2BGR, dst=self.bgr_buffer)
+            self._bgr_frame = self.frame
+        return self.bgr_buffer
@@ -0,0 +1,34 @@
+import cv2
+from cv2 import aruco
+
+
+class ArucoDetector:
+    """Build the ArUco dictionary, parameters and detector once and reuse them on every frame."""
+
+    def __init__(self, dictionary=aruco.DICT_6X6_250, parameters=None):
+        # for opencv 4.7.0 and above
+        if hasattr(aruco, "ArucoDetector"):
+            self.aruco_dict = aruco.getPredefinedDictionary(dictionary)
+            self.parameters = parameters if parameters is not None else aruco.DetectorParameters()
+            self.detector = aruco.ArucoDetector(self.aruco_dict, self.parameters)
+        # for opencv 4.6.0 and below
+        else:
+            self.aruco_dict = aruco.Dictionary_get(dictionary)
+            self.parameters = parameters if parameters is not None else aruco.DetectorParameters_create()
+            self.detector = None
+
+    def detect(self, gray):
+        if self.detector is not None:
+            return self.detector.detectMarkers(gray)
+        return aruco.detectMarkers(gray, self.aruco_dict, parameters=self.parameters)
+
+    def find_aruco(self, image):
+        # gray frames are used as they are, BGRA is what the Webots camera delivers
+        if image.ndim == 2:
+            self.gray = image
+        elif image.shape[2] == 4:
+            self.gray = cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+        else:
+            self.gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        self.corner, self.id, self.reject = self.detect(self.gray)
+        return self.corner, self.id, self.reject
@@ -0,0 +1,140 @@
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from mavic_toolkit.camera import CameraReader
+
+# flight state of a dumped frame, as the control loop saw it when the frame was read
+state_dtype = np.dtype(
+    [
+        ("time", np.float64),
+        ("xpos", np.float64),
+        ("ypos", np.float64),
+        ("altitude", np.float64),
+        ("roll", np.float64),
+        ("pitch", np.float64),
+        ("yaw", np.float64),
+        ("speed_x", np.float64),
+        ("speed_y", np.float64),
+        ("speed_z", np.float64),
+        ("gimbal_roll", np.float64),
+        ("gimbal_pitch", np.float64),
+        ("gimbal_yaw", np.float64),
+    ]
+)
+
+FRAMES = "frames.npy"
+STATE = "state.npy"
+CAMERA = "camera.json"
+
+
+class FrameDump:
+    """Raw BGRA camera frames and their flight state, into preallocated memory-mapped files.
+
+    A dump is a directory with ``frames.npy`` of shape (capacity, height, width, 4), ``state.npy``
+    with one ``state_dtype`` row per frame and ``camera.json``. Both arrays are created at full
+    size up front, so ``append`` is a copy into the page cache and the kernel writes the pages
+    back; nothing is encoded and nothing grows during the flight. Rows not reached keep a NaN
+    time, which is how a dump cut short by a crash is read back. Frames past ``capacity`` are
+    counted as dropped.
+    """
+
+    def __init__(self, directory, resolution, fov, capacity):
+        self.directory = directory
+        height, width = resolution
+        os.makedirs(directory, exist_ok=True)
+        self.frames = open_memmap(os.path.join(directory, FRAMES), "w+", np.uint8, (capacity, height, width, 4))
+        self.state = open_memmap(os.path.join(directory, STATE), "w+", state_dtype, (capacity,))
+        self.state["time"] = np.nan
+        with open(os.path.join(directory, CAMERA), "w") as file:
+            json.dump({"width": width, "height": height, "fov": fov}, file)
+        self.capacity = capacity
+        self.count = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_camera(cls, directory, camera, capacity):
+        return cls(directory, (camera.getHeight(), camera.getWidth()), camera.getFov(), capacity)
+
+    def append(self, frame, time, position, attitude, speed, gimbal):
+        """Copy ``frame`` and its state into the next row; False when the dump is full."""
+        if self.count == self.capacity:
+            self.dropped += 1
+            return False
+        self.frames[self.count] = frame
+        self.state[self.count] = (time, *position, *attitude, *speed, *gimbal)
+        self.count += 1
+        return True
+
+    def close(self):
+        if self.frames is not None:
+            self.frames.flush()
+            self.state.flush()
+            self.frames = None
+            self.state = None
+
+    def report(self):
+        return self.count, self.dropped
+
+
+class DumpCamera:
+    """Stand-in for the Webots Camera that returns the frames of a dump, for CameraReader."""
+
+    def __init__(self, frames, fov):
+        self.frames = frames
+        self.fov = fov
+        self.index = 0
+
+    def getHeight(self):
+        return self.frames.shape[1]
+
+    def getWidth(self):
+        return self.frames.shape[2]
+
+    def getFov(self):
+        return self.fov
+
+    def getImage(self):
+        # a row of a C-ordered memmap is contiguous, CameraReader wraps it without a copy
+        return self.frames[self.index]
+
+
+ReplayFrame = namedtuple("ReplayFrame", ["index", "state", "reader"])
+
+
+class FrameReplay:
+    """Read back a FrameDump, memory-mapped read-only.
+
+    Iterating yields a ``ReplayFrame`` per dumped frame, in order: its ``state`` row and a
+    CameraReader that has just read the frame, so ``reader.raw``, ``reader.gray`` and
+    ``reader.bgr`` are what the controller had in flight and go to ``find_aruco``, the tracker or
+    a Marker unchanged. Nothing is decoded; replaying the same dump gives the same pixels every
+    time.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.frames = np.load(os.path.join(directory, FRAMES), mmap_mode="r")
+        self.state = np.load(os.path.join(directory, STATE), mmap_mode="r")
+        with open(os.path.join(directory, CAMERA)) as file:
+            self.camera_info = json.load(file)
+        # frames were appended in order, the first NaN time is the end of the dump
+        missing = np.flatnonzero(np.isnan(self.state["time"]))
+        self.count = int(missing[0]) if missing.size else len(self.state)
+        self.camera = DumpCamera(self.frames, self.camera_info["fov"])
+        self.reader = CameraReader(self.camera)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for index in range(self.count):
+            self.camera.index = index
+            yield ReplayFrame(index, self.state[index], self.reader.read())
+
+    @property
+    def focal(self):
+        return self.camera.getWidth() / 2 / np.tan(self.camera.getFov() / 2)
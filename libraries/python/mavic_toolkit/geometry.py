@@ -0,0 +1,56 @@
+from collections import namedtuple
+
+import numpy as np
+
+MarkerGeometry = namedtuple("MarkerGeometry", ["centers", "areas", "orientations", "errors", "boxes"])
+
+
+def convert_to_attitude(x_error, y_error, yaw):
+    """World-frame (x, y) into the body frame of a drone at ``yaw`` [rad], as (forward, left)."""
+    c, s = np.cos(yaw), np.sin(yaw)
+    R = np.array(((c, -s), (s, c)))
+    return np.matmul([x_error, y_error], R)
+
+
+def stack_corners(corner):
+    """Detector output (tuple of (1, 4, 2) arrays) as one float (N, 4, 2) array."""
+    if len(corner) == 0:
+        return np.empty((0, 4, 2), np.float32)
+    return np.asarray(corner, np.float32).reshape(-1, 4, 2)
+
+
+def marker_geometry(corners, resolution):
+    """Geometry of all markers at once.
+
+    corners    -- (N, 4, 2) corners in pixels, in detector order (top left, top right, bottom right, bottom left)
+    resolution -- (height, width) of the image
+
+    centers      -- (N, 2) sub-pixel x, y of the marker centre
+    areas        -- (N,) area in pixels^2
+    orientations -- (N,) angle of the top edge in rad, 0 when the marker is upright in the image
+    errors       -- (N, 2) x, y offset of the centre from the image centre, divided by the image width, height
+    boxes        -- (N, 4) bounding box x0, y0, x1, y1
+    """
+    height, width = resolution
+    corners = np.asarray(corners, np.float64).reshape(-1, 4, 2)
+    x = corners[:, :, 0]
+    y = corners[:, :, 1]
+    centers = corners.mean(axis=1)
+    # shoelace formula over the four corners
+    areas = 0.5 * np.abs(np.sum(x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y, axis=1))
+    top = corners[:, 1] - corners[:, 0]
+    orientations = np.arctan2(top[:, 1], top[:, 0])
+    size = np.array((width, height), np.float64)
+    errors = (centers - size / 2) / size
+    boxes = np.concatenate((corners.min(axis=1), corners.max(axis=1)), axis=1)
+    return MarkerGeometry(centers, areas, orientations, errors, boxes)
+
+
+def select_marker(ids, target_id=None):
+    """Index of the marker with target_id, the first marker when target_id is None, or None when absent."""
+    if ids is None or len(ids) == 0:
+        return None
+    if target_id is None:
+        return 0
+    index = np.flatnonzero(np.asarray(ids).reshape(-1) == target_id)
+    return int(index[0]) if len(index) else None
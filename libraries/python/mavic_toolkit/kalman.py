@@ -0,0 +1,109 @@
+import numpy as np
+
+
+class LandingFilter:
+    """Constant-velocity Kalman filter for the landing pad position relative to the drone.
+
+    The state is [px, py, vx, vy, bx, by]: drone position and velocity from the GPS and the pad
+    position, all in the world x/y plane. Marker fixes measure the pad relative to the drone,
+    b - p, so ``relative`` gives a smooth pad offset at every control step. It does not jump
+    when a frame has no marker, and vision can run slower than the controller.
+
+    Gyro rates widen the marker noise, because fixes taken while the drone rotates are blurred
+    and the gimbal lags behind.
+    """
+
+    def __init__(self, gps_noise=0.05, speed_noise=0.1, marker_noise=0.05, accel_noise=2.0, pad_noise=0.02, pad_prior=1.0):
+        self.gps_noise = gps_noise
+        self.speed_noise = speed_noise
+        self.marker_noise = marker_noise
+        self.accel_noise = accel_noise
+        self.pad_noise = pad_noise
+        self.pad_prior = pad_prior
+
+        eye = np.eye(2)
+        zero = np.zeros((2, 2))
+        self.H_gps = np.block([[eye, zero, zero], [zero, eye, zero]])
+        self.H_marker = np.block([[-eye, zero, eye]])
+        self.R_gps = np.diag([gps_noise**2] * 2 + [speed_noise**2] * 2)
+        self.F = np.eye(6)
+        self.Q = np.zeros((6, 6))
+
+        self.x = np.zeros(6)
+        self.gps_updates = 0
+        self.marker_updates = 0
+        self.reset()
+
+    def reset(self, position=(0.0, 0.0), pad=(0.0, 0.0), timestamp=None):
+        self.x[:] = (position[0], position[1], 0.0, 0.0, pad[0], pad[1])
+        self.P = np.diag([self.gps_noise**2] * 2 + [1.0] * 2 + [self.pad_prior**2] * 2)
+        self.time = timestamp
+        self.marker_time = None
+
+    def set_pad(self, x, y):
+        """Put the pad at a known world position, e.g. the GPS target while the marker is not used."""
+        self.x[4:6] = (x, y)
+        self.P[4:6, :] = 0.0
+        self.P[:, 4:6] = 0.0
+        self.P[4, 4] = self.P[5, 5] = self.pad_prior**2
+        self.marker_time = None
+
+    def predict(self, timestamp):
+        if self.time is None:
+            self.time = timestamp
+            return self.x
+        dt = timestamp - self.time
+        if dt <= 0.0:
+            return self.x
+        self.time = timestamp
+        # white acceleration on the drone, slow random walk on the pad
+        self.F[0, 2] = self.F[1, 3] = dt
+        q = self.accel_noise**2
+        self.Q[0, 0] = self.Q[1, 1] = q * dt**4 / 4
+        self.Q[0, 2] = self.Q[2, 0] = self.Q[1, 3] = self.Q[3, 1] = q * dt**3 / 2
+        self.Q[2, 2] = self.Q[3, 3] = q * dt**2
+        self.Q[4, 4] = self.Q[5, 5] = self.pad_noise**2 * dt
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        return self.x
+
+    def update(self, z, H, R):
+        y = z - H @ self.x
+        PHt = self.P @ H.T
+        S = H @ PHt + R
+        K = np.linalg.solve(S, PHt.T).T
+        self.x = self.x + K @ y
+        self.P = self.P - K @ H @ self.P
+        return y
+
+    def update_gps(self, position, speed):
+        """GPS position [m] and speed vector [m/s], only x and y are used."""
+        self.gps_updates += 1
+        return self.update(np.array((position[0], position[1], speed[0], speed[1])), self.H_gps, self.R_gps)
+
+    def update_marker(self, offset, timestamp, gyro=(0.0, 0.0, 0.0)):
+        """Pad position relative to the drone [m] seen in a frame taken at ``timestamp``.
+
+        Late fixes (asynchronous vision) are moved to the filter time with the estimated velocity.
+        """
+        if self.time is None or timestamp > self.time:
+            self.predict(timestamp)
+        age = self.time - timestamp
+        z = np.array((offset[0] - self.x[2] * age, offset[1] - self.x[3] * age))
+        rate = gyro[0] ** 2 + gyro[1] ** 2 + gyro[2] ** 2
+        R = np.eye(2) * self.marker_noise**2 * (1.0 + rate)
+        self.marker_updates += 1
+        self.marker_time = timestamp
+        return self.update(z, self.H_marker, R)
+
+    def relative(self):
+        """Pad position relative to the drone (x, y) [m]."""
+        return float(self.x[4] - self.x[0]), float(self.x[5] - self.x[1])
+
+    def marker_age(self, now):
+        if self.marker_time is None:
+            return None
+        return now - self.marker_time
+
+    def report(self):
+        return self.gps_updates, self.marker_updates
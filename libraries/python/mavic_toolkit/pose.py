@@ -0,0 +1,63 @@
+import math
+
+import cv2
+import numpy as np
+
+from mavic_toolkit.geometry import convert_to_attitude
+
+
+def camera_matrix(width, height, fov):
+    """Pinhole intrinsics of a Webots camera; fov is the horizontal field of view in rad."""
+    focal = width / 2 / math.tan(fov / 2)
+    return np.array(((focal, 0.0, width / 2), (0.0, focal, height / 2), (0.0, 0.0, 1.0)))
+
+
+class PoseEstimator:
+    """Metric position of the landing marker from its four corners with solvePnP (IPPE_SQUARE).
+
+    The intrinsics are derived once from the camera resolution and field of view. Offsets are
+    returned in the world frame like the GPS errors: x forward and y left of the drone at yaw 0,
+    z down to the marker.
+    """
+
+    def __init__(self, width, height, fov, marker_size=0.94):
+        self.camera_matrix = camera_matrix(width, height, fov)
+        self.dist_coeffs = np.zeros(5)
+        half = marker_size / 2
+        # corner order of the detector, which is what IPPE_SQUARE expects
+        self.object_points = np.array(((-half, half, 0), (half, half, 0), (half, -half, 0), (-half, -half, 0)))
+        self.rvec = None
+        self.tvec = None
+
+    @classmethod
+    def from_camera(cls, camera, marker_size=0.94):
+        return cls(camera.getWidth(), camera.getHeight(), camera.getFov(), marker_size)
+
+    def estimate(self, corners):
+        """rvec, tvec of the marker in the OpenCV camera frame, or None when solvePnP fails."""
+        image_points = np.asarray(corners, np.float64).reshape(4, 2)
+        ok, rvec, tvec = cv2.solvePnP(
+            self.object_points, image_points, self.camera_matrix, self.dist_coeffs, flags=cv2.SOLVEPNP_IPPE_SQUARE
+        )
+        # IPPE can return NaN for an exactly fronto-parallel square on integer corners
+        if not ok or not np.all(np.isfinite(tvec)):
+            return None
+        self.rvec, self.tvec = rvec, tvec
+        return rvec, tvec
+
+    def offset(self, corners, gimbal_pitch=math.pi / 2, yaw=0.0):
+        """Marker position relative to the drone [m] as (x, y, z), or None.
+
+        gimbal_pitch is the camera pitch below the horizon, pi / 2 when looking straight down.
+        """
+        if self.estimate(corners) is None:
+            return None
+        tx, ty, tz = self.tvec.reshape(3)
+        s, c = math.sin(gimbal_pitch), math.cos(gimbal_pitch)
+        # camera x right, y down, z along the optical axis, into body x forward, y left, z down
+        forward = -ty * s + tz * c
+        left = -tx
+        down = ty * c + tz * s
+        # body to world frame, the inverse of convert_to_attitude
+        x, y = convert_to_attitude(forward, left, -yaw)
+        return float(x), float(y), float(down)
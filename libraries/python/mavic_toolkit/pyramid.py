@@ -0,0 +1,91 @@
+import time
+
+import cv2
+import numpy as np
+
+from mavic_toolkit.detector import ArucoDetector
+
+
+class PyramidDetector:
+    """Downscale the frame in the altitude band where the marker is larger than ``target_side`` pixels.
+
+    Between ``min_altitude`` and the altitude where the marker shrinks to ``target_side`` pixels
+    (``band``), the frame is scaled so the marker is about ``target_side`` pixels wide; when that
+    scale misses, the next level (twice the scale) is tried, at most ``levels`` scales per frame
+    and always ending at full resolution. Above the band the marker is small enough for full
+    resolution. Below ``min_altitude`` the downscaled pass misses and the fallback doubles the
+    work (bench-pyramid.py), so those frames are searched at full resolution as well. With the
+    Mavic camera (focal about 483 px) the band is about 3-7 m: no downscaling at the 20 m
+    return-to-home altitude. Returned corners are in full-resolution pixel coordinates.
+    """
+
+    def __init__(self, detector=None, focal=None, marker_size=0.94, target_side=64, min_scale=0.25, levels=2, min_altitude=3.0):
+        self.detector = detector if detector is not None else ArucoDetector()
+        self.focal = focal
+        self.marker_size = marker_size
+        self.target_side = target_side
+        self.min_scale = min_scale
+        self.levels = levels
+        self.min_altitude = min_altitude
+        self.buffers = {}
+
+        self.frames = 0
+        self.hits = 0
+        self.busy = 0.0
+        self.scale = 1.0
+
+    def expected_side(self, altitude):
+        if self.focal is None or altitude is None or altitude <= 0.0:
+            return None
+        return self.focal * self.marker_size / altitude
+
+    def band(self):
+        """Altitudes [m] between which the frame is downscaled, None without a focal length."""
+        if self.focal is None:
+            return None
+        return self.min_altitude, max(self.min_altitude, self.focal * self.marker_size / self.target_side)
+
+    def scales(self, altitude):
+        side = self.expected_side(altitude)
+        if side is None or altitude < self.min_altitude:
+            return [1.0]
+        scale = float(np.clip(self.target_side / side, self.min_scale, 1.0))
+        scales = [scale]
+        while len(scales) < self.levels - 1 and scales[-1] * 2 < 1.0:
+            scales.append(scales[-1] * 2)
+        if scales[-1] < 1.0 and self.levels > 1:
+            scales.append(1.0)
+        return scales
+
+    def resize(self, gray, scale):
+        size = (max(1, int(gray.shape[1] * scale)), max(1, int(gray.shape[0] * scale)))
+        buffer = self.buffers.get(size)
+        if buffer is None:
+            buffer = self.buffers[size] = np.empty((size[1], size[0]), np.uint8)
+        return cv2.resize(gray, size, dst=buffer, interpolation=cv2.INTER_AREA)
+
+    def find_aruco(self, image, altitude=None):
+        start = time.perf_counter()
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+        for scale in self.scales(altitude):
+            if scale < 1.0:
+                corner, id, reject = self.detector.find_aruco(self.resize(image, scale))
+                # back to full-resolution pixel coordinates, through pixel centres
+                corner = tuple((c + 0.5) / scale - 0.5 for c in corner)
+                reject = tuple((r + 0.5) / scale - 0.5 for r in reject)
+            else:
+                corner, id, reject = self.detector.find_aruco(image)
+            self.scale = scale
+            if id is not None:
+                self.hits += 1
+                break
+        self.frames += 1
+        self.busy += time.perf_counter() - start
+        self.corner, self.id, self.reject = corner, id, reject
+        return corner, id, reject
+
+    def report(self):
+        hit_rate = self.hits / self.frames if self.frames else 0.0
+        busy = self.busy / self.frames * 1000.0 if self.frames else 0.0
+        return hit_rate, busy
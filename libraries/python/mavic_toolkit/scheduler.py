@@ -0,0 +1,89 @@
+import time
+from contextlib import contextmanager
+
+
+class Task:
+    def __init__(self, name, rate, timestep):
+        self.name = name
+        self.rate = rate
+        self.interval = 1000.0 / rate
+        # devices can only sample on whole control steps, so never sample slower than the task runs
+        self.period = max(timestep, int(self.interval // timestep) * timestep)
+        # devices deliver their first sample after one period, before that GPS values are NaN
+        self.next_time = float(self.period)
+        self.due = False
+        self.runs = 0
+        self.overruns = 0
+        self.busy = 0.0
+        self.first_time = None
+        self.last_time = None
+
+
+class RateScheduler:
+    """Rate-group scheduler driven by simulation time.
+
+    Call ``tick`` once per control step, then gate each block of the loop with ``due(name)`` and
+    wrap it in ``timed(name)``. A run counts as an overrun when its wall-clock execution time is
+    longer than the task period.
+    """
+
+    def __init__(self, timestep):
+        self.timestep = timestep
+        self.tasks = {}
+
+    def add(self, name, rate, devices=()):
+        task = Task(name, rate, self.timestep)
+        self.tasks[name] = task
+        for device in devices:
+            device.enable(task.period)
+        return task
+
+    def period(self, name):
+        return self.tasks[name].period
+
+    def tick(self, sim_time):
+        now = sim_time * 1000.0
+        for task in self.tasks.values():
+            task.due = now + 1e-6 >= task.next_time
+            if task.due:
+                task.next_time += task.interval
+                # after a stall do not try to catch up on every missed period
+                if task.next_time <= now:
+                    task.next_time = now + task.interval
+                if task.first_time is None:
+                    task.first_time = now
+                task.last_time = now
+                task.runs += 1
+
+    def due(self, name):
+        return self.tasks[name].due
+
+    @contextmanager
+    def timed(self, name):
+        task = self.tasks[name]
+        start = time.perf_counter()
+        try:
+            yield task
+        finally:
+            elapsed = time.perf_counter() - start
+            task.busy += elapsed
+            # runs are whole control steps apart, the closest two are one period apart
+            if elapsed * 1000.0 > task.period:
+                task.overruns += 1
+
+    def report(self):
+        stats = {}
+        for name, task in self.tasks.items():
+            span = 0.0 if task.first_time is None else (task.last_time - task.first_time) / 1000.0
+            rate = (task.runs - 1) / span if span > 0 else 0.0
+            busy = task.busy / task.runs * 1000.0 if task.runs else 0.0
+            stats[name] = (task.rate, rate, busy, task.overruns)
+        return stats
+
+    def print_report(self):
+        for name, (target, rate, busy, overruns) in self.report().items():
+            print(
+                "{:<10} target={:6.1f}[Hz] measured={:6.1f}[Hz] busy={:7.3f}[ms] overruns={}".format(
+                    name, target, rate, busy, overruns
+                )
+            )
@@ -0,0 +1,94 @@
+import time
+
+import numpy as np
+
+from mavic_toolkit.detector import ArucoDetector
+from mavic_toolkit.geometry import convert_to_attitude, select_marker
+
+
+class MarkerTracker:
+    """Detect the landing marker inside a region of interest predicted from the last fix.
+
+    The previous marker box is shifted by the image motion expected from the GPS speed and padded,
+    and detection only runs inside that window. The full frame is searched when there is no
+    previous fix and every ``full_search_every`` frames so a lost marker is recovered.
+    """
+
+    def __init__(self, detector=None, focal=None, padding=0.25, min_padding=16, full_search_every=10, target_id=None):
+        self.detector = detector if detector is not None else ArucoDetector()
+        # focal length [px], needed to turn the GPS speed into image motion
+        self.focal = focal
+        self.padding = padding
+        self.min_padding = min_padding
+        self.full_search_every = full_search_every
+        self.target_id = target_id
+
+        self.box = None
+        self.timestamp = None
+        self.since_full = 0
+        self.roi = None
+
+        self.frames = 0
+        self.hits = 0
+        self.full_frames = 0
+        self.busy = 0.0
+
+    def reset(self):
+        self.box = None
+        self.timestamp = None
+        self.since_full = 0
+
+    def predict(self, timestamp, speed=None, altitude=None, yaw=0.0):
+        x0, y0, x1, y1 = self.box
+        if self.focal is not None and speed is not None and altitude is not None and altitude > 0.1:
+            dt = timestamp - self.timestamp
+            # world speed to body frame
+            forward, left = convert_to_attitude(speed[0], speed[1], yaw)
+            # the ground slides down the image when flying forward and right when flying left
+            shift_x = left * dt * self.focal / altitude
+            shift_y = forward * dt * self.focal / altitude
+            x0, x1 = x0 + shift_x, x1 + shift_x
+            y0, y1 = y0 + shift_y, y1 + shift_y
+        pad = max(self.min_padding, self.padding * max(x1 - x0, y1 - y0))
+        return x0 - pad, y0 - pad, x1 + pad, y1 + pad
+
+    def find_aruco(self, image, timestamp, speed=None, altitude=None, yaw=0.0):
+        start = time.perf_counter()
+        height, width = image.shape[:2]
+        self.roi = None
+        if self.box is not None and self.since_full < self.full_search_every:
+            x0, y0, x1, y1 = self.predict(timestamp, speed, altitude, yaw)
+            x0, y0 = max(0, int(x0)), max(0, int(y0))
+            x1, y1 = min(width, int(np.ceil(x1))), min(height, int(np.ceil(y1)))
+            if x1 - x0 > 8 and y1 - y0 > 8:
+                self.roi = (x0, y0, x1, y1)
+
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            corner, id, reject = self.detector.find_aruco(image[y0:y1, x0:x1])
+            offset = np.array((x0, y0), np.float32)
+            corner = tuple(c + offset for c in corner)
+            reject = tuple(r + offset for r in reject)
+            self.since_full += 1
+        else:
+            corner, id, reject = self.detector.find_aruco(image)
+            self.full_frames += 1
+            self.since_full = 0
+
+        target = select_marker(id, self.target_id)
+        if target is not None:
+            points = corner[target].reshape(-1, 2)
+            self.box = (*points.min(axis=0), *points.max(axis=0))
+            self.hits += 1
+        else:
+            self.box = None
+        self.timestamp = timestamp
+        self.frames += 1
+        self.busy += time.perf_counter() - start
+        self.corner, self.id, self.reject = corner, id, reject
+        return corner, id, reject
+
+    def report(self):
+        hit_rate = self.hits / self.frames if self.frames else 0.0
+        busy = self.busy / self.frames * 1000.0 if self.frames else 0.0
+        return hit_rate, busy, self.full_frames
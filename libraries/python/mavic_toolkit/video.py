@@ -0,0 +1,99 @@
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+
+class VideoRecorder:
+    """Encode camera frames into a video file on a background thread.
+
+    Frames are sampled at the file's frame rate in simulation time: frame ``k`` of the video is
+    the first one submitted at or after ``k / fps`` seconds, so the video plays at the speed the
+    simulation ran whatever the camera or control rate. A frame that covers several slots, e.g.
+    after the camera was off, is written once per slot.
+
+    ``submit`` copies the frame into one of ``capacity`` preallocated buffers, converting BGRA to
+    BGR on the way, and returns; the encoder thread writes the buffers in order. When it falls
+    behind and no buffer is free the frame is dropped and counted, the control loop never waits.
+    """
+
+    def __init__(self, filename, size, fps=20.0, fourcc="XVID", capacity=32):
+        self.filename = filename
+        self.size = tuple(size)
+        self.fps = fps
+        self.fourcc = fourcc
+        width, height = self.size
+        self.free = queue.Queue()
+        for _ in range(capacity):
+            self.free.put(np.empty((height, width, 3), np.uint8))
+        self.frames = queue.Queue()
+        self.writer = None
+        self.thread = None
+        self.start_time = None
+        self.slots = 0
+
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+
+    def start(self):
+        self.writer = cv2.VideoWriter(self.filename, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, self.size)
+        self.thread = threading.Thread(target=self._loop, name="video", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.thread is not None:
+            self.frames.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+    def _slot(self, time):
+        if self.start_time is None:
+            return 1
+        # a little slack so a frame exactly on a slot boundary is not lost to rounding
+        return int((time - self.start_time) * self.fps + 1e-6) + 1
+
+    def due(self, time):
+        """True when a frame submitted at ``time`` would start a new video frame."""
+        return self.thread is not None and self._slot(time) > self.slots
+
+    def submit(self, frame, time):
+        """Queue ``frame`` for the slots up to ``time``; False when none is due or no buffer is free."""
+        slot = self._slot(time)
+        if self.thread is None or slot <= self.slots:
+            return False
+        if self.start_time is None:
+            self.start_time = time
+        count = slot - self.slots
+        self.slots = slot
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += count
+            return False
+        if frame.ndim == 3 and frame.shape[2] == 4:
+            cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR, dst=buffer)
+        else:
+            np.copyto(buffer, frame)
+        self.frames.put((buffer, count))
+        self.submitted += 1
+        return True
+
+    def _loop(self):
+        while True:
+            item = self.frames.get()
+            if item is None:
+                return
+            buffer, count = item
+            for _ in range(count):
+                self.writer.write(buffer)
+            self.written += count
+            self.free.put(buffer)
+
+    def report(self):
+        return self.submitted, self.written, self.dropped
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import namedtuple
+
+from mavic_toolkit.detector import ArucoDetector
+
+Observation = namedtuple("Observation", ["timestamp", "corner", "id", "latency"])
+
+
+class VisionWorker:
+    """Run ArUco detection on a background thread so a slow frame never delays the control step.
+
+    The control loop hands over the newest camera frame with ``submit`` and picks up the newest
+    result with ``latest``; neither call blocks. Only one pending frame is kept, so a frame that
+    has not been picked up yet is dropped when a newer one arrives.
+    """
+
+    def __init__(self, detector=None):
+        self.detector = detector if detector is not None else ArucoDetector()
+        self.condition = threading.Condition()
+        self.pending = None
+        self.observation = None
+        self.running = False
+        self.thread = None
+
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.ages = 0
+        self.age_total = 0.0
+        self.age_max = 0.0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, name="vision", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def submit(self, image, timestamp):
+        with self.condition:
+            if self.pending is not None:
+                self.dropped += 1
+            self.pending = (image, timestamp)
+            self.submitted += 1
+            self.condition.notify()
+
+    def latest(self):
+        return self.observation
+
+    def age(self, now, observation=None):
+        """Seconds between ``now`` and the frame of ``observation`` (default the latest); every call counts in ``report``."""
+        if observation is None:
+            observation = self.observation
+        if observation is None:
+            return None
+        age = now - observation.timestamp
+        self.ages += 1
+        self.age_total += age
+        self.age_max = max(self.age_max, age)
+        return age
+
+    def report(self):
+        """Submitted, processed and dropped frames, mean and max observation age [s]."""
+        mean = self.age_total / self.ages if self.ages else 0.0
+        return self.submitted, self.processed, self.dropped, mean, self.age_max
+
+    def _loop(self):
+        while True:
+            with self.condition:
+                while self.running and self.pending is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                image, timestamp = self.pending
+                self.pending = None
+            start = time.perf_counter()
+            corner, id, _ = self.detector.find_aruco(image)
+            self.observation = Observation(timestamp, corner, id, time.perf_counter() - start)
+            self.processed += 1
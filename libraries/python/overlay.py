@@ -0,0 +1,64 @@
+"""Frame overlay drawn in one pass, with translucent boxes blended only where they are.
+
+Primitives are queued during the control step and ``render`` draws them in the order they were
+queued. A translucent box used to be drawn as ``shapes = image.copy()``, a filled rectangle and
+``cv2.addWeighted`` over the whole frame; here only the pixels inside the box are blended,
+against a view of a frame-sized scratch buffer that is filled with the box color once and reused
+from frame to frame.
+"""
+
+import cv2
+import numpy as np
+
+LINE = 0
+CIRCLE = 1
+BOX = 2
+
+
+class Overlay:
+    def __init__(self):
+        self.primitives = []
+        # (color, channels) -> scratch buffer filled with that color
+        self.patches = {}
+
+    def line(self, start, end, color, thickness=1):
+        self.primitives.append((LINE, (int(start[0]), int(start[1])), (int(end[0]), int(end[1])), color, thickness))
+
+    def circle(self, center, radius, color, thickness=1):
+        self.primitives.append((CIRCLE, (int(center[0]), int(center[1])), int(radius), color, thickness))
+
+    def box(self, corner, opposite, color, alpha=0.4):
+        """Filled box over ``alpha`` of the pixels, corners included like cv2.rectangle."""
+        self.primitives.append((BOX, (int(corner[0]), int(corner[1])), (int(opposite[0]), int(opposite[1])), color, alpha))
+
+    def clear(self):
+        self.primitives = []
+
+    def render(self, image):
+        """Draw the queued primitives into ``image`` in place and clear the queue."""
+        for kind, a, b, color, extra in self.primitives:
+            if kind == LINE:
+                cv2.line(image, a, b, color, extra)
+            elif kind == CIRCLE:
+                cv2.circle(image, a, b, color, extra)
+            else:
+                self._blend(image, a, b, color, extra)
+        self.primitives = []
+        return image
+
+    def _blend(self, image, corner, opposite, color, alpha):
+        height, width = image.shape[:2]
+        x0, x1 = sorted((corner[0], opposite[0]))
+        y0, y1 = sorted((corner[1], opposite[1]))
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, width - 1), min(y1, height - 1)
+        if x0 > x1 or y0 > y1:
+            return
+        roi = image[y0 : y1 + 1, x0 : x1 + 1]
+        key = (tuple(color), roi.shape[2:])
+        patch = self.patches.get(key)
+        if patch is None or patch.shape[:2] != (height, width):
+            patch = np.empty((height, width) + roi.shape[2:], np.uint8)
+            patch[:] = color[: roi.shape[2]] if roi.ndim == 3 else color[0]
+            self.patches[key] = patch
+        cv2.addWeighted(patch[: roi.shape[0], : roi.shape[1]], alpha, roi, 1.0 - alpha, 0.0, dst=roi)
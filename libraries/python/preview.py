@@ -0,0 +1,92 @@
+"""Camera preview window drawn by a background thread at a capped frame rate.
+
+``cv2.imshow`` plus ``cv2.waitKey(1)`` on every vision step costs the control loop a few
+milliseconds, more with the overlay drawn for it. A ``Preview`` takes at most ``fps`` frames per
+wall-clock second: ``due`` tells the loop whether the next frame would be shown, so the overlay
+is only drawn for those, and ``submit`` copies the frame and returns. The window thread shows
+the newest frame; one it did not get to before the next arrived is dropped.
+
+Without a display (no DISPLAY or WAYLAND_DISPLAY on Linux) or with MAVIC_PREVIEW=0 in the
+environment the preview is off: no thread, no window, ``due`` is always False.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import cv2
+
+
+def display_available():
+    if os.environ.get("MAVIC_PREVIEW", "1") == "0":
+        return False
+    if sys.platform.startswith("linux"):
+        return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    return True
+
+
+class Preview:
+    def __init__(self, name, fps=15.0, enabled=None):
+        self.name = name
+        self.interval = 1.0 / fps
+        self.enabled = display_available() if enabled is None else enabled
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.frame = None
+        self.next_time = 0.0
+        self.running = False
+        self.thread = None
+
+        self.submitted = 0
+        self.shown = 0
+        self.dropped = 0
+
+    def start(self):
+        if self.enabled:
+            self.running = True
+            self.thread = threading.Thread(target=self._loop, name="preview", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.ready.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def due(self):
+        """True when a frame submitted now would be taken."""
+        return self.running and time.perf_counter() >= self.next_time
+
+    def submit(self, frame):
+        """Hand over a copy of ``frame``; False when it is not due and was ignored."""
+        if not self.due():
+            return False
+        self.next_time = time.perf_counter() + self.interval
+        frame = frame.copy()
+        with self.lock:
+            if self.frame is not None:
+                self.dropped += 1
+            self.frame = frame
+        self.submitted += 1
+        self.ready.set()
+        return True
+
+    def _loop(self):
+        # every HighGUI call stays on this thread
+        while self.running:
+            self.ready.wait(self.interval)
+            self.ready.clear()
+            with self.lock:
+                frame, self.frame = self.frame, None
+            if frame is not None:
+                cv2.imshow(self.name, frame)
+                self.shown += 1
+            cv2.waitKey(1)
+        if self.shown:
+            cv2.destroyWindow(self.name)
+
+    def report(self):
+        return self.submitted, self.shown, self.dropped